@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the right-hand side of the equation of motion
+
+Compares calc.F with the specialized function returned by calc.compile_F
+for each combination of drag and Coriolis terms.
+
+    Usage:
+        python benchmarks/bench_rhs.py [number_of_calls]
+"""
+
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import simtir.calc as calc
+from simtir.classes import OBJET, PHYS
+
+CASES = {
+    "drag + coriolis": PHYS(9.806, 1.184, 0.018e5, np.pi / 4, 7.272e-05),
+    "drag": PHYS(3.711, 0.020, 1.48e5, np.pi / 4, 0.),
+    "coriolis": PHYS(9.806, 0., 0., np.pi / 4, 7.272e-05),
+    "vacuum": PHYS(9.806, 0., 0., np.pi / 4, 0.),
+}
+
+
+def bench(number):
+    D, L = 0.1, 0.5
+    Sys = OBJET(np.pi / 12 * D ** 3 + (L * np.pi / 4) * D ** 2, 2.5, np.pi / 4 * D ** 2)
+    U = np.array([0., 0., 100., 10., 0., 20.])
+    DU = np.empty((6,))
+
+    print(f"{'case':<18}{'F (calls/s)':>16}{'compile_F (calls/s)':>22}{'speed-up':>10}")
+    for name, Phys in CASES.items():
+        f = calc.compile_F(Sys, Phys)
+        t_ref = timeit.timeit(lambda: calc.F(U, Sys, Phys), number=number)
+        t_new = timeit.timeit(lambda: f(U, DU), number=number)
+        print(f"{name:<18}{number / t_ref:>16,.0f}{number / t_new:>22,.0f}{t_ref / t_new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite of the simulation hot paths
+
+Measures the right-hand side of the equation of motion, the integrators for
+growing numbers of projectiles, the graph extraction on large trajectories,
+the configuration loader on large configurations and the start-up time of
+main.py. Results are printed and can be written as JSON; a stored result
+file can be used as a baseline to flag regressions.
+
+    Usage:
+        python benchmarks/run.py [--output results.json] [--only NAME ...]
+                                 [--sizes 1 100 10000] [--quick]
+                                 [--compare baseline.json] [--threshold 0.1]
+
+With --compare, the exit status is 1 when a measure is worse than the
+baseline by more than the threshold (a fraction, 0.1 = 10 %).
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import simtir
+import simtir.batch as batch
+import simtir.calc as calc
+import simtir.config_loader as config_loader
+import simtir.grph as grph
+from simtir import drag
+from simtir.atmosphere import get_atmosphere
+from simtir.classes import OBJET, PHYS
+
+PHYS_AIR = PHYS(9.806, 1.184, 0.018e5, np.pi / 4, 7.272e-05)
+PHYS_ISA = PHYS(9.806, 1.184, 0.018e5, np.pi / 4, 7.272e-05, get_atmosphere("isa"))
+D, L = 0.1, 0.5
+SYS = OBJET(np.pi / 12 * D ** 3 + (L * np.pi / 4) * D ** 2, 2.5, np.pi / 4 * D ** 2)
+SYS_G7 = OBJET(SYS.V, SYS.m, SYS.S, drag.get_curve("G7"))
+H = 0.01
+TMAX = 100.0
+
+
+def chrono(fonction, repeat=3):
+    """Best wall-clock time of repeat calls of fonction"""
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fonction()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def mesure(name, value, unit, higher_is_better=True):
+    return {"name": name, "value": float(value), "unit": unit, "higher_is_better": higher_is_better}
+
+
+def conditions_initiales(n, seed=0):
+    """n launches from 100 m, random horizontal and upward velocities"""
+    rng = np.random.default_rng(seed)
+    M0 = np.zeros((n, 6))
+    M0[:, 2] = 100.0
+    M0[:, 3] = rng.uniform(5.0, 20.0, n)
+    M0[:, 4] = rng.uniform(-5.0, 5.0, n)
+    M0[:, 5] = rng.uniform(10.0, 30.0, n)
+    return M0
+
+
+def bench_rhs(args):
+    """calc.F and calc.compile_F calls per second"""
+    number = 20000 if args.quick else 200000
+    U = np.array([0., 0., 100., 10., 0., 20.])
+    DU = np.empty((6,))
+    f = calc.compile_F(SYS, PHYS_AIR)
+
+    t_ref = chrono(lambda: [calc.F(U, SYS, PHYS_AIR) for _ in range(number)])
+    t_new = chrono(lambda: [f(U, DU) for _ in range(number)])
+    f_isa = calc.compile_F(SYS, PHYS_ISA)
+    t_isa = chrono(lambda: [f_isa(U, DU) for _ in range(number)])
+    f_g7 = calc.compile_F(SYS_G7, PHYS_ISA)
+    t_g7 = chrono(lambda: [f_g7(U, DU) for _ in range(number)])
+    return [mesure("rhs.F", number / t_ref, "calls/s"),
+            mesure("rhs.compile_F", number / t_new, "calls/s"),
+            mesure("rhs.compile_F.isa", number / t_isa, "calls/s"),
+            mesure("rhs.compile_F.g7", number / t_g7, "calls/s")]
+
+
+def bench_integrators(args):
+    """Integration steps per second for 1, 100 and 10,000 projectiles"""
+    results = []
+    for n in args.sizes:
+        M0 = conditions_initiales(n)
+
+        def euler():
+            return sum(len(calc.EULER(U0, SYS, PHYS_AIR, H, TMAX)) - 1 for U0 in M0)
+
+        def integre():
+            return sum(len(calc.INTEGRE(U0, SYS, PHYS_AIR, H, TMAX)[1]) - 1 for U0 in M0)
+
+        def vectorise():
+            timpact, _, _ = batch.BATCH(M0, SYS.m, SYS.S, SYS.V, PHYS_AIR, H, TMAX)
+            return int(np.sum(np.ceil(timpact / H)))
+
+        for label, fonction in (("EULER", euler), ("INTEGRE", integre), ("BATCH", vectorise)):
+            steps = fonction()
+            t = chrono(fonction, repeat=1 if n > 100 else 3)
+            results.append(mesure(f"integrate.{label}.{n}", steps / t, "steps/s"))
+    return results
+
+
+def bench_graphs(args):
+    """grph.extrait and grph.TRACE_3D on a large trajectory"""
+    n = 100000 if args.quick else 2000000
+    T = np.linspace(0.0, 100.0, n)
+    S = np.zeros((n, 6))
+    S[:, 0], S[:, 3] = 10.0 * T, 10.0
+    S[:, 2], S[:, 5] = 20.0 * T - 4.903 * T ** 2, 20.0 - 9.806 * T
+
+    choix = [(1, 1), (1, 3), (2, 3), (3, 2), (4, 1), (4, 2), (5, 1), (5, 2)]
+    t_extrait = chrono(lambda: [grph.extrait(c1, c2, S, n, SYS, PHYS_AIR) for c1, c2 in choix])
+    t_3d = chrono(lambda: grph.TRACE_3D(S, n))
+    return [mesure("graphs.extrait", len(choix) * n / t_extrait, "samples/s"),
+            mesure("graphs.TRACE_3D", t_3d, "s", higher_is_better=False)]
+
+
+def configuration(n):
+    """Configuration dictionary of n projectiles alternating both velocity types"""
+    projectiles = []
+    for k in range(n):
+        if k % 2:
+            velocity = {"type": "spherical", "magnitude": 25.0 + k % 7, "theta_deg": 60.0, "phi_deg": k % 360}
+        else:
+            velocity = {"type": "cartesian", "vx": 10.0, "vy": k % 5, "vz": 20.0}
+        projectiles.append({"name": f"Projectile {k + 1}", "diameter": 0.1, "length": 0.5, "mass": 2.5,
+                            "initial_altitude": 100.0, "initial_velocity": velocity})
+    return {
+        "simulation": {"Tmax": 10.0, "h": 0.01, "coordinate_system": "c", "method": 3},
+        "physics": {"preset": "earth_air"},
+        "projectiles": projectiles,
+        "output": {"show_numerical_info": False, "auto_plot": False},
+    }
+
+
+def bench_config(args):
+    """config_loader.load_simulation_config on a large configuration"""
+    n = 1000 if args.quick else 20000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "config.json")
+        with open(path, "w") as f:
+            json.dump(configuration(n), f)
+        t = chrono(lambda: config_loader.load_simulation_config(path))
+    return [mesure("config.load_simulation_config", n / t, "projectiles/s")]
+
+
+def bench_startup(args):
+    """Wall-clock time of a headless main.py run of one short projectile"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "config.json")
+        config = configuration(1)
+        config["simulation"]["Tmax"] = 0.1
+        with open(path, "w") as f:
+            json.dump(config, f)
+
+        command = [sys.executable, os.path.join(ROOT, "main.py"), path, "--headless", "--no-cache"]
+        t = chrono(lambda: subprocess.run(command, cwd=tmp, stdout=subprocess.DEVNULL, check=True))
+    return [mesure("startup.main", t, "s", higher_is_better=False)]
+
+
+BENCHMARKS = {
+    "rhs": bench_rhs,
+    "integrators": bench_integrators,
+    "graphs": bench_graphs,
+    "config": bench_config,
+    "startup": bench_startup,
+}
+
+
+def compare(results, baseline, threshold):
+    """
+    Relative change of each measure against a baseline
+
+    Returns:
+        list: (name, baseline value, value, change, regression) tuples, change
+            being positive when the measure improved
+    """
+    reference = {entry["name"]: entry for entry in baseline["results"]}
+    rows = []
+    for entry in results:
+        ref = reference.get(entry["name"])
+        if ref is None or ref["value"] == 0:
+            continue
+        change = entry["value"] / ref["value"] - 1
+        if not entry["higher_is_better"]:
+            change = ref["value"] / entry["value"] - 1
+        rows.append((entry["name"], ref["value"], entry["value"], change, change < -threshold))
+    return rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark suite of the simulation hot paths")
+    parser.add_argument("--output", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1, 100, 10000],
+                        help="numbers of projectiles of the integrator benchmarks")
+    parser.add_argument("--quick", action="store_true", help="smaller problems, for a smoke run")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against a stored result file")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative slowdown reported as a regression (default 0.1)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.quick and args.sizes == [1, 100, 10000]:
+        args.sizes = [1, 100]
+
+    results = []
+    for name in args.only or BENCHMARKS:
+        for entry in BENCHMARKS[name](args):
+            print(f"{entry['name']:<36}{entry['value']:>20,.6g} {entry['unit']}")
+            results.append(entry)
+
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "simtir": simtir.__version__,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        print(f"\n{'benchmark':<36}{'baseline':>20}{'current':>20}{'change':>9}")
+        for name, ref, value, change, regression in rows:
+            flag = "  REGRESSION" if regression else ""
+            print(f"{name:<36}{ref:>20,.6g}{value:>20,.6g}{change:>+9.1%}{flag}")
+        if any(row[4] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
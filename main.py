@@ -18,21 +18,43 @@ Le programme extrait ensuite les informations pertinentes de la simulation
     See CONFIG_README.md for documentation on the configuration format.
 
     Usage:
-        python main.py [config_file.json]
+        python main.py [config_file.json] [--headless] [--output PATH] [--sweep] [--firing-tables] [--monte-carlo] [--no-cache]
 
     If no config file is specified, defaults to 'config.json'
+
+    --headless only simulates and reports results: the screen is not cleared,
+    no figure is built and matplotlib is never imported. Figures are otherwise
+    built when output.auto_plot is true in the configuration.
+
+    --output PATH writes the trajectories as memory-mappable columns, see
+    simtir/output.py.
+
+    --sweep runs the sweep section of the configuration and writes a table
+    of outcomes, see CONFIG_README.md.
+
+    --firing-tables builds the firing table of every projectile, see
+    simtir/firing_table.py.
+
+    --monte-carlo runs the dispersion analysis of the monte_carlo section of
+    the configuration, see simtir/montecarlo.py.
 """
 
-import matplotlib.pyplot as plt
-import numpy as np
+import argparse
 import os
 import sys
-import scipy.integrate as itg
 
-import simtir.calc as calc
+import simtir.cache as cache
 import simtir.grph as grph
+import simtir.instrument as instrument
+import simtir.integrators as integrators
+import simtir.manifest as manifest
+import simtir.output as output
+import simtir.parallel as parallel
+import simtir.sweep as sweep
 import simtir.menu as men
 import simtir.config_loader as config_loader
+import simtir.firing_table as firing_table
+import simtir.montecarlo as montecarlo
 from simtir.classes import PHYS
 
 """
@@ -61,124 +83,237 @@ from simtir.classes import PHYS
 
 """
 
-# Load configuration from JSON file
-config_file = sys.argv[1] if len(sys.argv) > 1 else "config.json"
-
-try:
-    (Tmax, h, rep, method, Phys, SYS, M0, config) = config_loader.load_simulation_config(config_file)
-    config_loader.print_config_summary(config, Phys, SYS, M0)
-except FileNotFoundError:
-    print(f"Error: Configuration file '{config_file}' not found.")
-    print("Usage: python main.py [config_file.json]")
-    print("\nSee CONFIG_README.md for documentation on creating configuration files.")
-    sys.exit(1)
-except Exception as e:
-    print(f"Error loading configuration: {e}")
-    sys.exit(1)
-
-# Get number of projectiles
-K = len(SYS)
-
-# Run simulation for each projectile
-print("Running simulation...")
-M, NK = [], []
-Nmax = int(Tmax / h)
 
-for k in range(K):
-    # Résolution numérique de l'équation de la dynamique
-    T = np.linspace(0, Tmax, Nmax)
-
-    def f(U, t):
-        return calc.F(U, SYS[k], Phys)
-
-    M.append(itg.odeint(f, M0[k], T))
-    NK.append(2 * int((-M0[k, 5] + np.sqrt(M0[k, 5] ** 2 + 2 * M0[k, 2] * Phys.g) / Phys.g / h)))
-
-N = max(NK)
-
-# Display results
-os.system("clear")
-print("\n     *Simulation effectuée*\n")
-
-# Show numerical info if requested
-output_config = config.get("output", {})
-show_numerical = output_config.get("show_numerical_info", False)
-auto_plot = output_config.get("auto_plot", False)
-
-if show_numerical:
-    for k in range(K):
-        projectile_name = config["projectiles"][k].get("name", f"Projectile N°{k + 1}")
-        print(f"\n=== {projectile_name} ===")
-        men.numerique(M[k], NK[k], SYS[k], Phys, h)
-        print()
-
-# Generate all plots automatically in a comprehensive view
-print("Generating comprehensive plots...")
-
-# Create main figure with all 2D plots (14 subplots in 4x4 grid)
-fig = plt.figure(figsize=(20, 16))
-fig.suptitle('Complete Simulation Results', fontsize=16, fontweight='bold')
-
-# Define all plot configurations
-# Format: (choix1, choix2, subplot_position)
-plot_configs = [
-    # Row 1: Positions
-    (1, 1, 1),   # x(t)
-    (1, 2, 2),   # y(t)
-    (1, 3, 3),   # z(t)
-    # Row 2: Velocities
-    (2, 1, 5),   # vx(t)
-    (2, 2, 6),   # vy(t)
-    (2, 3, 7),   # vz(t)
-    # Row 3: Trajectories
-    (3, 1, 9),   # y(x)
-    (3, 2, 10),  # z(x)
-    (3, 3, 11),  # z(y)
-    # Row 4: Norms and Energies
-    (4, 1, 13),  # r(t)
-    (4, 2, 14),  # v(t)
-    (5, 1, 15),  # Ec(t)
-    (5, 2, 16),  # Ep(t)
-]
-
-# Generate all 2D plots
-for choix1, choix2, subplot_pos in plot_configs:
-    ax = fig.add_subplot(4, 4, subplot_pos)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ballistic simulation driven by a JSON configuration file.")
+    parser.add_argument("config_file", nargs="?", default="config.json",
+                        help="JSON configuration file (default: config.json)")
+    parser.add_argument("--headless", action="store_true",
+                        help="only simulate and report results: no screen clearing, no plots, no matplotlib")
+    parser.add_argument("--output", metavar="PATH",
+                        help="write trajectories and summaries to PATH (overrides output.results_dir)")
+    parser.add_argument("--sweep", action="store_true",
+                        help="run the sweep section of the configuration instead of the projectiles list")
+    parser.add_argument("--firing-tables", action="store_true",
+                        help="build (or reuse) the firing table of every projectile, see the firing_table section")
+    parser.add_argument("--monte-carlo", action="store_true",
+                        help="run the dispersion analysis of the monte_carlo section of the configuration")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ignore the result cache and the run manifest for this run")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="time the phases of the run and write a JSON (or .csv) summary to PATH")
+    return parser.parse_args(argv)
+
+
+def plot_results(M, TT, NK, h, SYS, Phys, config):
+    """
+    Build the comprehensive 2D figure and the 3D trajectory figure
+
+    matplotlib is only imported here so that headless runs never load it.
+    """
+    import matplotlib.pyplot as plt
+
+    K = len(SYS)
+
+    # Generate all plots automatically in a comprehensive view
+    print("Generating comprehensive plots...")
+
+    # Create main figure with all 2D plots (14 subplots in 4x4 grid)
+    fig = plt.figure(figsize=(20, 16))
+    fig.suptitle('Complete Simulation Results', fontsize=16, fontweight='bold')
+
+    # Define all plot configurations
+    # Format: (choix1, choix2, subplot_position)
+    plot_configs = [
+        # Row 1: Positions
+        (1, 1, 1),   # x(t)
+        (1, 2, 2),   # y(t)
+        (1, 3, 3),   # z(t)
+        # Row 2: Velocities
+        (2, 1, 5),   # vx(t)
+        (2, 2, 6),   # vy(t)
+        (2, 3, 7),   # vz(t)
+        # Row 3: Trajectories
+        (3, 1, 9),   # y(x)
+        (3, 2, 10),  # z(x)
+        (3, 3, 11),  # z(y)
+        # Row 4: Norms and Energies
+        (4, 1, 13),  # r(t)
+        (4, 2, 14),  # v(t)
+        (5, 1, 15),  # Ec(t)
+        (5, 2, 16),  # Ep(t)
+    ]
+
+    # Generate all 2D plots
+    for choix1, choix2, subplot_pos in plot_configs:
+        ax = fig.add_subplot(4, 4, subplot_pos)
+
+        for k in range(K):
+            projectile_name = SYS.name(k)
+            G = grph.TRACE(choix1, choix2, M[k], NK[k], h, SYS[k], Phys, TT[k])
+
+            ax.plot(G[0], G[1], label=projectile_name, linewidth=1.5)
+
+        ax.set_xlabel(G[2][0], fontsize=9)
+        ax.set_ylabel(G[2][1], fontsize=9)
+        ax.set_title(G[2][2], fontsize=10, fontweight='bold')
+        ax.legend(fontsize=8)
+        ax.grid(True, alpha=0.3)
+        ax.spines['right'].set_color('none')
+        ax.spines['top'].set_color('none')
+
+    plt.tight_layout(rect=[0, 0.03, 1, 0.97])
+    plt.show()
+
+    # Create separate 3D trajectory plot
+    fig_3d = plt.figure(figsize=(12, 10))
+    ax_3d = fig_3d.add_subplot(111, projection='3d')
 
     for k in range(K):
-        projectile_name = config["projectiles"][k].get("name", f"Projectile {k + 1}")
-        G = grph.TRACE(choix1, choix2, M[k], NK[k], h, SYS[k], Phys)
-
-        ax.plot(G[0], G[1], label=projectile_name, linewidth=1.5)
-
-    ax.set_xlabel(G[2][0], fontsize=9)
-    ax.set_ylabel(G[2][1], fontsize=9)
-    ax.set_title(G[2][2], fontsize=10, fontweight='bold')
-    ax.legend(fontsize=8)
-    ax.grid(True, alpha=0.3)
-    ax.spines['right'].set_color('none')
-    ax.spines['top'].set_color('none')
-
-plt.tight_layout(rect=[0, 0.03, 1, 0.97])
-plt.show()
-
-# Create separate 3D trajectory plot
-fig_3d = plt.figure(figsize=(12, 10))
-ax_3d = fig_3d.add_subplot(111, projection='3d')
-
-for k in range(K):
-    projectile_name = config["projectiles"][k].get("name", f"Projectile {k + 1}")
-    G = grph.TRACE_3D(M[k], NK[k])
-    ax_3d.plot(G[0], G[1], G[2], label=projectile_name, linewidth=2)
-
-ax_3d.set_xlabel(G[3][0], fontsize=12)
-ax_3d.set_ylabel(G[3][1], fontsize=12)
-ax_3d.set_zlabel(G[3][2], fontsize=12)
-ax_3d.set_title(G[3][3], fontsize=14, fontweight='bold')
-ax_3d.legend(fontsize=10)
-ax_3d.grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.show()
-
-print("\nSimulation terminée.")
+        projectile_name = SYS.name(k)
+        G = grph.TRACE_3D(M[k], NK[k])
+        ax_3d.plot(G[0], G[1], G[2], label=projectile_name, linewidth=2)
+
+    ax_3d.set_xlabel(G[3][0], fontsize=12)
+    ax_3d.set_ylabel(G[3][1], fontsize=12)
+    ax_3d.set_zlabel(G[3][2], fontsize=12)
+    ax_3d.set_title(G[3][3], fontsize=14, fontweight='bold')
+    ax_3d.legend(fontsize=10)
+    ax_3d.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    plt.show()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.profile:
+        instrument.enable()
+    try:
+        run(args)
+    finally:
+        if args.profile:
+            instrument.write_report(args.profile)
+            print(f"Profile written to {args.profile}")
+
+
+def run(args):
+    # Load configuration from JSON file
+    config_file = args.config_file
+
+    try:
+        with instrument.phase("config"):
+            (Tmax, h, rep, method, Phys, SYS, M0, config) = config_loader.load_simulation_config(config_file)
+        config_loader.print_config_summary(config, Phys, SYS, M0)
+    except FileNotFoundError:
+        print(f"Error: Configuration file '{config_file}' not found.")
+        print("Usage: python main.py [config_file.json] [--headless] [--output PATH] [--sweep] [--firing-tables] [--monte-carlo] [--no-cache] [--profile PATH]")
+        print("\nSee CONFIG_README.md for documentation on creating configuration files.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error loading configuration: {e}")
+        sys.exit(1)
+
+    if args.sweep:
+        # Parameter sweep : outcome table streamed to disk, no trajectories kept
+        sweep_config = config.get("sweep", {})
+        sweep_dir = args.output or sweep_config.get("output", "sweep_results")
+        print("Running sweep...")
+        with instrument.phase("sweep"):
+            n = sweep.run_sweep(config, sweep_dir, h, Tmax, sweep_config.get("batch_size", 4096))
+        print(f"{n} cases written to {sweep_dir}")
+        return
+
+    if args.firing_tables:
+        # Tables de tir : reconstruites seulement si leurs paramètres ont changé
+        with instrument.phase("firing_tables"):
+            tables = firing_table.tables_for_config(config)
+        for name, table in tables:
+            print(f"{name}: firing table {table.key[:16]}, "
+                  f"{len(table.speeds)} speeds x {len(table.elevations)} elevations")
+        return
+
+    if args.monte_carlo:
+        # Dispersion : seuls les points d'impact et leurs statistiques sont gardés
+        mc_dir = args.output or config.get("monte_carlo", {}).get("output", "monte_carlo_results")
+        print("Running Monte Carlo dispersion...")
+        with instrument.phase("monte_carlo"):
+            results = montecarlo.run(config, mc_dir, h, Tmax)
+        for name, stats in results.items():
+            if "mpi" not in stats:
+                print(f"{name}: {stats['landed']} of {stats['samples']} samples landed")
+                continue
+            print(f"{name}: {stats['landed']}/{stats['samples']} landed, "
+                  f"MPI range {stats['mpi'][0]:.2f} m deflection {stats['mpi'][1]:.2f} m, CEP {stats['cep']:.2f} m")
+        print(f"Impacts written to {mc_dir}")
+        return
+
+    # Get number of projectiles
+    K = len(SYS)
+
+    # Run simulation for each projectile, across a process pool if configured
+    _, solver = integrators.select(Phys, method)
+    print(f"Running simulation ({solver})...")
+    workers, chunk_size = config_loader.get_parallel_settings(config)
+    sampling = config_loader.get_sampling(config)
+    store = None if args.no_cache else cache.get_cache(config)
+    run_manifest = None if args.no_cache else manifest.get_manifest(config)
+    M, TT, NK = [], [], []
+
+    with instrument.phase("simulation"):
+        if run_manifest is not None:
+            # Seuls les projectiles modifiés depuis la dernière exécution sont simulés
+            results = [(T, S) for T, S, _ in run_manifest.run(M0, SYS, Phys, h, Tmax, method, workers, chunk_size,
+                                                              sampling, store)]
+            for line in run_manifest.report():
+                print(line)
+        elif store is not None:
+            # Seuls les projectiles absents du cache sont simulés
+            results = [(T, S) for T, S, _ in cache.run(store, M0, SYS, Phys, h, Tmax, method, workers, chunk_size,
+                                                          sampling)]
+            print(f"Cache: {store.hits} hit(s), {store.misses} simulated")
+        else:
+            results = parallel.run(M0, SYS, Phys, h, Tmax, method, workers, chunk_size, sampling=sampling)
+
+    for T, S in results:
+        # Résolution numérique de l'équation de la dynamique jusqu'à l'impact
+        M.append(S)
+        TT.append(T)
+        NK.append(len(S) - 1)
+
+    # Display results
+    if not args.headless:
+        os.system("clear")
+    print("\n     *Simulation effectuée*\n")
+
+    # Show numerical info if requested
+    output_config = config.get("output", {})
+    show_numerical = output_config.get("show_numerical_info", False)
+    auto_plot = output_config.get("auto_plot", False)
+
+    if show_numerical:
+        with instrument.phase("numerical_info"):
+            for k in range(K):
+                projectile_name = SYS.name(k)
+                print(f"\n=== {projectile_name} ===")
+                men.numerique(M[k], NK[k], SYS[k], Phys, h, TT[k])
+                print()
+
+    # Write columnar result files if requested
+    results_dir = args.output or output_config.get("results_dir")
+    if results_dir:
+        with instrument.phase("output"):
+            results_dir = output.write_results(results_dir, TT, M, SYS, Phys, config,
+                                               output_config.get("results_format", "npy"))
+        print(f"Results written to {results_dir}")
+
+    if auto_plot and not args.headless:
+        with instrument.phase("plots"):
+            plot_results(M, TT, NK, h, SYS, Phys, config)
+
+    print("\nSimulation terminée.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""
+SimTir - ballistic simulation package
+"""
+
+__version__ = "3.0.0"
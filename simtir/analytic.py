@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Closed-form trajectories of drag-free environments
+
+Without air (rho = 0, so neither drag nor buoyancy) and without rotation of
+the planet (omega = 0, no Coriolis force), the only force is gravity and
+every trajectory is a parabola:
+
+    X(t) = X0 + V0 t - g t^2 / 2 ez
+
+This module evaluates trajectories, apex, impact time and range in closed
+form, vectorized over projectiles and sample times. applicable tells whether
+an environment allows it; integrators.select and batch.BATCH use it to skip
+numerical integration in the earth_vacuum and moon presets.
+"""
+
+import numpy as np
+
+
+def applicable(Phys):
+    """True when gravity is the only force of the environment"""
+    return Phys.rho == 0 and Phys.omega == 0
+
+
+def etat(M0, g, T):
+    """
+    States at given times
+
+    Args:
+        M0: (..., 6) initial state vectors
+        g: Gravity acceleration
+        T: Times, broadcast against the leading dimensions of M0
+
+    Returns:
+        numpy.array: (..., 6) states
+    """
+    M0 = np.asarray(M0, dtype=float)
+    T = np.asarray(T, dtype=float)[..., None]
+    U = M0 + T * np.concatenate((M0[..., 3:], np.zeros(M0.shape[:-1] + (3,))), axis=-1)
+    U[..., 2] -= 0.5 * g * T[..., 0] ** 2
+    U[..., 5] -= g * T[..., 0]
+    return U
+
+
+def trajectoires(M0, g, T):
+    """
+    States of every projectile at every sample time
+
+    Args:
+        M0: (N, 6) initial state vectors
+        g: Gravity acceleration
+        T: (n,) sample times
+
+    Returns:
+        numpy.array: (N, n, 6) states
+    """
+    M0 = np.atleast_2d(np.asarray(M0, dtype=float))
+    return etat(M0[:, None, :], g, np.asarray(T, dtype=float)[None, :])
+
+
+def temps_impact(M0, g, z_sol=0.0):
+    """
+    Time at which each projectile crosses z_sol while falling
+
+    Returns:
+        numpy.array: Impact times, NaN when z_sol is never crossed downwards
+    """
+    M0 = np.asarray(M0, dtype=float)
+    z0, vz = M0[..., 2] - z_sol, M0[..., 5]
+    disc = vz ** 2 + 2 * g * z0
+    with np.errstate(invalid="ignore"):
+        t = (vz + np.sqrt(disc)) / g
+    return np.where((disc >= 0) & (t >= 0), t, np.nan)
+
+
+def sommet(M0, g):
+    """
+    Apex of each trajectory
+
+    Returns:
+        tuple: (tsommet, zsommet), tsommet = 0 for projectiles launched
+            downwards
+    """
+    M0 = np.asarray(M0, dtype=float)
+    ts = np.maximum(M0[..., 5], 0.0) / g
+    return ts, M0[..., 2] + 0.5 * M0[..., 5] * ts
+
+
+def portee(M0, g, z_sol=0.0):
+    """Horizontal distance between the origin and the impact point"""
+    U = etat(M0, g, temps_impact(M0, g, z_sol))
+    return np.hypot(U[..., 0], U[..., 1])
+
+
+def _temps_distance(M0, rp):
+    """Time at which the horizontal distance to the origin reaches rp (NaN if never)"""
+    x0, y0, vx, vy = M0[:, 0], M0[:, 1], M0[:, 3], M0[:, 4]
+    a = vx ** 2 + vy ** 2
+    b = 2 * (x0 * vx + y0 * vy)
+    c = x0 ** 2 + y0 ** 2 - rp ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(c >= 0, 0.0, (-b + np.sqrt(b ** 2 - 4 * a * c)) / (2 * a))
+    return np.where(np.isfinite(t), t, np.nan)
+
+
+def BATCH(M0, Phys, Tmax, z_sol=0.0, portee=None):
+    """
+    Closed-form counterpart of batch.BATCH, with the same arguments and results
+
+    Impact times and states are exact instead of interpolated inside a step,
+    and zmax is the exact apex reached before the projectile stops.
+    """
+    M0 = np.array(M0, dtype=float, ndmin=2)
+    N = len(M0)
+    g = Phys.g
+    zs = np.broadcast_to(np.asarray(z_sol, dtype=float), (N,))
+
+    tz = temps_impact(M0, g, zs)
+    tz = np.where(np.isnan(tz), np.inf, tz)
+    if portee is None:
+        t, touche = tz, np.isfinite(tz)
+    else:
+        rp = np.broadcast_to(np.asarray(portee, dtype=float), (N,))
+        tr = _temps_distance(M0, rp)
+        tr = np.where(np.isnan(tr), np.inf, tr)
+        t, touche = np.minimum(tz, tr), np.isfinite(tr) & (tr <= tz)
+
+    # Comme l'intégrateur, on s'arrête à Tmax
+    touche &= t <= Tmax
+    t = np.minimum(t, Tmax)
+
+    Uimpact = etat(M0, g, t)
+    ts, _ = sommet(M0, g)
+    zmax = etat(M0, g, np.minimum(ts, t))[:, 2]
+
+    return np.where(touche, t, np.nan), Uimpact, zmax
+
+
+def PARABOLE(U0, Sys, Pp, h, Tmax):
+    """
+    Closed-form counterpart of the integrators of integrators.METHODS
+
+    Samples the parabola every h up to the impact, with the same layout as
+    the numerical integrators: T[k] = k * h, the apex inserted at its exact
+    time and the last row being the exact impact.
+
+    Args:
+        U0: Initial state vector
+        Sys: OBJET object (unused, the motion does not depend on it)
+        Pp: PHYS object
+        h: Time step
+        Tmax: Maximum simulation time
+
+    Returns:
+        tuple: (T, S) sample times and states
+    """
+    U0 = np.asarray(U0, dtype=float)
+    g = Pp.g
+    timpact = temps_impact(U0, g)
+    atterrit = np.isfinite(timpact) and timpact <= Tmax
+
+    if atterrit:
+        T = h * np.arange(int(np.ceil(timpact / h)))
+        T = T[T < timpact]
+    else:
+        T = h * np.arange(int(np.floor(Tmax / h)) + 1)
+
+    ts, _ = sommet(U0, g)
+    if 0 < ts < (timpact if atterrit else T[-1]) and ts not in T:
+        T = np.insert(T, np.searchsorted(T, ts), ts)
+    if atterrit:
+        T = np.append(T, timpact)
+
+    S = etat(U0, g, T)
+    if atterrit:
+        S[-1, 2] = 0.
+    return T, S
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Atmosphere models
+
+Altitude-dependent air density, as a ratio sigma(z) = rho(z) / rho(0)
+applied to the sea-level density PHYS.rho, so that presets and custom
+densities keep their meaning at the launch altitude. Two models:
+
+    - "isa": International Standard Atmosphere, piecewise-linear
+      temperature layers up to 86 km
+    - "mars_exponential": isothermal exponential atmosphere of Mars, with
+      the temperature profile of the NASA Glenn Mars model
+
+Models are evaluated once into uniformly spaced tables of sigma and of the
+temperature; lookups are linear interpolations with no transcendental
+function, so the derivative only pays a few arithmetic operations per call.
+Outside the table the end values are used.
+"""
+
+import functools
+
+import numpy as np
+
+# Pas des tables (m)
+DZ = 10.0
+
+# Constante spécifique et rapport des capacités thermiques de l'air sec
+R_AIR = 287.053
+GAMMA_AIR = 1.4
+
+# Couches de l'atmosphère standard : altitude géopotentielle de base (m),
+# température de base (K) et gradient thermique (K/m)
+ISA_LAYERS = (
+    (0.0, 288.15, -0.0065),
+    (11000.0, 216.65, 0.0),
+    (20000.0, 216.65, 0.001),
+    (32000.0, 228.65, 0.0028),
+    (47000.0, 270.65, 0.0),
+    (51000.0, 270.65, -0.0028),
+    (71000.0, 214.65, -0.002),
+)
+ISA_TOP = 86000.0
+EARTH_RADIUS = 6356766.0
+G0 = 9.80665
+
+# Atmosphère de Mars : CO2, hauteur d'échelle (m)
+R_MARS = 188.92
+GAMMA_MARS = 1.29
+MARS_SCALE_HEIGHT = 11100.0
+MARS_TOP = 100000.0
+
+
+class Atmosphere:
+    """
+    Tabulated atmosphere
+
+    Args:
+        name: Model name, see ATMOSPHERES
+        z0: Altitude of the first table entry (m)
+        dz: Table spacing (m)
+        sigma: Density ratios rho(z) / rho(0)
+        temperature: Temperatures (K)
+        R: Specific gas constant (J/kg/K)
+        gamma: Heat capacity ratio
+    """
+
+    def __init__(self, name, z0, dz, sigma, temperature, R, gamma):
+        self.name = name
+        self.z0 = float(z0)
+        self.dz = float(dz)
+        self.sigma_table = np.asarray(sigma, dtype=float)
+        self.temperature_table = np.asarray(temperature, dtype=float)
+        self.R = R
+        self.gamma = gamma
+        self.sound_speed_table = np.sqrt(gamma * R * self.temperature_table)
+
+    def canonical_fields(self):
+        """Fields identifying the model, the tables being derived from them"""
+        return {"name": self.name, "z0": self.z0, "dz": self.dz, "n": len(self.sigma_table)}
+
+    def _interpole(self, table, z):
+        x = np.clip((np.asarray(z, dtype=float) - self.z0) / self.dz, 0.0, len(table) - 1)
+        i = np.minimum(x.astype(int), len(table) - 2)
+        return table[i] + (x - i) * (table[i + 1] - table[i])
+
+    def sigma(self, z):
+        """Density ratio at altitude z, vectorized"""
+        return self._interpole(self.sigma_table, z)
+
+    def temperature(self, z):
+        """Temperature (K) at altitude z, vectorized"""
+        return self._interpole(self.temperature_table, z)
+
+    def sound_speed(self, z):
+        """Speed of sound (m/s) at altitude z, vectorized"""
+        return self._interpole(self.sound_speed_table, z)
+
+
+def _isa(z):
+    """ISA temperature (K) and pressure (Pa) at geometric altitudes z"""
+    H = EARTH_RADIUS * z / (EARTH_RADIUS + z)
+    T = np.empty_like(H)
+    p = np.empty_like(H)
+
+    pb = 101325.0
+    for k, (Hb, Tb, L) in enumerate(ISA_LAYERS):
+        Hn = ISA_LAYERS[k + 1][0] if k + 1 < len(ISA_LAYERS) else np.inf
+        # La première couche est prolongée sous le niveau de la mer
+        couche = (H < Hn) if k == 0 else (H >= Hb) & (H < Hn)
+        dH = H[couche] - Hb
+        T[couche] = Tb + L * dH
+        if L == 0:
+            p[couche] = pb * np.exp(-G0 * dH / (R_AIR * Tb))
+        else:
+            p[couche] = pb * (T[couche] / Tb) ** (-G0 / (R_AIR * L))
+
+        # Pression à la base de la couche suivante
+        if np.isfinite(Hn):
+            if L == 0:
+                pb = pb * np.exp(-G0 * (Hn - Hb) / (R_AIR * Tb))
+            else:
+                pb = pb * ((Tb + L * (Hn - Hb)) / Tb) ** (-G0 / (R_AIR * L))
+    return T, p
+
+
+def isa(dz=DZ):
+    """International Standard Atmosphere tabulated from -1 km to 86 km"""
+    z = np.arange(-1000.0, ISA_TOP + dz, dz)
+    T, p = _isa(z)
+    rho = p / (R_AIR * T)
+    rho0 = 101325.0 / (R_AIR * ISA_LAYERS[0][1])
+    return Atmosphere("isa", z[0], dz, rho / rho0, T, R_AIR, GAMMA_AIR)
+
+
+def mars_exponential(dz=DZ, scale_height=MARS_SCALE_HEIGHT):
+    """Exponential atmosphere of Mars tabulated from -1 km to 100 km"""
+    z = np.arange(-1000.0, MARS_TOP + dz, dz)
+    T = np.where(z < 7000.0, -31.0 - 0.000998 * z, -23.4 - 0.00222 * z) + 273.15
+    return Atmosphere("mars_exponential", z[0], dz, np.exp(-z / scale_height), np.maximum(T, 100.0),
+                      R_MARS, GAMMA_MARS)
+
+
+ATMOSPHERES = {
+    "isa": isa,
+    "mars_exponential": mars_exponential,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_atmosphere(name):
+    """
+    Shared tabulated atmosphere of a model
+
+    Args:
+        name: Key of ATMOSPHERES, or None / "constant" for a uniform density
+
+    Returns:
+        Atmosphere or None
+    """
+    if name in (None, "constant"):
+        return None
+    if name not in ATMOSPHERES:
+        raise ValueError(f"Unknown atmosphere {name!r}, expected one of {sorted(ATMOSPHERES)} or 'constant'")
+    return ATMOSPHERES[name]()
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized batch integrator
+
+Advances many projectiles at once in a single (N, 6) NumPy state array.
+Each row is a state vector (X, Y, Z, Vx, Vy, Vz) as in calc.F; drag,
+buoyancy and Coriolis are evaluated for all rows in one vectorized call,
+and rows are dropped from the working array as soon as they land.
+
+With wind, drag acts on the air-relative velocity, the wind field being
+sampled for all rows at once. Projectiles with a Mach-dependent drag curve (see drag) share one stacked
+table of curves, read for all rows with a single indexed lookup.
+"""
+
+import numpy as np
+
+from . import analytic
+from . import calc
+from . import drag
+from . import instrument
+from .classes import OBJET
+from .projectiles import ProjectileTable
+
+
+def parametres(SYS):
+    """
+    Build per-projectile parameter arrays from a list of OBJET
+
+    Args:
+        SYS: List of OBJET objects, or ProjectileTable whose columns are
+            returned as they are
+
+    Returns:
+        tuple: (m, S, V) float arrays of shape (N,) holding the mass,
+            frontal area and volume of each projectile
+    """
+    if isinstance(SYS, ProjectileTable):
+        return SYS.m, SYS.S, SYS.V
+    m = np.array([obj.m for obj in SYS], dtype=float)
+    S = np.array([obj.S for obj in SYS], dtype=float)
+    V = np.array([obj.V for obj in SYS], dtype=float)
+    return m, S, V
+
+
+def _trainee(Cx, N):
+    """
+    Drag coefficients of a batch
+
+    Args:
+        Cx: Scalar, (N,) array, DragCurve or list of OBJET.Cx values
+        N: Number of rows
+
+    Returns:
+        tuple: (cx, tables, index) where cx is the (N,) constant coefficient
+            folded into the drag factor, and tables / index the result of
+            drag.stack when a curve is used (cx is then 1, tables None otherwise)
+    """
+    if isinstance(Cx, drag.DragCurve):
+        Cx = [Cx] * N
+    if isinstance(Cx, (list, tuple)) and any(isinstance(c, drag.DragCurve) for c in Cx):
+        tables, index = drag.stack(Cx)
+        return np.ones((N,)), tables, index
+    return np.broadcast_to(np.asarray(Cx, dtype=float), (N,)), None, np.zeros((N,), dtype=int)
+
+
+def _coefficients(m, S, V, Phys, Cx=drag.CX_DEFAULT):
+    """
+    Fold the per-projectile constants of calc.F into acceleration factors
+
+    Returns:
+        tuple: (kd, ka) where the drag acceleration is kd * |v| * v and the
+            buoyancy acceleration is ka along ez
+    """
+    kd = calc.coeff_frottement(S, Phys.rho, Cx) / m
+    ka = Phys.rho * V * Phys.g / m
+    return kd, ka
+
+
+def _omega(Phys):
+    # Vecteur rotation de l'astre, OMEGA = (ox, oy, 0) dans le repère local
+    return Phys.omega * np.array([-np.sin(Phys.lat), np.cos(Phys.lat), 0.0])
+
+
+def _derivee(U, kd, ka, Phys, OMEGA, tables=None, index=None):
+    """dU/dt for a working (n, 6) array with precomputed factors"""
+    DU = np.empty_like(U)
+    Vel = U[:, 3:]
+    A = DU[:, 3:]
+    DU[:, :3] = Vel
+
+    A[:] = 0.0
+    A[:, 2] = -Phys.g
+
+    if Phys.rho != 0:
+        # Vitesse par rapport à l'air, le vent étant lu pour toutes les lignes
+        Vr = Vel if Phys.vent is None else Vel - Phys.vent.velocity(U[:, :3])
+        vn = np.sqrt(np.einsum('ij,ij->i', Vr, Vr))
+        if Phys.atm is not None:
+            # Masse volumique interpolée à l'altitude de chaque ligne
+            sigma = Phys.atm.sigma(U[:, 2])
+            kd, ka = kd * sigma, ka * sigma
+        if tables is not None:
+            # Coefficient de traînée au Mach de chaque ligne
+            kd = kd * drag.lookup(tables, index, vn / drag.sound_speed(Phys, U[:, 2]))
+        A += (kd * vn)[:, None] * Vr
+        A[:, 2] += ka
+    if Phys.omega != 0:
+        # -2 OMEGA ^ V développé, OMEGA n'ayant pas de composante verticale
+        A[:, 0] -= 2 * OMEGA[1] * Vel[:, 2]
+        A[:, 1] += 2 * OMEGA[0] * Vel[:, 2]
+        A[:, 2] -= 2 * (OMEGA[0] * Vel[:, 1] - OMEGA[1] * Vel[:, 0])
+
+    return DU
+
+
+def FB(U, m, S, V, Phys, Cx=drag.CX_DEFAULT):
+    """
+    Vectorized dU/dt for an (N, 6) state array
+
+    Same physics as calc.F, evaluated for every row at once.
+
+    Args:
+        U: (N, 6) array of state vectors
+        m, S, V: (N,) arrays of mass, frontal area and volume
+        Phys: PHYS object
+        Cx: Drag coefficients, see BATCH
+
+    Returns:
+        numpy.array: (N, 6) time derivative of U
+    """
+    U = np.array(U, dtype=float, ndmin=2)
+    cx, tables, index = _trainee(Cx, len(U))
+    kd, ka = _coefficients(np.asarray(m, float), np.asarray(S, float), np.asarray(V, float), Phys, cx)
+    return _derivee(U, kd, ka, Phys, _omega(Phys), tables, index)
+
+
+def BATCH(M0, m, S, V, Phys, h, Tmax, z_sol=0.0, portee=None, Cx=drag.CX_DEFAULT, sigma=1.0):
+    """
+    Integrate a batch of projectiles until each one lands
+
+    All rows are advanced together with a fixed-step RK4 scheme. A row is
+    considered landed when it crosses the ground level z_sol while falling;
+    its impact state is interpolated linearly inside the last step and the
+    row is removed from the working array, so later steps only cost what
+    is still flying.
+
+    When portee is given, a row also stops as soon as its horizontal
+    distance to the origin reaches portee, which is then the impact looked
+    for: rows landing first are reported as misses.
+
+    Drag-free environments are solved in closed form by analytic.BATCH.
+
+    Args:
+        M0: (N, 6) array of initial state vectors
+        m, S, V: (N,) arrays of mass, frontal area and volume
+        Phys: PHYS object
+        h: Time step
+        Tmax: Maximum simulation time
+        z_sol: Ground level, scalar or (N,) array
+        portee: Optional horizontal distance, scalar or (N,) array
+        Cx: Drag coefficients: scalar or (N,) array of constants, DragCurve
+            shared by all rows, or list of OBJET.Cx values
+        sigma: Density ratio applied to Phys.rho, scalar or (N,) array
+
+    Returns:
+        tuple: (timpact, Uimpact, zmax)
+            - timpact: (N,) impact times, NaN for rows that did not cross
+              z_sol from above (or reach portee) before Tmax
+            - Uimpact: (N, 6) states at impact (or when the row stopped)
+            - zmax: (N,) highest sampled altitude of each row
+    """
+    if analytic.applicable(Phys):
+        return analytic.BATCH(M0, Phys, Tmax, z_sol, portee)
+
+    U = np.array(M0, dtype=float, ndmin=2)
+    N = len(U)
+    m, S, V = (np.broadcast_to(np.asarray(a, dtype=float), (N,)) for a in (m, S, V))
+    zs = np.broadcast_to(np.asarray(z_sol, dtype=float), (N,)).copy()
+    distance = portee is not None
+    rp = np.broadcast_to(np.asarray(portee if distance else np.inf, dtype=float), (N,)).copy()
+
+    cx, tables, index = _trainee(Cx, N)
+    kd, ka = _coefficients(m, S, V, Phys, cx)
+    # Traînée et poussée d'Archimède sont proportionnelles à la masse volumique
+    sigma = np.asarray(sigma, dtype=float)
+    kd, ka = kd * sigma, ka * sigma
+    OMEGA = _omega(Phys)
+
+    timpact = np.full((N,), np.nan)
+    Uimpact = U.copy()
+    zmax = U[:, 2].copy()
+
+    # Tableau de travail compact : seules les lignes encore en vol y figurent
+    actif = np.arange(N)
+    kd, ka, zm = kd.copy(), ka.copy(), zmax.copy()
+    nmax = int(np.ceil(Tmax / h))
+    pas_lignes = 0
+
+    for j in range(nmax):
+        if actif.size == 0:
+            break
+        pas_lignes += len(U)
+
+        k1 = _derivee(U, kd, ka, Phys, OMEGA, tables, index)
+        k2 = _derivee(U + h / 2 * k1, kd, ka, Phys, OMEGA, tables, index)
+        k3 = _derivee(U + h / 2 * k2, kd, ka, Phys, OMEGA, tables, index)
+        k4 = _derivee(U + h * k3, kd, ka, Phys, OMEGA, tables, index)
+        Un = U + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+        np.maximum(zm, Un[:, 2], out=zm)
+
+        stop = tombe = (Un[:, 2] < zs) & (Un[:, 5] < 0)
+        if distance:
+            atteint = Un[:, 0] ** 2 + Un[:, 1] ** 2 >= rp ** 2
+            stop = tombe | atteint
+
+        if stop.any():
+            U0, U1 = U[stop], Un[stop]
+
+            # Fraction du pas à laquelle chaque condition est franchie (inf sinon)
+            z0, z1 = U0[:, 2] - zs[stop], U1[:, 2] - zs[stop]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fz = np.where(tombe[stop] & (z0 >= 0), z0 / (z0 - z1), np.inf)
+                if distance:
+                    r0, r1 = np.hypot(U0[:, 0], U0[:, 1]), np.hypot(U1[:, 0], U1[:, 1])
+                    fr = np.where(atteint[stop], (rp[stop] - r0) / (r1 - r0), np.inf)
+                    touche = np.isfinite(fr) & (fr <= fz)
+                    frac = np.minimum(fz, fr)
+                else:
+                    touche = np.isfinite(fz)
+                    frac = fz
+            frac = np.where(np.isfinite(frac), np.clip(frac, 0.0, 1.0), 1.0)
+
+            idx = actif[stop]
+            Uimpact[idx] = U0 + frac[:, None] * (U1 - U0)
+            timpact[idx] = np.where(touche, (j + frac) * h, np.nan)
+            zmax[idx] = zm[stop]
+
+            garde = ~stop
+            actif, Un, kd, ka, zs, rp, zm, index = (a[garde] for a in (actif, Un, kd, ka, zs, rp, zm, index))
+
+        U = Un
+
+    Uimpact[actif] = U
+    zmax[actif] = zm
+
+    instrument.count("rhs_evaluations", 4 * pas_lignes)
+    instrument.count("steps_accepted", pas_lignes)
+
+    return timpact, Uimpact, zmax
+
+
+def BATCH_TABLE(M0, table, Phys, h, Tmax, **kwargs):
+    """
+    BATCH for the projectiles of a ProjectileTable, one row of M0 per row of
+    the table; keyword arguments are passed to BATCH
+    """
+    return BATCH(M0, table.m, table.S, table.V, Phys, h, Tmax, Cx=table.Cx, **kwargs)
+
+
+def info(M0, timpact, Uimpact, zmax, m, S, V, Phys):
+    """
+    calc.info-style outcomes of a batch, one value per row
+
+    Args:
+        M0: (N, 6) initial states
+        timpact, Uimpact, zmax: Results of BATCH
+        m, S, V: (N,) arrays of mass, frontal area and volume
+        Phys: PHYS object
+
+    Returns:
+        tuple: (timpact, zmax, dist, vfinal, Ecfinal, W) arrays of shape (N,)
+    """
+    Sys = OBJET(V, m, S)
+    M0 = np.asarray(M0, dtype=float)
+
+    Einit = calc.Eng(M0[:, 3:], M0[:, 2], Sys, Phys)
+    Efinal = calc.Eng(Uimpact[:, 3:], Uimpact[:, 2], Sys, Phys)
+
+    dist = np.linalg.norm(Uimpact[:, :3], axis=1)
+    vfinal = np.linalg.norm(Uimpact[:, 3:], axis=1)
+    W = np.abs(Efinal[2] - Einit[2])
+
+    return (timpact, zmax, dist, vfinal, Efinal[0], W)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Content-addressed result cache
+
+Each projectile's trajectory and calc.info summary are stored on disk under
+a canonical hash of everything that determines them: the PHYS and OBJET
+fields, the initial state U0, the step h, Tmax, the method, the output
+sampling and the package version. Identical inputs are never simulated twice, and editing one
+projectile of a configuration only invalidates that projectile.
+
+The store is bounded in size: least recently used entries are evicted first.
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from . import __version__
+from . import parallel
+from .hashing import digest
+from .output import info_record
+
+
+def result_key(U0, Sys, Phys, h, Tmax, method, sampling=None):
+    """Canonical hash of the inputs of one projectile simulation"""
+    return digest(__version__, Phys, Sys, np.asarray(U0, dtype=float), float(h), float(Tmax), method, sampling)
+
+
+class ResultCache:
+    """
+    On-disk store of (T, S, info) entries, one .npz file per key
+
+    Args:
+        directory: Store location, created on first write
+        max_bytes: Size above which least recently used entries are evicted
+    """
+
+    def __init__(self, directory=".simtir_cache", max_bytes=1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def get(self, key):
+        """
+        Stored entry of key, or None
+
+        Returns:
+            tuple: (T, S, info) where info is the info_record dictionary
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as archive:
+                entry = (archive["T"], archive["S"], json.loads(str(archive["info"])))
+        except (OSError, KeyError, ValueError):
+            self.misses += 1
+            return None
+
+        # La date de modification sert d'horodatage pour l'éviction LRU
+        os.utime(path)
+        self.hits += 1
+        return entry
+
+    def put(self, key, T, S, info, evict=True):
+        """Store an entry atomically, then enforce the size bound unless evict is False"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, T=T, S=S, info=np.array(json.dumps(info)))
+        os.replace(tmp, self._path(key))
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the store fits in max_bytes"""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".npz"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".npz"):
+                    os.remove(os.path.join(self.directory, name))
+
+
+def get_cache(config):
+    """
+    ResultCache configured by the cache section, or None when disabled
+
+    Keys: "enabled" (default false), "directory" and "max_mb".
+    """
+    cache_config = config.get("cache", {})
+    if not cache_config.get("enabled", False):
+        return None
+    return ResultCache(cache_config.get("directory", ".simtir_cache"),
+                       int(cache_config.get("max_mb", 1024) * 1024 * 1024))
+
+
+def run(cache, M0, SYS, Phys, h, Tmax, method=2, workers=1, chunk_size=1, sampling=None):
+    """
+    parallel.run behind the cache: only projectiles without an entry are simulated
+
+    Returns:
+        list: One (T, S, info) tuple per projectile, in the order of SYS
+    """
+    keys = [result_key(M0[k], SYS[k], Phys, h, Tmax, method, sampling) for k in range(len(SYS))]
+    results = [cache.get(key) for key in keys]
+
+    missing = [k for k, entry in enumerate(results) if entry is None]
+    if missing:
+        fresh = parallel.run(M0[missing], [SYS[k] for k in missing], Phys, h, Tmax, method, workers, chunk_size,
+                             sampling=sampling)
+        for k, (T, S) in zip(missing, fresh):
+            info = info_record(T, S, SYS[k], Phys)
+            cache.put(keys[k], T, S, info, evict=False)
+            results[k] = (T, S, info)
+        cache.evict()
+
+    return results
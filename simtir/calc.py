@@ -7,6 +7,9 @@ Created on Mon Nov  2 15:32:16 2015
 import numpy as np
 import numpy.linalg as lng
 
+from . import drag
+from . import instrument
+
 # Définition des vecteurs de la base canonique
 
 ex = np.array([1, 0, 0])
@@ -22,11 +25,17 @@ def coeff_archimede(Sys, Phys):
     return Phys.rho * Sys.V * Phys.g
 
 
-def coeff_frottement(S, rho):
-    Cx = 0.45
+def coeff_frottement(S, rho, Cx=drag.CX_DEFAULT):
     return -1 / 2 * Cx * S * rho
 
 
+def coeff_trainee(Sys, Phys, V, z):
+    """Coefficient de traînée du système, lu dans sa courbe au Mach courant"""
+    if not isinstance(Sys.Cx, drag.DragCurve):
+        return Sys.Cx
+    return Sys.Cx(lng.norm(V) / drag.sound_speed(Phys, z))
+
+
 def F(U, Sys, Phys):
     """
     FONCTION dU/dt
@@ -50,9 +59,13 @@ def F(U, Sys, Phys):
     A += -Phys.g * ez
 
     if Phys.rho != 0:
-        kfrot = coeff_frottement(Sys.S, Phys.rho)
-        karchimede = coeff_archimede(Sys, Phys)
-        A += kfrot / Sys.m * V * lng.norm(V) + karchimede / Sys.m * ez
+        # Masse volumique à l'altitude courante
+        sigma = 1. if Phys.atm is None else Phys.atm.sigma(U[2])
+        # Vitesse par rapport à l'air
+        Vr = V if Phys.vent is None else V - Phys.vent.velocity(U[:3])
+        kfrot = coeff_frottement(Sys.S, Phys.rho, coeff_trainee(Sys, Phys, Vr, U[2])) * sigma
+        karchimede = coeff_archimede(Sys, Phys) * sigma
+        A += kfrot / Sys.m * Vr * lng.norm(Vr) + karchimede / Sys.m * ez
     if Phys.omega != 0:
         OMEGA = Phys.omega * np.array([-np.sin(Phys.lat), np.cos(Phys.lat), 0])
         A += - 2 * np.cross(OMEGA, V)
@@ -62,48 +75,292 @@ def F(U, Sys, Phys):
     return DU
 
 
+def compile_F(Sys, Phys):
+    """
+    FABRIQUE DE LA FONCTION dU/dt
+
+    Retourne une fonction f(U, DU) équivalente à F(U, Sys, Phys) pour un
+    système et un environnement fixés. Les constantes (coefficients de
+    frottement et d'Archimède, vecteur rotation de l'astre) sont calculées une
+    seule fois, et f écrit la dérivée dans le tableau DU fourni par l'appelant
+    sans allouer de tableau. Les termes de frottement et de Coriolis ne sont
+    pas évalués lorsqu'ils sont nuls. Avec un modèle d'atmosphère, la masse
+    volumique est lue dans sa table par une interpolation scalaire ; avec une
+    courbe de traînée, le coefficient de traînée est lu de même au Mach courant,
+    et avec du vent la traînée porte sur la vitesse relative à l'air.
+
+        U : array Vecteur mouvement (X, Y, Z, Vx, Vy, Vz)
+        DU : array (6,) Tableau recevant la dérivée temporelle de U
+    """
+    frottement = Phys.rho != 0
+    coriolis = Phys.omega != 0
+
+    # Accélération verticale constante : pesanteur et poussée d'Archimède
+    az = -float(Phys.g)
+    kd = 0.
+    courbe = isinstance(Sys.Cx, drag.DragCurve)
+    general = frottement and (courbe or Phys.vent is not None)
+    if frottement:
+        kd = float(coeff_frottement(Sys.S, Phys.rho, 1. if general else Sys.Cx) / Sys.m)
+        az += float(coeff_archimede(Sys, Phys) / Sys.m)
+
+    # -2 OMEGA ^ V = (-oy Vz, ox Vz, oy Vx - ox Vy) avec OMEGA = (Ox, Oy, 0)
+    ox = -2 * float(Phys.omega * np.sin(Phys.lat))
+    oy = 2 * float(Phys.omega * np.cos(Phys.lat))
+
+    if general:
+        # Courbe de traînée, masse volumique et vitesse du son en listes
+        # Python ; un Cx constant ou l'absence d'atmosphère donnent des tables
+        # constantes
+        cd = Sys.Cx.table.tolist() if courbe else [float(Sys.Cx)] * 2
+        vent = Phys.vent.scalar_velocity() if Phys.vent is not None else None
+        inv_mach, mmax = 1. / drag.DMACH, len(cd) - 1
+        if Phys.atm is not None:
+            table, son = Phys.atm.sigma_table.tolist(), Phys.atm.sound_speed_table.tolist()
+            z0, inv = Phys.atm.z0, 1. / Phys.atm.dz
+        else:
+            table, son = [1., 1.], [drag.SOUND_SPEED] * 2
+            z0, inv = 0., 0.
+        xmax = len(table) - 1
+        gz = -float(Phys.g)
+        ka = az - gz
+
+        def f(U, DU):
+            px, py, z, vx, vy, vz = U.tolist()
+            ux, uy, uz = vx, vy, vz
+            if vent is not None:
+                wx, wy, wz = vent(px, py, z)
+                ux, uy, uz = vx - wx, vy - wy, vz - wz
+            x = (z - z0) * inv
+            if 0 < x < xmax:
+                i = int(x)
+                r = x - i
+                s, a = table[i], son[i]
+                s += r * (table[i + 1] - s)
+                a += r * (son[i + 1] - a)
+            else:
+                j = 0 if x <= 0 else -1
+                s, a = table[j], son[j]
+            v = (ux * ux + uy * uy + uz * uz) ** 0.5
+            x = v / a * inv_mach
+            if x < mmax:
+                i = int(x)
+                c = cd[i]
+                c += (x - i) * (cd[i + 1] - c)
+            else:
+                c = cd[-1]
+            k = kd * c * s * v
+            DU[:3] = U[3:]
+            DU[3] = k * ux - oy * vz
+            DU[4] = k * uy + ox * vz
+            DU[5] = k * uz + gz + ka * s + oy * vx - ox * vy
+            return DU
+    elif frottement and Phys.atm is not None:
+        # Table de l'atmosphère en liste Python : pour une seule valeur,
+        # l'interpolation en flottants Python est plus rapide qu'avec NumPy
+        table = Phys.atm.sigma_table.tolist()
+        z0, inv = Phys.atm.z0, 1. / Phys.atm.dz
+        xmax, premier, dernier = len(table) - 1, table[0], table[-1]
+        # Archimède proportionnel à la masse volumique locale
+        gz = -float(Phys.g)
+        ka = az - gz
+
+        def f(U, DU):
+            _, _, z, vx, vy, vz = U.tolist()
+            x = (z - z0) * inv
+            if 0 < x < xmax:
+                i = int(x)
+                s = table[i]
+                s += (x - i) * (table[i + 1] - s)
+            else:
+                s = premier if x <= 0 else dernier
+            k = kd * s * (vx * vx + vy * vy + vz * vz) ** 0.5
+            DU[:3] = U[3:]
+            DU[3] = k * vx - oy * vz
+            DU[4] = k * vy + ox * vz
+            DU[5] = k * vz + gz + ka * s + oy * vx - ox * vy
+            return DU
+    elif frottement and coriolis:
+        def f(U, DU):
+            vx, vy, vz = U[3], U[4], U[5]
+            k = kd * (vx * vx + vy * vy + vz * vz) ** 0.5
+            DU[:3] = U[3:]
+            DU[3] = k * vx - oy * vz
+            DU[4] = k * vy + ox * vz
+            DU[5] = k * vz + az + oy * vx - ox * vy
+            return DU
+    elif frottement:
+        def f(U, DU):
+            vx, vy, vz = U[3], U[4], U[5]
+            k = kd * (vx * vx + vy * vy + vz * vz) ** 0.5
+            DU[:3] = U[3:]
+            DU[3] = k * vx
+            DU[4] = k * vy
+            DU[5] = k * vz + az
+            return DU
+    elif coriolis:
+        def f(U, DU):
+            vx, vy, vz = U[3], U[4], U[5]
+            DU[:3] = U[3:]
+            DU[3] = -oy * vz
+            DU[4] = ox * vz
+            DU[5] = az + oy * vx - ox * vy
+            return DU
+    else:
+        def f(U, DU):
+            DU[:3] = U[3:]
+            DU[3] = 0.
+            DU[4] = 0.
+            DU[5] = az
+            return DU
+
+    return f
+
+
 def EULER(U0, Sys, Pp, h, Tmax):
     """
     CALCUL DU VECTEUR MOUVEMENT
     
    On résouds l'équation du mouvement par la méthode d'Euler explicite.
    On utilise un repère cartésien lié au référentiel terrestre.
+   Le calcul est délégué à integrators.EULER qui écrit dans un tableau
+   préalloué.
    
        -U : array Vecteur mouvement (X, Y, Z, Vx, Vy, Vz)
-       -S : [array,...] Tableau stockant le vecteur U à chaque instant
+       -S : array (n, 6) Tableau stockant le vecteur U à chaque instant
             S[k][0] représente la position sur (Ox) à l'instant tk = k * h
     """
-    j = 0
-    S = [U0]
+    from . import integrators
+
+    return integrators.EULER(U0, Sys, Pp, h, Tmax)[1]
+
+
+def sol(t, U):
+    """
+    EVENEMENT CONTACT AU SOL
+
+    S'annule lorsque l'altitude du système est nulle. L'évènement est terminal
+    et n'est déclenché qu'en descente, de sorte qu'un tir depuis le sol n'est
+    pas interrompu au départ.
+    """
+    return U[2]
+
+
+sol.terminal = True
+sol.direction = -1
+
+
+def sommet(t, U):
+    """
+    EVENEMENT SOMMET DE LA TRAJECTOIRE
+
+    S'annule lorsque la vitesse verticale change de signe en passant de la
+    montée à la descente. L'évènement n'interrompt pas l'intégration.
+    """
+    return U[5]
 
-    # Résolution de l'équation du mouvement
-    while S[j][2] >= 0 and j * h < Tmax:
-        # La simulation s'arrête lorsque l'objet possède une altitude nulle
-        # ou que la durée limite est atteinte.
-        DU = F(S[j], Sys, Pp)
-        S += [S[j] + DU * h]
-        j += 1
 
-    return S
+sommet.direction = -1
 
 
-def info(S, N, Sys, Pp):
+def INTEGRE(U0, Sys, Pp, h, Tmax, methode="LSODA", T_eval=None):
+    """
+    CALCUL DU VECTEUR MOUVEMENT JUSQU'A L'IMPACT
+
+    On résouds l'équation du mouvement avec un solveur à pas adaptatif
+    (scipy.integrate.solve_ivp) muni des évènements sol et sommet. L'intégration
+    s'arrête à l'impact ; l'impact et le sommet sont obtenus par recherche de
+    racine. La solution dense n'est échantillonnée au pas h (ou aux instants
+    T_eval) que sur la durée de vol, et l'état exact au sommet est inséré parmi
+    les échantillons.
+
+        -T : array Instants d'échantillonnage, T[k] = k * h (ou T_eval) plus
+             l'instant du sommet, T[-1] étant l'instant exact de l'impact
+        -S : array (N + 1, 6) Vecteur U à chaque instant de T, S[N] est
+             l'état à l'impact (ou à Tmax si le sol n'est pas atteint)
+    """
+
+    # Import différé : SciPy n'est chargé que si ce solveur est utilisé
+    import scipy.integrate as itg
+
+    Fc = compile_F(Sys, Pp)
+
+    def f(t, U):
+        # Le solveur conserve les dérivées retournées : un tableau neuf par appel
+        return Fc(U, np.empty((6,)))
+
+    # Tolérances identiques à celles d'odeint
+    res = itg.solve_ivp(f, (0, Tmax), U0, method=methode, events=(sol, sommet),
+                        dense_output=True, rtol=1.49012e-8, atol=1.49012e-8)
+
+    if instrument.ENABLED:
+        # Les méthodes de Runge-Kutta explicites évaluent n_stages fois F par
+        # tentative de pas, plus deux évaluations pour choisir le premier pas
+        acceptes = len(res.t) - 1
+        etages = getattr(getattr(itg, methode, None), "n_stages", None)
+        instrument.count("rhs_evaluations", res.nfev)
+        instrument.count("steps_accepted", acceptes)
+        if etages:
+            instrument.count("steps_rejected", max(0, (res.nfev - 2) // etages - acceptes))
+        instrument.peak("trajectory_bytes_peak", res.y.nbytes)
+
+    if res.t_events[0].size > 0:
+        timpact = res.t_events[0][0]
+        Uimpact = res.y_events[0][0]
+    else:
+        timpact = res.t[-1]
+        Uimpact = res.y[:, -1]
+
+    if T_eval is None:
+        T = h * np.arange(int(np.ceil(timpact / h)))
+    else:
+        T = np.asarray(T_eval, dtype=float)
+        T = T[(T >= 0) & (T < timpact)]
+    S = res.sol(T).T if T.size > 0 else np.empty((0, 6))
+
+    if res.t_events[1].size > 0:
+        # Sommet exact inséré à sa place chronologique
+        tsommet = res.t_events[1][0]
+        k = np.searchsorted(T, tsommet)
+        T = np.insert(T, k, tsommet)
+        S = np.insert(S, k, res.y_events[1][0], axis=0)
+
+    T = np.append(T, timpact)
+    S = np.concatenate((S, Uimpact[None]))
+
+    return T, S
+
+
+def info(S, N, Sys, Pp, T=None, h=None):
     """
     CALCUL INFORMATIONS NUMERIQUES
     
     Affiche les informations relatives à un lancé dont les paramètres sont stockés
-    dans S
+    dans S, échantillonnés aux instants T. Le sommet et l'impact sont localisés
+    par interpolation entre les N + 1 premiers échantillons (voir summary.resume).
+
+    Sans T, les échantillons sont supposés espacés du pas h, lui-même estimé
+    à partir des déplacements et des vitesses de S s'il n'est pas donné.
     """
 
-    zmax = max(S[:N][2])
-    vfinal = lng.norm(S[N][3:])
+    # Import différé : summary dépend de ce module
+    from . import summary
 
-    Einit = Eng(S[0][3:], S[0][2], Sys, Pp)
-    Efinal = Eng(S[N][3:], S[N][2], Sys, Pp)
-    Ecfinal = Efinal[0]  # Energie cinétique finale
-    W = np.abs(Efinal[2] - Einit[2])  # Travail des forces non conservatives
+    S = np.asarray(S, dtype=float)[:N + 1]
+    if T is None:
+        if h is None:
+            # Pas estimé : distance parcourue entre deux échantillons / vitesse moyenne
+            D = lng.norm(np.diff(S[:, :3], axis=0), axis=1)
+            V = 0.5 * lng.norm(S[1:, 3:] + S[:-1, 3:], axis=1)
+            h = float(np.median(D[V > 0] / V[V > 0])) if np.any(V > 0) else 1.
+        T = np.arange(N + 1) * h
+    R = summary.resume(np.asarray(T, dtype=float)[:N + 1], S, Sys, Pp)
+    zmax = R["zmax"]
+    vfinal = lng.norm(R["impact"][3:])
+    Ecfinal = R["Ec_impact"]  # Energie cinétique finale
+    W = R["W"]  # Travail des forces non conservatives
 
-    dist = lng.norm(S[N][:3])  # Distance finale à l'origine
+    dist = lng.norm(R["impact"][:3])  # Distance finale à l'origine
 
     return (zmax, dist, vfinal, Ecfinal, W)
 
@@ -111,7 +368,10 @@ def info(S, N, Sys, Pp):
 def Eng(v, z, Sys, Pp):
     # Calcule les énergies potentielle, cinétique (de translation)
     # et mécanique du système.
+    # v peut être un vecteur (3,) ou un tableau (N, 3) et z un tableau (N,) :
+    # les énergies sont alors calculées pour chaque ligne. Sys peut aussi
+    # porter une valeur par ligne (projectiles.ProjectileTable).
 
-    Ec = 0.5 * Sys.m * lng.norm(v) ** 2
+    Ec = 0.5 * Sys.m * np.sum(np.square(v), axis=-1)
     Ep = (Sys.m * Pp.g - Pp.rho * Sys.V) * z
     return (Ec, Ep, Ec + Ep)
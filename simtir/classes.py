@@ -5,6 +5,9 @@ Created on Mon Nov  9 17:58:38 2015
 @author: Sami
 """
 
+from .drag import DragCurve
+from .hashing import digest
+
 
 class PHYS:
     """
@@ -14,12 +17,18 @@ class PHYS:
     la chute libre.
     """
 
-    def __init__(self, pesanteur, masse_volumique, viscosite, latitude, vitesse_rotation):
+    def __init__(self, pesanteur, masse_volumique, viscosite, latitude, vitesse_rotation, atm=None, vent=None):
         self.g = pesanteur
         self.rho = masse_volumique
         self.etha = viscosite
         self.lat = latitude
         self.omega = vitesse_rotation
+        # Modèle d'atmosphère (atmosphere.Atmosphere) : rho est alors la
+        # masse volumique à l'altitude 0, None pour une masse volumique uniforme
+        self.atm = atm
+        # Vent (modèle de wind), None sans vent : la traînée dépend de la
+        # vitesse relative à l'air
+        self.vent = vent
 
 
 class OBJET:
@@ -29,10 +38,81 @@ class OBJET:
     Contient les dimensions du système étudié
     """
 
-    def __init__(self, volume, masse, surface):
+    def __init__(self, volume, masse, surface, Cx=0.45):
         self.V = volume
         self.m = masse
         self.S = surface
+        # Coefficient de traînée : constante ou courbe drag.DragCurve fonction du Mach
+        self.Cx = Cx
+
+
+class _Fige:
+    """
+    Base des variantes compactes et immuables de PHYS et OBJET
+
+    Les champs sont stockés dans des __slots__ (pas de __dict__ par instance)
+    et ne peuvent plus être modifiés après la construction, ce qui rend les
+    objets hachables : deux objets aux champs égaux sont égaux et ont le même
+    hash. Les champs objets (atmosphère, vent, courbe de traînée) sont
+    comparés par leur empreinte canonique, calculée une seule fois, de sorte
+    que l'égalité survit à la copie vers un processus de travail.
+    """
+
+    __slots__ = ("_cle",)
+
+    def _fixe(self, *valeurs):
+        for name, value in zip(self.__slots__, valeurs):
+            object.__setattr__(self, name, value)
+        cle = tuple(v if v is None or isinstance(v, float) else digest(v) for v in valeurs)
+        object.__setattr__(self, "_cle", (type(self).__name__,) + cle)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def _champs(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return isinstance(other, _Fige) and self._cle == other._cle
+
+    def __hash__(self):
+        return hash(self._cle)
+
+    def __reduce__(self):
+        return type(self), self._champs()
+
+    def __repr__(self):
+        champs = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({champs})"
+
+
+class FrozenPHYS(_Fige):
+    """
+    Paramètres physiques immuables, mêmes champs que PHYS
+
+    Même forme canonique qu'un PHYS aux mêmes valeurs (hashing.canonical),
+    de sorte que les clés de cache ne dépendent pas de la variante utilisée.
+    """
+
+    canonical_name = "PHYS"
+    __slots__ = ("g", "rho", "etha", "lat", "omega", "atm", "vent")
+
+    def __init__(self, pesanteur, masse_volumique, viscosite, latitude, vitesse_rotation, atm=None, vent=None):
+        self._fixe(float(pesanteur), float(masse_volumique), float(viscosite), float(latitude),
+                   float(vitesse_rotation), atm, vent)
+
+
+class FrozenOBJET(_Fige):
+    """
+    Objet immuable, mêmes champs que OBJET, haché comme un OBJET
+    """
+
+    canonical_name = "OBJET"
+    __slots__ = ("V", "m", "S", "Cx")
+
+    def __init__(self, volume, masse, surface, Cx=0.45):
+        self._fixe(float(volume), float(masse), float(surface), Cx if isinstance(Cx, DragCurve) else float(Cx))
+
 
 # class SOLID :
 #    """
@@ -5,9 +5,16 @@ Configuration loader for ballistic simulation
 Loads simulation parameters from JSON configuration file
 """
 
+import itertools
 import json
 import numpy as np
-from .classes import OBJET, PHYS
+from . import drag
+from . import wind
+from .atmosphere import get_atmosphere
+from .classes import OBJET, FrozenOBJET, FrozenPHYS
+from .projectiles import DEFAULTS, ProjectileTable, dimensions, load_stream, parse_entries
+from .schema import validate
+from .integrators import METHOD_NAMES
 
 
 # Physics presets
@@ -60,13 +67,13 @@ def load_config(config_path):
 
 def get_physics(config):
     """
-    Create PHYS object from configuration
+    Create the physics environment from configuration
 
     Args:
         config: Configuration dictionary
 
     Returns:
-        PHYS: Physics environment object
+        FrozenPHYS: Immutable physics environment, hashed like a PHYS
     """
     physics_config = config.get("physics", {})
     preset = physics_config.get("preset", "earth_air")
@@ -83,15 +90,18 @@ def get_physics(config):
         if "custom" in physics_config:
             params.update(physics_config["custom"])
 
-    # Create PHYS object
+    # Paramètres physiques immuables, partagés par tous les projectiles
     g = params.get("g", 9.806)
     rho = params.get("rho", 0.0)
     etha = params.get("etha", 0.0)
     omega = params.get("omega", 0.0)
     lat_deg = params.get("latitude_deg", 45.0)
     lat_rad = lat_deg * np.pi / 180.0
+    atm = get_atmosphere(params.get("atmosphere")) if rho != 0 else None
+    # Le vent ne dépend pas du preset ; sans air il n'a pas d'effet
+    vent = wind.from_config(physics_config.get("wind")) if rho != 0 else None
 
-    return PHYS(g, rho, etha, lat_rad, omega)
+    return FrozenPHYS(g, rho, etha, lat_rad, omega, atm, vent)
 
 
 def get_projectile_system(projectile_config):
@@ -99,21 +109,27 @@ def get_projectile_system(projectile_config):
     Create OBJET from projectile configuration
 
     Args:
-        projectile_config: Dictionary with projectile parameters
+        projectile_config: Dictionary with projectile parameters, the optional
+            "drag" entry being read by drag.from_config
 
     Returns:
         OBJET: Projectile object
     """
-    D = projectile_config.get("diameter", 0.1)
-    L = projectile_config.get("length", 0.1)
-    m = projectile_config.get("mass", 1.0)
+    return OBJET(*_parametres(projectile_config))
+
+
+def _parametres(projectile_config):
+    """(V, m, S, Cx) of a projectile entry"""
+    D = projectile_config.get("diameter", DEFAULTS["diameter"])
+    L = projectile_config.get("length", DEFAULTS["length"])
+    m = projectile_config.get("mass", DEFAULTS["mass"])
 
     # Calculate volume and surface area
-    V = np.pi / 12 * D ** 3 + (L * np.pi / 4) * D ** 2
-    S = np.pi / 4 * D ** 2
+    V, S = dimensions(D, L)
 
-    obj = OBJET(V, m, S)
-    return obj
+    # Coefficient de traînée constant ou courbe fonction du Mach
+    Cx = drag.from_config(projectile_config.get("drag"))
+    return float(V), m, float(S), Cx
 
 
 def get_initial_conditions(projectile_config, coordinate_system):
@@ -157,10 +173,167 @@ def get_initial_conditions(projectile_config, coordinate_system):
     return U0
 
 
+def get_parallel_settings(config):
+    """
+    Read the process pool settings from the simulation section
+
+    Args:
+        config: Configuration dictionary
+
+    Returns:
+        tuple: (workers, chunk_size)
+            - workers: Number of worker processes (1 = serial, 0 or "auto" = one per CPU)
+            - chunk_size: Number of projectiles sent to a worker at once
+    """
+    sim_config = config.get("simulation", {})
+    workers = sim_config.get("workers", 1)
+    chunk_size = sim_config.get("chunk_size", 1)
+    return (workers, chunk_size)
+
+
+def get_sampling(config):
+    """
+    Read the output sampling from the simulation section
+
+    Args:
+        config: Configuration dictionary
+
+    Returns:
+        dict or None: Sampling specification, see integrators.decimate
+    """
+    sampling = config.get("simulation", {}).get("sampling")
+    if isinstance(sampling, str):
+        sampling = {"mode": sampling}
+    return sampling
+
+
+# Parameters that can be swept, in expansion order (outermost first)
+SWEEP_PARAMETERS = ("preset", "velocity", "theta_deg", "phi_deg", "mass", "diameter")
+
+
+def expand_range(spec):
+    """
+    Expand one sweep parameter specification into its values
+
+    Args:
+        spec: List of values, single value, or range dictionary with
+            "start", "stop" and either "num" (evenly spaced, both ends
+            included) or "step"
+
+    Returns:
+        list: Values of the parameter
+    """
+    if isinstance(spec, dict):
+        start = spec.get("start", 0.0)
+        stop = spec.get("stop", start)
+        if "num" in spec:
+            return np.linspace(start, stop, int(spec["num"])).tolist()
+        if "step" in spec:
+            step = spec["step"]
+            return np.arange(start, stop + step / 2, step).tolist()
+        raise ValueError(f"Sweep range {spec} needs either 'num' or 'step'")
+    if isinstance(spec, (list, tuple)):
+        return list(spec)
+    return [spec]
+
+
+def get_spherical_velocity(projectile_config):
+    """
+    Initial velocity of a projectile as (magnitude, theta_deg, phi_deg)
+
+    Cartesian velocities are converted with the same convention as
+    get_initial_conditions (theta measured from the vertical).
+    """
+    vel_config = projectile_config.get("initial_velocity", {})
+    if vel_config.get("type") in ("spherical", "s"):
+        return (vel_config.get("magnitude", 0.0), vel_config.get("theta_deg", 0.0), vel_config.get("phi_deg", 0.0))
+
+    vx, vy, vz = vel_config.get("vx", 0.0), vel_config.get("vy", 0.0), vel_config.get("vz", 0.0)
+    magnitude = float(np.sqrt(vx ** 2 + vy ** 2 + vz ** 2))
+    theta_deg = float(np.degrees(np.arccos(vz / magnitude))) if magnitude > 0 else 0.0
+    phi_deg = float(np.degrees(np.arctan2(vy, vx)))
+    return (magnitude, theta_deg, phi_deg)
+
+
+def get_sweep_axes(config):
+    """
+    Read the sweep section of a configuration
+
+    Args:
+        config: Configuration dictionary
+
+    Returns:
+        tuple: (names, axes, base)
+            - names: Swept parameter names, in SWEEP_PARAMETERS order
+            - axes: List of value lists, one per name
+            - base: Projectile entry providing the non-swept parameters
+    """
+    sweep_config = config.get("sweep", {})
+    params = sweep_config.get("parameters", {})
+
+    unknown = sorted(set(params) - set(SWEEP_PARAMETERS))
+    if unknown:
+        raise ValueError(f"Unknown sweep parameter(s) {unknown}, expected some of {list(SWEEP_PARAMETERS)}")
+
+    names = [name for name in SWEEP_PARAMETERS if name in params]
+    axes = [expand_range(params[name]) for name in names]
+    base = sweep_config.get("base") or (config.get("projectiles") or [{}])[0]
+    return (names, axes, base)
+
+
+def iter_sweep(config):
+    """
+    Lazily expand the sweep section into simulation cases
+
+    The Cartesian product of the parameter axes is never materialised:
+    cases are generated one at a time, the physics preset varying slowest so
+    that consecutive cases share the same PHYS object.
+
+    Args:
+        config: Configuration dictionary
+
+    Yields:
+        tuple: (case, Phys, Sys, U0)
+            - case: Dictionary of the swept parameter values
+            - Phys: FrozenPHYS object
+            - Sys: FrozenOBJET object
+            - U0: Initial state vector
+    """
+    names, axes, base = get_sweep_axes(config)
+    magnitude, theta_deg, phi_deg = get_spherical_velocity(base)
+
+    preset, Phys = None, get_physics(config)
+    for values in itertools.product(*axes):
+        case = dict(zip(names, values))
+
+        if "preset" in case and case["preset"] != preset:
+            preset = case["preset"]
+            # Le preset balayé remplace celui de la section physics, dont les
+            # valeurs custom et le vent sont conservés
+            Phys = get_physics({"physics": dict(config.get("physics", {}), preset=preset)})
+
+        proj_config = dict(base)
+        proj_config["mass"] = case.get("mass", base.get("mass", 1.0))
+        proj_config["diameter"] = case.get("diameter", base.get("diameter", 0.1))
+        proj_config["initial_velocity"] = {
+            "type": "spherical",
+            "magnitude": case.get("velocity", magnitude),
+            "theta_deg": case.get("theta_deg", theta_deg),
+            "phi_deg": case.get("phi_deg", phi_deg),
+        }
+
+        # Objet compact et immuable : un balayage en crée un par cas
+        yield (case, Phys, FrozenOBJET(*_parametres(proj_config)), get_initial_conditions(proj_config, "s"))
+
+
 def load_simulation_config(config_path):
     """
     Load complete simulation configuration from JSON file
 
+    The configuration is validated against schema.SCHEMA and the projectiles
+    are converted column by column (see projectiles.parse_entries); those of
+    the optional projectiles_file stream follow the inline ones.
+
     Args:
         config_path: Path to JSON configuration file
 
@@ -170,12 +343,16 @@ def load_simulation_config(config_path):
             - h: Time step
             - rep: Coordinate system ('c' or 's')
             - method: Numerical method (1 or 2)
-            - Phys: PHYS object
-            - SYS: List of OBJET objects
+            - Phys: FrozenPHYS object
+            - SYS: ProjectileTable, indexed like a list of OBJET objects
             - M0: Array of initial condition vectors
             - config: Original config dict for additional settings
+
+    Raises:
+        schema.ConfigError: Invalid configuration, with the path of the value
     """
     config = load_config(config_path)
+    validate(config)
 
     # Simulation parameters
     sim_config = config.get("simulation", {})
@@ -188,17 +365,29 @@ def load_simulation_config(config_path):
     Phys = get_physics(config)
 
     # Projectiles
-    projectiles_config = config.get("projectiles", [])
-    SYS = []
-    M0 = []
+    SYS, M0 = get_projectiles(config)
 
-    for proj_config in projectiles_config:
-        SYS.append(get_projectile_system(proj_config))
-        M0.append(get_initial_conditions(proj_config, rep))
+    return (Tmax, h, rep, method, Phys, SYS, M0, config)
 
-    M0 = np.array(M0)
 
-    return (Tmax, h, rep, method, Phys, SYS, M0, config)
+def get_projectiles(config):
+    """
+    Projectiles of a configuration, inline entries then the projectiles_file stream
+
+    Returns:
+        tuple: (SYS, M0) with SYS a ProjectileTable and M0 the (N, 6) initial states
+    """
+    rep = config.get("simulation", {}).get("coordinate_system", "c")
+    SYS, M0 = parse_entries(config.get("projectiles", []), rep)
+    if "projectiles_file" in config:
+        fichier, M1 = load_stream(config["projectiles_file"], rep, premier=len(SYS))
+        SYS = ProjectileTable.concatenate([SYS, fichier])
+        M0 = np.concatenate([M0, M1])
+    return SYS, M0
+
+
+# Nombre de projectiles détaillés dans le résumé
+SUMMARY_PROJECTILES = 20
 
 
 def print_config_summary(config, Phys, SYS, M0):
@@ -208,7 +397,7 @@ def print_config_summary(config, Phys, SYS, M0):
     Args:
         config: Configuration dictionary
         Phys: PHYS object
-        SYS: List of OBJET objects
+        SYS: ProjectileTable
         M0: Array of initial conditions
     """
     print("\n=== Configuration Loaded ===\n")
@@ -219,27 +408,31 @@ def print_config_summary(config, Phys, SYS, M0):
     print(f"  Tmax: {sim.get('Tmax', 1000.0)} s")
     print(f"  Time step: {sim.get('h', 0.001)} s")
     print(f"  Coordinate system: {'Cartesian' if sim.get('coordinate_system', 'c') == 'c' else 'Spherical'}")
-    print(f"  Method: {'Explicit Euler' if sim.get('method', 2) == 1 else 'SciPy odeint'}")
+    print(f"  Method: {METHOD_NAMES.get(sim.get('method', 2), 'Unknown')}")
+    print(f"  Workers: {sim.get('workers', 1)} (chunk size {sim.get('chunk_size', 1)})")
 
     # Physics
     physics = config.get("physics", {})
     print(f"\nPhysics Environment: {physics.get('preset', 'custom')}")
     print(f"  Gravity: {Phys.g} m/s²")
     print(f"  Fluid density: {Phys.rho} kg/m³")
+    print(f"  Atmosphere: {Phys.atm.name if Phys.atm is not None else 'constant density'}")
+    print(f"  Wind: {Phys.vent.name if Phys.vent is not None else 'none'}")
     print(f"  Viscosity: {Phys.etha} kg/m/s")
     print(f"  Rotation speed: {Phys.omega} rad/s")
     print(f"  Latitude: {Phys.lat * 180 / np.pi:.1f}°")
 
     # Projectiles
-    projectiles = config.get("projectiles", [])
-    print(f"\nProjectiles: {len(projectiles)}")
-    for i, (proj, sys, u0) in enumerate(zip(projectiles, SYS, M0)):
-        name = proj.get("name", f"Projectile {i+1}")
-        print(f"\n  {name}:")
-        print(f"    Mass: {sys.m} kg")
-        print(f"    Diameter: {proj.get('diameter')} m")
-        print(f"    Length: {proj.get('length')} m")
+    print(f"\nProjectiles: {len(SYS)}")
+    for i in range(min(len(SYS), SUMMARY_PROJECTILES)):
+        u0 = M0[i]
+        print(f"\n  {SYS.name(i)}:")
+        print(f"    Mass: {SYS.m[i]} kg")
+        print(f"    Diameter: {SYS.diameter[i]} m")
+        print(f"    Length: {SYS.length[i]} m")
         print(f"    Initial altitude: {u0[2]} m")
         print(f"    Initial velocity: ({u0[3]:.2f}, {u0[4]:.2f}, {u0[5]:.2f}) m/s")
+    if len(SYS) > SUMMARY_PROJECTILES:
+        print(f"\n  ... and {len(SYS) - SUMMARY_PROJECTILES} more")
 
     print("\n" + "="*30 + "\n")
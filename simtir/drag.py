@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Mach-dependent drag coefficients
+
+A projectile's drag coefficient OBJET.Cx is either a constant or a
+DragCurve giving Cd as a function of the Mach number: one of the standard
+G1 / G7 reference curves, or a user table. Every curve is resampled once on
+the same uniform Mach grid, so a lookup is a binned linear interpolation
+with no search, and curves of different projectiles can be stacked into one
+array for the batch integrator (see stack).
+
+Curves are cached: projectiles sharing a curve share one DragCurve object,
+and a user table file is only read once.
+"""
+
+import functools
+import json
+
+import numpy as np
+
+# Coefficient de traînée historique, utilisé sans courbe
+CX_DEFAULT = 0.45
+
+# Vitesse du son sans modèle d'atmosphère (ISA, niveau de la mer)
+SOUND_SPEED = 340.29
+
+# Grille de Mach commune à toutes les courbes
+DMACH = 0.01
+MACH_MAX = 5.0
+MACH = np.arange(0.0, MACH_MAX + DMACH / 2, DMACH)
+
+# Fonctions de traînée standard : (Mach, Cd)
+G1 = (
+    (0.00, 0.2629), (0.05, 0.2558), (0.10, 0.2487), (0.15, 0.2413), (0.20, 0.2344), (0.25, 0.2278),
+    (0.30, 0.2214), (0.35, 0.2155), (0.40, 0.2104), (0.45, 0.2061), (0.50, 0.2032), (0.55, 0.2020),
+    (0.60, 0.2034), (0.70, 0.2165), (0.725, 0.2230), (0.75, 0.2313), (0.775, 0.2417), (0.80, 0.2546),
+    (0.825, 0.2706), (0.85, 0.2901), (0.875, 0.3136), (0.90, 0.3415), (0.925, 0.3734), (0.95, 0.4084),
+    (0.975, 0.4448), (1.00, 0.4805), (1.025, 0.5136), (1.05, 0.5427), (1.075, 0.5677), (1.10, 0.5883),
+    (1.125, 0.6053), (1.15, 0.6191), (1.20, 0.6393), (1.25, 0.6518), (1.30, 0.6589), (1.35, 0.6621),
+    (1.40, 0.6625), (1.45, 0.6607), (1.50, 0.6573), (1.55, 0.6528), (1.60, 0.6474), (1.65, 0.6413),
+    (1.70, 0.6347), (1.75, 0.6280), (1.80, 0.6210), (1.85, 0.6141), (1.90, 0.6072), (1.95, 0.6003),
+    (2.00, 0.5934), (2.05, 0.5867), (2.10, 0.5804), (2.15, 0.5743), (2.20, 0.5685), (2.25, 0.5630),
+    (2.30, 0.5577), (2.35, 0.5527), (2.40, 0.5481), (2.45, 0.5438), (2.50, 0.5397), (2.60, 0.5325),
+    (2.70, 0.5264), (2.80, 0.5211), (2.90, 0.5168), (3.00, 0.5133), (3.10, 0.5105), (3.20, 0.5084),
+    (3.30, 0.5067), (3.40, 0.5054), (3.50, 0.5040), (3.60, 0.5030), (3.70, 0.5022), (3.80, 0.5016),
+    (3.90, 0.5010), (4.00, 0.5006), (4.20, 0.4998), (4.40, 0.4995), (4.60, 0.4992), (4.80, 0.4990),
+    (5.00, 0.4988),
+)
+
+G7 = (
+    (0.00, 0.1198), (0.05, 0.1197), (0.10, 0.1196), (0.15, 0.1194), (0.20, 0.1193), (0.25, 0.1194),
+    (0.30, 0.1194), (0.35, 0.1194), (0.40, 0.1193), (0.45, 0.1193), (0.50, 0.1194), (0.55, 0.1193),
+    (0.60, 0.1194), (0.65, 0.1197), (0.70, 0.1202), (0.725, 0.1207), (0.75, 0.1215), (0.775, 0.1226),
+    (0.80, 0.1242), (0.825, 0.1266), (0.85, 0.1306), (0.875, 0.1368), (0.90, 0.1464), (0.925, 0.1660),
+    (0.95, 0.2054), (0.975, 0.2993), (1.00, 0.3803), (1.025, 0.4015), (1.05, 0.4043), (1.075, 0.4034),
+    (1.10, 0.4014), (1.125, 0.3987), (1.15, 0.3955), (1.20, 0.3884), (1.25, 0.3810), (1.30, 0.3732),
+    (1.35, 0.3657), (1.40, 0.3580), (1.50, 0.3440), (1.55, 0.3376), (1.60, 0.3315), (1.65, 0.3260),
+    (1.70, 0.3209), (1.75, 0.3160), (1.80, 0.3117), (1.85, 0.3078), (1.90, 0.3042), (1.95, 0.3010),
+    (2.00, 0.2980), (2.05, 0.2951), (2.10, 0.2922), (2.15, 0.2892), (2.20, 0.2864), (2.25, 0.2835),
+    (2.30, 0.2807), (2.35, 0.2779), (2.40, 0.2752), (2.45, 0.2725), (2.50, 0.2697), (2.55, 0.2670),
+    (2.60, 0.2643), (2.65, 0.2615), (2.70, 0.2588), (2.75, 0.2561), (2.80, 0.2533), (2.85, 0.2506),
+    (2.90, 0.2479), (2.95, 0.2451), (3.00, 0.2424), (3.10, 0.2368), (3.20, 0.2313), (3.30, 0.2258),
+    (3.40, 0.2205), (3.50, 0.2154), (3.60, 0.2106), (3.70, 0.2060), (3.80, 0.2017), (3.90, 0.1975),
+    (4.00, 0.1935), (4.20, 0.1861), (4.40, 0.1793), (4.60, 0.1730), (4.80, 0.1672), (5.00, 0.1618),
+)
+
+STANDARD_CURVES = {
+    "G1": G1,
+    "G7": G7,
+}
+
+
+class DragCurve:
+    """
+    Drag coefficient as a function of the Mach number
+
+    Args:
+        name: Curve name (standard curve or table file)
+        mach, cd: Points of the curve, resampled on the MACH grid. Values
+            beyond the last point are held constant.
+        form_factor: Multiplier of the curve (ratio of the projectile's drag
+            to the reference projectile's)
+    """
+
+    def __init__(self, name, mach, cd, form_factor=1.0):
+        self.name = name
+        self.mach = np.asarray(mach, dtype=float)
+        self.cd = np.asarray(cd, dtype=float)
+        self.form_factor = float(form_factor)
+        self.table = np.interp(MACH, self.mach, self.cd) * self.form_factor
+
+    def canonical_fields(self):
+        return {"name": self.name, "mach": self.mach, "cd": self.cd, "form_factor": self.form_factor}
+
+    def __call__(self, mach):
+        """Drag coefficient at Mach numbers mach, vectorized"""
+        x = np.clip(np.asarray(mach, dtype=float) / DMACH, 0.0, len(MACH) - 1)
+        i = np.minimum(x.astype(int), len(MACH) - 2)
+        return self.table[i] + (x - i) * (self.table[i + 1] - self.table[i])
+
+
+@functools.lru_cache(maxsize=None)
+def get_curve(name, form_factor=1.0):
+    """Shared standard curve, see STANDARD_CURVES"""
+    if name not in STANDARD_CURVES:
+        raise ValueError(f"Unknown drag curve {name!r}, expected one of {sorted(STANDARD_CURVES)}")
+    mach, cd = zip(*STANDARD_CURVES[name])
+    return DragCurve(name, mach, cd, form_factor)
+
+
+@functools.lru_cache(maxsize=None)
+def load_curve(path, form_factor=1.0):
+    """
+    Shared curve read from a table file
+
+    The file is either a JSON object {"mach": [...], "cd": [...]} or a CSV
+    file of (mach, cd) rows, with an optional header line.
+    """
+    if path.lower().endswith(".json"):
+        with open(path) as f:
+            data = json.load(f)
+        mach, cd = data["mach"], data["cd"]
+    else:
+        points = np.genfromtxt(path, delimiter=",", dtype=float)
+        points = points[~np.isnan(points).any(axis=1)]
+        mach, cd = points[:, 0], points[:, 1]
+    return DragCurve(path, mach, cd, form_factor)
+
+
+def from_config(spec):
+    """
+    Drag coefficient of a projectile entry's "drag" value
+
+    Args:
+        spec: None (constant CX_DEFAULT), a number (constant Cd), the name of a
+            standard curve, or a dictionary with one of "cd" (constant),
+            "curve" (standard curve), "table" (file, see load_curve) or
+            "mach" and "cd" lists, and an optional "form_factor"
+
+    Returns:
+        float or DragCurve: Value of OBJET.Cx
+    """
+    if spec is None:
+        return CX_DEFAULT
+    if isinstance(spec, (int, float)):
+        return float(spec)
+    if isinstance(spec, str):
+        return get_curve(spec)
+
+    form_factor = float(spec.get("form_factor", 1.0))
+    if "curve" in spec:
+        return get_curve(spec["curve"], form_factor)
+    if "table" in spec:
+        return load_curve(spec["table"], form_factor)
+    if "mach" in spec:
+        return DragCurve("table", spec["mach"], spec["cd"], form_factor)
+    if "cd" in spec:
+        return float(spec["cd"]) * form_factor
+    raise ValueError(f"Invalid drag specification {spec!r}")
+
+
+def stack(Cx):
+    """
+    Tables of the drag coefficients of a batch of projectiles
+
+    Args:
+        Cx: List of OBJET.Cx values (floats or DragCurve)
+
+    Returns:
+        tuple: (tables, index) where tables is a (n_curves, len(MACH)) array,
+            constant coefficients giving constant rows, and index the (N,)
+            row of each projectile
+    """
+    rows, index, seen = [], np.empty((len(Cx),), dtype=int), {}
+    for k, c in enumerate(Cx):
+        key = ("curve", id(c)) if isinstance(c, DragCurve) else ("cx", float(c))
+        if key not in seen:
+            seen[key] = len(rows)
+            rows.append(c.table if isinstance(c, DragCurve) else np.full(MACH.shape, float(c)))
+        index[k] = seen[key]
+    return np.array(rows), index
+
+
+def lookup(tables, index, mach):
+    """Drag coefficient of each row at its Mach number, vectorized"""
+    x = np.clip(mach / DMACH, 0.0, len(MACH) - 1)
+    i = np.minimum(x.astype(int), len(MACH) - 2)
+    return tables[index, i] + (x - i) * (tables[index, i + 1] - tables[index, i])
+
+
+def sound_speed(Phys, z):
+    """Speed of sound at altitude z, from the atmosphere model when there is one"""
+    if Phys.atm is None:
+        return np.full(np.shape(z), SOUND_SPEED) if np.ndim(z) else SOUND_SPEED
+    return Phys.atm.sound_speed(z)
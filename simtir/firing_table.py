@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Firing tables
+
+Simulates a dense grid of (muzzle speed, elevation) for one projectile under
+one physics preset and stores range, apex, time of flight, impact angle and
+impact speed in a compact .npz table. Queries (range from elevation and
+elevation from range) are answered by interpolation in the table, with no
+integration at query time.
+
+Tables are versioned by a hash of their inputs: get_table only rebuilds a
+table when the physics (the full PHYS, custom values, atmosphere and wind
+included), the projectile or the grid changes.
+"""
+
+import os
+
+import numpy as np
+
+from . import batch
+from . import config_loader
+from .hashing import digest
+
+FIELDS = ("range", "apex", "tof", "impact_angle", "impact_speed")
+
+# Incrémenté lorsque le contenu ou le calcul des tables change
+TABLE_VERSION = 1
+
+
+def table_key(Phys, Sys, z0, speeds, elevations, h, Tmax):
+    """Hash of every input that determines the content of a table"""
+    return digest(TABLE_VERSION, Phys, Sys, z0, speeds, elevations, h, Tmax)
+
+
+class FiringTable:
+    """
+    Firing table of one projectile in one environment
+
+    Each field of FIELDS is a (n_speeds, n_elevations) array. Elevations are
+    angles above the horizontal in degrees (90 - theta_deg in config.json),
+    ranges are horizontal distances and impact angles are measured below the
+    horizontal.
+    """
+
+    def __init__(self, speeds, elevations, fields, key=""):
+        self.speeds = np.asarray(speeds, dtype=float)
+        self.elevations = np.asarray(elevations, dtype=float)
+        self.fields = {name: np.asarray(fields[name], dtype=float) for name in FIELDS}
+        self.key = key
+
+    def save(self, path):
+        np.savez(path, speeds=self.speeds, elevations=self.elevations, key=np.array(self.key), **self.fields)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as archive:
+            return cls(archive["speeds"], archive["elevations"], {name: archive[name] for name in FIELDS},
+                       str(archive["key"]))
+
+    def _rows(self, speed):
+        """Tables linearly interpolated in speed, one row per query"""
+        speed = np.atleast_1d(np.asarray(speed, dtype=float))
+        i = np.clip(np.searchsorted(self.speeds, speed) - 1, 0, len(self.speeds) - 2)
+        w = (speed - self.speeds[i]) / (self.speeds[i + 1] - self.speeds[i])
+        w = np.where((speed < self.speeds[0]) | (speed > self.speeds[-1]), np.nan, w)
+        return i, w
+
+    def lookup(self, name, speed, elevation):
+        """
+        Bilinear interpolation of one field at (speed, elevation)
+
+        Args:
+            name: One of FIELDS
+            speed, elevation: Scalars or arrays broadcast together
+
+        Returns:
+            numpy.array: Interpolated values, NaN outside of the table
+        """
+        speed, elevation = np.broadcast_arrays(np.asarray(speed, dtype=float), np.asarray(elevation, dtype=float))
+        i, wi = self._rows(speed.ravel())
+        E = self.elevations
+        j = np.clip(np.searchsorted(E, elevation.ravel()) - 1, 0, len(E) - 2)
+        wj = (elevation.ravel() - E[j]) / (E[j + 1] - E[j])
+        wj = np.where((elevation.ravel() < E[0]) | (elevation.ravel() > E[-1]), np.nan, wj)
+
+        F = self.fields[name]
+        value = ((1 - wi) * ((1 - wj) * F[i, j] + wj * F[i, j + 1])
+                 + wi * ((1 - wj) * F[i + 1, j] + wj * F[i + 1, j + 1]))
+        return value.reshape(speed.shape)
+
+    def range(self, speed, elevation):
+        """Range for a muzzle speed and an elevation"""
+        return self.lookup("range", speed, elevation)
+
+    def elevation(self, speed, distance, arc="low"):
+        """
+        Elevation giving a range at a muzzle speed
+
+        Args:
+            speed, distance: Scalars or arrays broadcast together
+            arc: "low" for the elevations below the maximum range, "high"
+                for those above it
+
+        Returns:
+            numpy.array: Elevations in degrees, NaN when out of reach
+        """
+        speed, distance = np.broadcast_arrays(np.asarray(speed, dtype=float), np.asarray(distance, dtype=float))
+        shape = speed.shape
+        speed, distance = speed.ravel(), distance.ravel()
+
+        i, w = self._rows(speed)
+        R = self.fields["range"]
+        Rq = (1 - w)[:, None] * R[i] + w[:, None] * R[i + 1]
+
+        # Branche monotone de la portée en fonction de l'élévation
+        imax = np.argmax(np.nan_to_num(Rq, nan=-np.inf), axis=1)
+        cols = np.arange(Rq.shape[1])
+        if arc == "low":
+            branche = cols <= imax[:, None]
+            k = np.sum((Rq < distance[:, None]) & branche, axis=1)
+            k0, k1 = k - 1, k
+        elif arc == "high":
+            branche = cols >= imax[:, None]
+            k = imax + np.sum((Rq >= distance[:, None]) & branche, axis=1)
+            k0, k1 = k - 1, k
+        else:
+            raise ValueError(f"Unknown arc {arc!r}, expected 'low' or 'high'")
+
+        rows = np.arange(len(Rq))
+        ok = (k0 >= 0) & (k1 < Rq.shape[1]) & np.isfinite(w) & (distance <= Rq[rows, imax])
+        k0, k1 = np.clip(k0, 0, Rq.shape[1] - 1), np.clip(k1, 0, Rq.shape[1] - 1)
+        r0, r1 = Rq[rows, k0], Rq[rows, k1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frac = np.where(r1 != r0, (distance - r0) / (r1 - r0), 0.0)
+        E = self.elevations
+        value = np.where(ok, E[k0] + frac * (E[k1] - E[k0]), np.nan)
+        return value.reshape(shape)
+
+
+def _projectile(projectile):
+    """OBJET and launch altitude of a projectile entry or of an (OBJET, z0) pair"""
+    if isinstance(projectile, dict):
+        return config_loader.get_projectile_system(projectile), float(projectile.get("initial_altitude", 0.0))
+    Sys, z0 = projectile
+    return Sys, float(z0)
+
+
+def _physique(Phys):
+    """PHYS object, built from the preset when Phys is a preset name"""
+    if not isinstance(Phys, str):
+        return Phys
+    if Phys not in config_loader.PHYSICS_PRESETS:
+        raise ValueError(f"Unknown preset {Phys!r}, expected one of {sorted(config_loader.PHYSICS_PRESETS)}")
+    return config_loader.get_physics({"physics": {"preset": Phys}})
+
+
+def physics_for_config(config):
+    """
+    Physics of the firing tables of a configuration
+
+    The physics section as a whole (custom values, atmosphere, wind), with
+    its preset replaced by firing_table.preset when given.
+    """
+    physics = dict(config.get("physics", {}))
+    preset = config.get("firing_table", {}).get("preset")
+    if preset is not None:
+        physics["preset"] = preset
+    return config_loader.get_physics({"physics": physics})
+
+
+def generate(projectile, Phys, speeds, elevations, h=0.01, Tmax=1000.0):
+    """
+    Simulate the grid of a firing table
+
+    Args:
+        projectile: Projectile entry of config.json, or an (OBJET, z0) pair
+        Phys: PHYS object, or name of an entry of config_loader.PHYSICS_PRESETS
+        speeds: Muzzle speeds (m/s), increasing
+        elevations: Elevations above the horizontal (degrees), increasing
+        h: Time step of the batch integration
+        Tmax: Maximum time of flight
+
+    Returns:
+        FiringTable: The simulated table
+    """
+    Phys = _physique(Phys)
+    Sys, z0 = _projectile(projectile)
+    speeds = np.asarray(speeds, dtype=float)
+    elevations = np.asarray(elevations, dtype=float)
+
+    v, alpha = np.meshgrid(speeds, np.radians(elevations), indexing="ij")
+    M0 = np.zeros((v.size, 6))
+    M0[:, 2] = z0
+    M0[:, 3] = (v * np.cos(alpha)).ravel()
+    M0[:, 5] = (v * np.sin(alpha)).ravel()
+
+    timpact, Uimpact, zmax = batch.BATCH(M0, Sys.m, Sys.S, Sys.V, Phys, h, Tmax, Cx=Sys.Cx)
+    vh = np.hypot(Uimpact[:, 3], Uimpact[:, 4])
+    fields = {
+        "range": np.hypot(Uimpact[:, 0], Uimpact[:, 1]),
+        "apex": zmax,
+        "tof": timpact,
+        "impact_angle": np.degrees(np.arctan2(-Uimpact[:, 5], vh)),
+        "impact_speed": np.linalg.norm(Uimpact[:, 3:], axis=1),
+    }
+    fields = {name: value.reshape(v.shape) for name, value in fields.items()}
+
+    return FiringTable(speeds, elevations, fields, table_key(Phys, Sys, z0, speeds, elevations, h, Tmax))
+
+
+def get_table(projectile, Phys, speeds, elevations, directory=".firing_tables", h=0.01, Tmax=1000.0):
+    """
+    Load a firing table from directory, generating it if its inputs changed
+
+    Args:
+        projectile: Projectile entry of config.json, or an (OBJET, z0) pair
+        Phys: PHYS object, or name of an entry of config_loader.PHYSICS_PRESETS
+
+    Returns:
+        FiringTable: Table whose key matches the current inputs
+    """
+    Phys = _physique(Phys)
+    Sys, z0 = _projectile(projectile)
+    key = table_key(Phys, Sys, z0, np.asarray(speeds, dtype=float), np.asarray(elevations, dtype=float), h, Tmax)
+
+    path = os.path.join(directory, f"table-{key[:16]}.npz")
+    if os.path.exists(path):
+        return FiringTable.load(path)
+
+    table = generate((Sys, z0), Phys, speeds, elevations, h, Tmax)
+    os.makedirs(directory, exist_ok=True)
+    table.save(path)
+    return table
+
+
+def tables_for_config(config):
+    """
+    Firing tables of every projectile of a configuration, inline and from
+    the projectiles_file stream
+
+    Reads the firing_table section: "speeds" and "elevations_deg" (ranges or
+    lists, see config_loader.expand_range), "preset" (replaces the preset of
+    the physics section, see physics_for_config), "directory" and the time
+    step "h".
+
+    Returns:
+        list: (name, FiringTable) of each projectile, in configuration order
+    """
+    table_config = config.get("firing_table", {})
+    Phys = physics_for_config(config)
+    speeds = config_loader.expand_range(table_config.get("speeds", {"start": 50.0, "stop": 500.0, "num": 46}))
+    elevations = config_loader.expand_range(table_config.get("elevations_deg", {"start": 1.0, "stop": 89.0, "num": 89}))
+    directory = table_config.get("directory", ".firing_tables")
+    h = table_config.get("h", 0.01)
+    Tmax = config.get("simulation", {}).get("Tmax", 1000.0)
+
+    SYS, M0 = config_loader.get_projectiles(config)
+    # Liste plutôt que dictionnaire : deux projectiles peuvent porter le même nom
+    return [(SYS.name(k), get_table((SYS[k], M0[k, 2]), Phys, speeds, elevations, directory, h, Tmax))
+            for k in range(len(SYS))]
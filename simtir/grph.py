@@ -95,47 +95,59 @@ def extrait(choix1, choix2, S, N, Sys, Pp):
     
     permet d'extraire le graphe voulu par l'utilisateur. Retourne le tuple (X, Y)
     qui représente le graphe de la grandeur à tracer
+
+    Les grandeurs sont extraites en une fois sur le tableau (N, 6) : tranches
+    de colonnes pour les positions et vitesses, normes et énergies calculées
+    ligne à ligne de manière vectorisée. Les résultats sont des ndarray.
     """
     pos1 = choix1 - 1
     pos2 = choix2 - 1
-    X = []
-    Y = []
-    for k in range(N):
-        if choix1 <= 2:  # Tracé des positions ou des vitesses en fonction du temps
-            Y.append(S[k][pos2 + 3 * pos1])
-        elif choix1 == 3:  # Tracé des trajectoires en 2D
-            if choix2 < 3:  # Ce choix détermine le plan dans lequel on trace la trajectoire
-                X.append(S[k][0])
-                Y.append(S[k][choix2])
-            if choix2 == 3:
-                X.append(S[k][1])
-                Y.append(S[k][2])
-        elif choix1 == 4:  # Norme des vecteurs accéleration et vitesses
-            if choix2 == 1:
-                Y.append(lng.norm(S[k][:3]))
-            elif choix2 == 2:
-                Y.append(lng.norm(S[k][3:]))
-        elif choix1 == 5:  # Energies
-            Y.append(cl.Eng(S[k][3:], S[k][2], Sys, Pp)[pos2])
+    S = np.asarray(S)[:N]
+
+    if choix1 <= 2:  # Tracé des positions ou des vitesses en fonction du temps
+        return S[:, pos2 + 3 * pos1]
+    elif choix1 == 3:  # Tracé des trajectoires en 2D
+        if choix2 < 3:  # Ce choix détermine le plan dans lequel on trace la trajectoire
+            return S[:, 0], S[:, choix2]
+        return S[:, 1], S[:, 2]
+    elif choix1 == 4:  # Norme des vecteurs position et vitesse
+        if choix2 == 1:
+            return lng.norm(S[:, :3], axis=1)
+        elif choix2 == 2:
+            return lng.norm(S[:, 3:], axis=1)
+    elif choix1 == 5:  # Energies
+        return cl.Eng(S[:, 3:], S[:, 2], Sys, Pp)[pos2]
 
-    if choix1 == 3:
-        return X, Y
-    else:
-        return Y
+    return np.empty((0,))
+
+
+def extrait_flux(choix1, choix2, flux, Sys, Pp):
+    """
+    Version par blocs de extrait pour une trajectoire produite bloc par bloc
+    (voir integrators.stream) : chaque bloc (T, S) donne un couple (X, Y) à
+    tracer, X étant le temps sauf pour les trajectoires 2D. Seul le bloc en
+    cours est en mémoire.
+    """
+    for T, S in flux:
+        if choix1 == 3:
+            yield extrait(choix1, choix2, S, len(S), Sys, Pp)
+        else:
+            yield np.asarray(T), extrait(choix1, choix2, S, len(S), Sys, Pp)
 
 
-def TRACE(choix1, choix2, S, N, h, Sys, Pp):
+def TRACE(choix1, choix2, S, N, h, Sys, Pp, T=None):
     """
     Extrait, affiche et légende le graphique voulu par l'utilisateur
     
         -texteG : Contient le texte à afficher pour légender le graphe G [xlab, ylab, title]
+        -T : Instants des échantillons, à fournir lorsque la sortie n'est pas à pas constant
     """
 
     if choix1 == 3:
         (X, Y) = extrait(choix1, choix2, S, N, Sys, Pp)
     else:
         Y = extrait(choix1, choix2, S, N, Sys, Pp)
-        X = np.linspace(0, N * h, N)
+        X = np.linspace(0, N * h, N) if T is None else np.asarray(T)[:N]
 
     texteG = LEGENDE(choix1, choix2)
 
@@ -146,11 +158,8 @@ def TRACE_3D(S, N):
     """
     De même pour l'affichage de la trajectoire en 3D
     """
-    X, Y, Z = [], [], []
-    for k in range(N):
-        X.append(S[k][0])
-        Y.append(S[k][1])
-        Z.append(S[k][2])
+    S = np.asarray(S)[:N]
+    X, Y, Z = S[:, 0], S[:, 1], S[:, 2]
     #
     #    ax.set_xlim3d(0, max(X)+0.5)
     #    ax.set_ylim3d(min(Y)-0.5, max(Y)+0.5)
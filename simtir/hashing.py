@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Canonical hashing of simulation inputs
+
+Builds a stable, JSON-based representation of PHYS/OBJET objects, arrays and
+configuration values, and hashes it. Two inputs with the same field values
+always give the same digest, whatever the key order or container type.
+"""
+
+import hashlib
+import json
+
+import numpy as np
+
+
+def canonical(obj):
+    """
+    JSON-compatible canonical form of a simulation input
+
+    Objects are reduced to their class name (canonical_name when the class
+    defines one) and fields, arrays to nested lists of floats and
+    dictionaries to key-sorted dictionaries.
+    """
+    if isinstance(obj, dict):
+        return {str(key): canonical(value) for key, value in sorted(obj.items(), key=lambda item: str(item[0]))}
+    if isinstance(obj, (list, tuple)):
+        return [canonical(value) for value in obj]
+    if isinstance(obj, np.ndarray):
+        return canonical(obj.tolist())
+    if isinstance(obj, (bool, np.bool_)):
+        return bool(obj)
+    if isinstance(obj, (int, np.integer)):
+        return int(obj)
+    if isinstance(obj, (float, np.floating)):
+        return float(obj)
+    if obj is None or isinstance(obj, str):
+        return obj
+    if hasattr(obj, "canonical_fields"):
+        # Objets dont les champs volumineux se déduisent de quelques paramètres
+        return {"__class__": _nom(obj), "fields": canonical(obj.canonical_fields())}
+    if hasattr(obj, "__dict__") or hasattr(obj, "__slots__"):
+        fields = dict(getattr(obj, "__dict__", {}))
+        for name in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, name):
+                fields[name] = getattr(obj, name)
+        return {"__class__": _nom(obj), "fields": canonical(fields)}
+    return repr(obj)
+
+
+def _nom(obj):
+    # Variantes d'une classe (classes.FrozenOBJET...) hachées sous le nom de la classe d'origine
+    return getattr(type(obj), "canonical_name", type(obj).__name__)
+
+
+def digest(*parts):
+    """
+    SHA-256 hex digest of the canonical form of parts
+    """
+    text = json.dumps(canonical(list(parts)), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
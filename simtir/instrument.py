@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in run instrumentation
+
+Phase timers and counters reported as a JSON or CSV run summary. The layer
+is disabled by default: phase then returns a shared no-op context manager and
+count / peak return after a single test, so instrumented code paths cost one
+function call per phase or per counted batch of work, never per step.
+
+    instrument.enable()
+    with instrument.phase("integration"):
+        ...
+    instrument.count("rhs_evaluations", n)
+    instrument.write_report("profile.json")
+
+Counters recorded by the package:
+    - rhs_evaluations: right-hand side evaluations of all integrators
+    - steps_accepted, steps_rejected: integration steps (only the adaptive
+      solver rejects steps)
+    - samples: trajectory samples returned by integrators.simulate
+    - trajectory_bytes_peak: largest trajectory buffer allocated
+
+With a process pool, worker counters are merged into the parent process;
+phase timers only measure the parent process.
+"""
+
+import contextlib
+import csv
+import json
+import time
+
+ENABLED = False
+
+_NULL = contextlib.nullcontext()
+
+# Nom de phase -> [durée cumulée (s), nombre d'appels]
+TIMERS = {}
+COUNTERS = {}
+PEAKS = {}
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    TIMERS.clear()
+    COUNTERS.clear()
+    PEAKS.clear()
+
+
+class _Phase:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        timer = TIMERS.setdefault(self.name, [0.0, 0])
+        timer[0] += time.perf_counter() - self.t0
+        timer[1] += 1
+        return False
+
+
+def phase(name):
+    """Context manager timing a phase of the run (no-op when disabled)"""
+    if not ENABLED:
+        return _NULL
+    return _Phase(name)
+
+
+def count(name, n=1):
+    """Add n to a counter"""
+    if ENABLED:
+        COUNTERS[name] = COUNTERS.get(name, 0) + n
+
+
+def peak(name, value):
+    """Keep the largest value reported for name"""
+    if ENABLED and value > PEAKS.get(name, 0):
+        PEAKS[name] = value
+
+
+def snapshot():
+    """Counters and peaks of this process, to be merged in another one"""
+    return {"counters": dict(COUNTERS), "peaks": dict(PEAKS)}
+
+
+def merge(state):
+    """Add a snapshot taken in a worker process to the current counters"""
+    for name, n in state["counters"].items():
+        COUNTERS[name] = COUNTERS.get(name, 0) + n
+    for name, value in state["peaks"].items():
+        if value > PEAKS.get(name, 0):
+            PEAKS[name] = value
+
+
+def report():
+    """
+    Run summary
+
+    Returns:
+        dict: {"phases": {name: {"seconds", "calls"}}, "counters": {name: value}}
+    """
+    counters = dict(COUNTERS)
+    counters.update(PEAKS)
+    return {
+        "phases": {name: {"seconds": seconds, "calls": calls} for name, (seconds, calls) in TIMERS.items()},
+        "counters": counters,
+    }
+
+
+def write_report(path):
+    """Write the run summary as CSV when path ends with .csv, as JSON otherwise"""
+    summary = report()
+    if path.lower().endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("kind", "name", "value", "calls"))
+            for name, entry in summary["phases"].items():
+                writer.writerow(("phase", name, entry["seconds"], entry["calls"]))
+            for name, value in summary["counters"].items():
+                writer.writerow(("counter", name, value, ""))
+    else:
+        with open(path, "w") as f:
+            json.dump(summary, f, indent=2)
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""
+Fixed-step integrators
+
+Explicit Euler, RK4, velocity-Verlet and semi-implicit Euler schemes built on
+calc.compile_F. Each integrator writes the trajectory into a preallocated
+(n, 6) array that grows by doubling, stops at ground impact and returns
+(T, S) with the same layout as calc.INTEGRE: T[k] = k * h and S[k] the state
+at T[k], plus the apex located inside its step, the last row being the
+impact interpolated to z = 0.
+"""
+
+import numpy as np
+
+from . import analytic
+from . import calc
+from . import instrument
+from .summary import hermite
+
+# Numéros de méthode utilisés par simulation.method dans config.json
+METHOD_NAMES = {
+    1: "Explicit Euler",
+    2: "SciPy adaptive (stops at impact)",
+    3: "Runge-Kutta 4",
+    4: "Velocity Verlet",
+    5: "Semi-implicit Euler",
+}
+
+BLOCK_SIZE = 4096
+
+# Nombre de lignes des blocs produits par stream
+CHUNK_SIZE = 65536
+
+
+def _pas_euler(f, h):
+    k = np.empty((6,))
+
+    def pas(U, Un):
+        f(U, k)
+        np.multiply(k, h, out=Un)
+        Un += U
+
+    return pas
+
+
+def _pas_rk4(f, h):
+    k1, k2, k3, k4 = (np.empty((6,)) for _ in range(4))
+    tmp = np.empty((6,))
+
+    def pas(U, Un):
+        f(U, k1)
+        np.multiply(k1, h / 2, out=tmp)
+        np.add(tmp, U, out=tmp)
+        f(tmp, k2)
+        np.multiply(k2, h / 2, out=tmp)
+        np.add(tmp, U, out=tmp)
+        f(tmp, k3)
+        np.multiply(k3, h, out=tmp)
+        np.add(tmp, U, out=tmp)
+        f(tmp, k4)
+
+        # Un = U + h / 6 * (k1 + 2 k2 + 2 k3 + k4)
+        np.add(k2, k3, out=Un)
+        Un *= 2
+        Un += k1
+        Un += k4
+        Un *= h / 6
+        Un += U
+
+    return pas
+
+
+def _pas_verlet(f, h):
+    k0, k1 = np.empty((6,)), np.empty((6,))
+    tmp = np.empty((6,))
+
+    def pas(U, Un):
+        # x(t + h) = x + v h + a h^2 / 2
+        f(U, k0)
+        Un[:3] = U[:3] + h * U[3:] + h * h / 2 * k0[3:]
+
+        # Les forces dépendant de la vitesse, a(t + h) est évaluée avec la
+        # vitesse prédite v + a h
+        tmp[:3] = Un[:3]
+        tmp[3:] = U[3:] + h * k0[3:]
+        f(tmp, k1)
+        Un[3:] = U[3:] + h / 2 * (k0[3:] + k1[3:])
+
+    return pas
+
+
+def _pas_euler_si(f, h):
+    k = np.empty((6,))
+
+    def pas(U, Un):
+        # La vitesse est mise à jour en premier puis utilisée pour la position
+        f(U, k)
+        Un[3:] = U[3:] + h * k[3:]
+        Un[:3] = U[:3] + h * Un[3:]
+
+    return pas
+
+
+def _integre(pas, U0, h, Tmax, evaluations=1):
+    """
+    Advance U0 with the stepping function pas until ground impact or Tmax
+
+    evaluations is the number of right-hand side evaluations of one step,
+    reported to the instrumentation layer.
+
+    Returns:
+        tuple: (T, S) trimmed to the samples actually computed
+    """
+    nmax = int(np.ceil(Tmax / h))
+    S = np.empty((min(BLOCK_SIZE, nmax + 1), 6))
+    S[0] = U0
+
+    j = 0
+    # La simulation s'arrête lorsque l'objet possède une altitude nulle
+    # ou que la durée limite est atteinte.
+    while S[j, 2] >= 0 and j < nmax:
+        if j + 1 == len(S):
+            S = np.concatenate((S, np.empty((min(len(S), nmax + 1 - len(S)), 6))))
+        pas(S[j], S[j + 1])
+        j += 1
+
+    instrument.count("rhs_evaluations", evaluations * j)
+    instrument.count("steps_accepted", j)
+    instrument.peak("trajectory_bytes_peak", S.nbytes)
+
+    T = h * np.arange(j + 1)
+    if j > 0 and S[j, 2] < 0:
+        # Impact interpolé linéairement dans le dernier pas
+        frac = S[j - 1, 2] / (S[j - 1, 2] - S[j, 2])
+        S[j] = S[j - 1] + frac * (S[j] - S[j - 1])
+        T[j] = (j - 1 + frac) * h
+
+    return _insere_sommet(T, S[:j + 1])
+
+
+def _insere_sommet(T, S):
+    """
+    Insert the apex, located where the vertical velocity changes sign, among
+    the samples. Returns new (T, S) arrays.
+    """
+    vz = S[:, 5]
+    k = np.flatnonzero((vz[:-1] > 0) & (vz[1:] <= 0))
+    if k.size == 0:
+        return T, S.copy()
+
+    k = k[0]
+    frac = vz[k] / (vz[k] - vz[k + 1])
+    Usommet = hermite(S[k], S[k + 1], T[k + 1] - T[k], frac)
+    Usommet[5] = 0.
+    tsommet = T[k] + frac * (T[k + 1] - T[k])
+    return np.insert(T, k + 1, tsommet), np.insert(S, k + 1, Usommet, axis=0)
+
+
+def EULER(U0, Sys, Pp, h, Tmax):
+    """Explicit Euler scheme"""
+    return _integre(_pas_euler(calc.compile_F(Sys, Pp), h), U0, h, Tmax)
+
+
+def RK4(U0, Sys, Pp, h, Tmax):
+    """Classical fourth-order Runge-Kutta scheme"""
+    return _integre(_pas_rk4(calc.compile_F(Sys, Pp), h), U0, h, Tmax, evaluations=4)
+
+
+def VERLET(U0, Sys, Pp, h, Tmax):
+    """Velocity-Verlet scheme, with a predicted velocity for drag and Coriolis"""
+    return _integre(_pas_verlet(calc.compile_F(Sys, Pp), h), U0, h, Tmax, evaluations=2)
+
+
+def EULER_SI(U0, Sys, Pp, h, Tmax):
+    """Semi-implicit (symplectic) Euler scheme"""
+    return _integre(_pas_euler_si(calc.compile_F(Sys, Pp), h), U0, h, Tmax)
+
+
+METHODS = {
+    1: EULER,
+    2: calc.INTEGRE,
+    3: RK4,
+    4: VERLET,
+    5: EULER_SI,
+}
+
+ANALYTIC_NAME = "Analytic (drag-free)"
+
+# Fabriques de pas des méthodes à pas fixe et nombre d'évaluations de F par pas
+STEPPERS = {
+    1: (_pas_euler, 1),
+    3: (_pas_rk4, 4),
+    4: (_pas_verlet, 2),
+    5: (_pas_euler_si, 1),
+}
+
+
+def _flux(pas, U0, h, Tmax, chunk_size, evaluations=1):
+    """Chunked counterpart of _integre, without the apex insertion"""
+    nmax = int(np.ceil(Tmax / h))
+    S = np.empty((chunk_size, 6))
+    S[0] = U0
+    U = Uprec = S[0]
+    n, j = 1, 0
+
+    # La simulation s'arrête lorsque l'objet possède une altitude nulle
+    # ou que la durée limite est atteinte.
+    while U[2] >= 0 and j < nmax:
+        if n == chunk_size:
+            yield h * np.arange(j - n + 1, j + 1), S
+            # Nouveau bloc : l'ancien n'est plus référencé que par U
+            S = np.empty((chunk_size, 6))
+            n = 0
+        pas(U, S[n])
+        Uprec, U = U, S[n]
+        n += 1
+        j += 1
+
+    instrument.count("rhs_evaluations", evaluations * j)
+    instrument.count("steps_accepted", j)
+    instrument.peak("trajectory_bytes_peak", S.nbytes)
+
+    T = h * np.arange(j - n + 1, j + 1)
+    if j > 0 and U[2] < 0:
+        # Impact interpolé linéairement dans le dernier pas
+        frac = Uprec[2] / (Uprec[2] - U[2])
+        U[:] = Uprec + frac * (U - Uprec)
+        T[-1] = (j - 1 + frac) * h
+    yield T, S[:n]
+
+
+def _flux_parabole(U0, Pp, h, Tmax, chunk_size):
+    """Chunks of the closed-form trajectory, see analytic.PARABOLE"""
+    timpact = analytic.temps_impact(U0, Pp.g)
+    atterrit = np.isfinite(timpact) and timpact <= Tmax
+    n = int(np.ceil(timpact / h)) if atterrit else int(np.floor(Tmax / h)) + 1
+
+    for a in range(0, max(n, 1), chunk_size):
+        T = h * np.arange(a, min(a + chunk_size, n))
+        if atterrit:
+            T = T[T < timpact]
+            if a + chunk_size >= n:
+                T = np.append(T, timpact)
+        S = analytic.etat(U0, Pp.g, T)
+        if atterrit and a + chunk_size >= n:
+            S[-1, 2] = 0.
+        yield T, S
+
+
+def stream(U0, Sys, Phys, h, Tmax, method=3, chunk_size=CHUNK_SIZE):
+    """
+    Integrate one projectile chunk by chunk
+
+    Generator over the fixed-step methods (and the closed form of drag-free
+    environments) yielding (T, S) blocks of at most chunk_size consecutive
+    samples, the last block ending with the interpolated impact. Each block is
+    a new array and only the last state is kept between blocks, so memory use
+    is bounded by the chunk size whatever the flight duration, as long as the
+    consumer does not keep the blocks. The apex is not inserted among the
+    samples: summary.StreamSummary locates it.
+
+    Args:
+        U0: Initial state vector
+        Sys: OBJET object
+        Phys: PHYS object
+        h: Time step
+        Tmax: Maximum simulation time
+        method: Method number of a fixed-step integrator, see STEPPERS
+        chunk_size: Maximum number of rows of a block
+
+    Returns:
+        generator: (T, S) sample times and states of each block
+    """
+    if analytic.applicable(Phys):
+        return _flux_parabole(np.asarray(U0, dtype=float), Phys, h, Tmax, chunk_size)
+    if method not in STEPPERS:
+        raise ValueError(f"Method {method!r} cannot be streamed, expected one of {sorted(STEPPERS)}")
+
+    fabrique, evaluations = STEPPERS[method]
+    return _flux(fabrique(calc.compile_F(Sys, Phys), h), U0, h, Tmax, chunk_size, evaluations)
+
+
+SAMPLING_MODES = ("all", "stride", "times", "tolerance")
+
+
+def decimate(T, S, sampling=None, h=None):
+    """
+    Reduce a trajectory to the samples requested by a sampling specification
+
+    The first sample, the apex (highest sample, located exactly by the
+    integrators) and the impact (last sample) are always kept.
+
+    Args:
+        T, S: Sample times and states
+        sampling: None or dictionary with a "mode" key:
+            - "all": keep every step
+            - "stride": keep the steps whose time is a multiple of
+              "stride" * h; the apex and the impact are kept in addition and
+              do not shift the steps that follow them
+            - "times": states at the requested "times", interpolated
+            - "tolerance": keep only the samples needed to reproduce the
+              positions within "tol" metres by linear interpolation
+        h: Time step of the integrator (default: median spacing of T)
+
+    Returns:
+        tuple: (T, S) reduced
+    """
+    mode = (sampling or {}).get("mode", "all")
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"Unknown sampling mode {mode!r}, expected one of {list(SAMPLING_MODES)}")
+    if mode == "all" or len(T) < 3:
+        return T, S
+
+    N = len(T) - 1
+    kept = [0, int(np.argmax(S[:N + 1, 2])), N]
+
+    if mode == "times":
+        t = np.asarray(sampling["times"], dtype=float)
+        t = t[(t >= T[0]) & (t < T[N])]
+        k = np.clip(np.searchsorted(T, t, side="right") - 1, 0, N - 1)
+        Ut = hermite(S[k], S[k + 1], T[k + 1] - T[k], (t - T[k]) / (T[k + 1] - T[k]))
+
+        # Échantillons exacts placés en tête : np.unique garde la première
+        # occurrence d'un instant demandé égal au départ, au sommet ou à l'impact
+        Tm = np.concatenate((T[kept], t))
+        Tm, premiers = np.unique(Tm, return_index=True)
+        return Tm, np.concatenate((S[kept], Ut))[premiers]
+
+    if mode == "stride":
+        # Pas repérés par leur instant : la ligne du sommet insérée n'est pas comptée
+        stride = max(1, int(sampling.get("stride", 1)))
+        h = float(np.median(np.diff(T[:N]))) if h is None else float(h)
+        pas = np.round(T[:N] / h)
+        indices = np.flatnonzero(np.isclose(T[:N], pas * h, rtol=0.0, atol=1e-9 * h) & (pas % stride == 0))
+    else:
+        # L'erreur d'interpolation linéaire sur un intervalle dt vaut environ
+        # |a| dt^2 / 8 : on garde un point chaque fois que le cumul de
+        # dt * sqrt(|a| / (8 tol)) franchit un entier.
+        tol = float(sampling.get("tol", 0.01))
+        a = np.linalg.norm(np.gradient(S[:, 3:], T, axis=0), axis=1)
+        densite = np.sqrt(0.5 * (a[1:] + a[:-1]) / (8 * tol)) * np.diff(T)
+        cumul = np.floor(np.concatenate(([0.], np.cumsum(densite))))
+        indices = np.flatnonzero(np.diff(cumul) > 0)
+
+    indices = np.unique(np.concatenate((indices, kept)))
+    return T[indices], S[indices]
+
+
+def select(Phys, method):
+    """
+    Solver used for a method in an environment
+
+    When gravity is the only force (see analytic.applicable) the trajectory
+    is evaluated in closed form whatever the method; numerical integration is
+    only used when drag, buoyancy or Coriolis is active.
+
+    Returns:
+        tuple: (integrator, name) where name is "Analytic (drag-free)" or the
+            entry of METHOD_NAMES of method
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown simulation method {method!r}, expected one of {sorted(METHODS)}")
+    if analytic.applicable(Phys):
+        return analytic.PARABOLE, ANALYTIC_NAME
+    return METHODS[method], METHOD_NAMES[method]
+
+
+def simulate(U0, Sys, Phys, h, Tmax, method=2, sampling=None):
+    """
+    Integrate one projectile with the method selected in the configuration
+
+    Args:
+        U0: Initial state vector
+        Sys: OBJET object
+        Phys: PHYS object
+        h: Time step
+        Tmax: Maximum simulation time
+        method: Method number, see METHOD_NAMES
+        sampling: Output sampling, see decimate. With the adaptive solver,
+            requested times are evaluated with its dense interpolant.
+
+    Returns:
+        tuple: (T, S) sample times and states, the last row being the impact
+    """
+    integrateur, _ = select(Phys, method)
+
+    with instrument.phase("integration"):
+        if integrateur is calc.INTEGRE and (sampling or {}).get("mode") == "times":
+            T, S = calc.INTEGRE(U0, Sys, Phys, h, Tmax, T_eval=sampling["times"])
+        else:
+            T, S = integrateur(U0, Sys, Phys, h, Tmax)
+            T, S = decimate(T, S, sampling, h)
+
+    instrument.count("samples", len(T))
+    instrument.peak("trajectory_bytes_peak", S.nbytes)
+    return T, S
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Run manifest
+
+Records, for the last run of a configuration, the canonical inputs of every
+projectile and the file holding its result, so that a rerun only simulates
+what changed:
+
+    - run-level inputs (PHYS, h, Tmax, method, output sampling, package
+      version) are compared as a whole: any difference invalidates every
+      projectile
+    - projectile-level inputs (OBJET and initial state U0) are compared per
+      projectile: a difference only invalidates that projectile
+
+Projectiles are matched by their inputs, not by their position, so that
+inserting, removing or reordering entries reuses every unchanged result.
+Unlike the result cache, which keeps any number of runs up to a size bound,
+the manifest directory holds exactly the results of the last run, and it
+explains each re-simulation with the paths of the inputs that changed.
+
+    run/
+        manifest.json   run inputs, then one entry per projectile
+        <key>.npz       (T, S, info) of one projectile, see cache.ResultCache
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from . import __version__
+from . import cache
+from . import parallel
+from .hashing import canonical, digest
+from .output import info_record
+
+MANIFEST_FILE = "manifest.json"
+
+
+def run_inputs(Phys, h, Tmax, method, sampling=None):
+    """Canonical run-level inputs, shared by every projectile"""
+    return canonical({"version": __version__, "PHYS": Phys, "h": float(h), "Tmax": float(Tmax),
+                      "method": method, "sampling": sampling})
+
+
+def projectile_inputs(U0, Sys):
+    """Canonical inputs of one projectile"""
+    return canonical({"OBJET": Sys, "U0": np.asarray(U0, dtype=float)})
+
+
+def differences(old, new, chemin=""):
+    """
+    Paths of the values that differ between two canonical forms
+
+    Returns:
+        list: Dotted paths such as "PHYS.rho" or "U0[3]", in key order
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        # Les noms de classe et de champs des formes canoniques n'apparaissent pas dans les chemins
+        if "__class__" in old and "__class__" in new and old["__class__"] == new["__class__"]:
+            return differences(old["fields"], new["fields"], chemin)
+        paths = []
+        for key in sorted(set(old) | set(new)):
+            sous_chemin = f"{chemin}.{key}" if chemin else key
+            if key not in old or key not in new:
+                paths.append(sous_chemin)
+            else:
+                paths.extend(differences(old[key], new[key], sous_chemin))
+        return paths
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        paths = []
+        for k, (a, b) in enumerate(zip(old, new)):
+            paths.extend(differences(a, b, f"{chemin}[{k}]"))
+        return paths
+    return [] if old == new else [chemin]
+
+
+class Manifest:
+    """
+    Manifest of the last run in a directory
+
+    Args:
+        directory: Location of manifest.json and of the result files
+
+    Attributes:
+        reused: Number of projectiles read back by the last call to run
+        reasons: Name -> changed input paths of each re-simulated projectile
+            ("new" for a projectile absent from the previous run, "missing
+            result file" when its result was deleted)
+        run_changes: Changed run-level input paths, empty when the run-level
+            inputs are unchanged or when there was no previous run
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.store = cache.ResultCache(directory)
+        self.reused = 0
+        self.reasons = {}
+        self.run_changes = []
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    def load(self):
+        """Previous manifest, or None when missing or unreadable"""
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write(self, run, entries, previous=None):
+        """Write the manifest atomically, then remove the result files of previous it no longer lists"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"run": run, "projectiles": entries}, f)
+        os.replace(tmp, self.path)
+
+        if previous is not None:
+            # Seuls les fichiers de l'exécution précédente sont supprimés
+            gardes = {entry["file"] for entry in entries}
+            for name in {entry["file"] for entry in previous["projectiles"]} - gardes:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def run(self, M0, SYS, Phys, h, Tmax, method=2, workers=1, chunk_size=1, sampling=None, store=None,
+            names=None):
+        """
+        Results of a run, only the projectiles whose inputs changed being simulated
+
+        Args:
+            M0, SYS, Phys, h, Tmax, method, workers, chunk_size, sampling: See
+                parallel.run
+            store: Optional ResultCache consulted before simulating a changed
+                projectile
+            names: Projectile names for the manifest and reasons (default:
+                SYS.name when available, else "Projectile k")
+
+        Returns:
+            list: One (T, S, info) tuple per projectile, in the order of SYS
+        """
+        K = len(SYS)
+        if names is None:
+            names = [SYS.name(k) if hasattr(SYS, "name") else f"Projectile {k + 1}" for k in range(K)]
+        run = run_inputs(Phys, h, Tmax, method, sampling)
+        run_key = digest(run)
+        inputs = [projectile_inputs(M0[k], SYS[k]) for k in range(K)]
+        keys = [digest(run_key, projectile) for projectile in inputs]
+
+        dernier = previous = self.load()
+        if previous is not None and previous.get("run") != run:
+            # Entrée globale modifiée : aucun résultat précédent n'est réutilisable
+            self.run_changes = differences(previous.get("run"), run)
+            previous = None
+        else:
+            self.run_changes = []
+        anciens = {entry["key"]: entry for entry in previous["projectiles"]} if previous is not None else {}
+        par_nom = {entry["name"]: entry for entry in previous["projectiles"]} if previous is not None else {}
+
+        results = [self.store.get(key) if key in anciens else None for key in keys]
+        missing = [k for k, entry in enumerate(results) if entry is None]
+        self.reused = K - len(missing)
+        self.reasons = {}
+        for k in missing:
+            if self.run_changes:
+                self.reasons[names[k]] = self.run_changes
+            elif keys[k] in anciens:
+                self.reasons[names[k]] = ["missing result file"]
+            elif names[k] in par_nom:
+                self.reasons[names[k]] = differences(par_nom[names[k]]["inputs"], inputs[k])
+            else:
+                self.reasons[names[k]] = ["new"]
+
+        if missing:
+            if store is not None:
+                fresh = cache.run(store, M0[missing], [SYS[k] for k in missing], Phys, h, Tmax, method, workers,
+                                  chunk_size, sampling)
+            else:
+                fresh = [(T, S, info_record(T, S, SYS[k], Phys)) for k, (T, S) in
+                         zip(missing, parallel.run(M0[missing], [SYS[k] for k in missing], Phys, h, Tmax, method,
+                                                   workers, chunk_size, sampling=sampling))]
+            for k, entry in zip(missing, fresh):
+                self.store.put(keys[k], *entry, evict=False)
+                results[k] = entry
+
+        self.write(run, [{"name": names[k], "key": keys[k], "file": keys[k] + ".npz", "inputs": inputs[k]}
+                         for k in range(K)], dernier)
+        return results
+
+    def report(self, limit=20):
+        """Summary lines of the last run, listing the changed inputs of at most limit projectiles"""
+        lines = [f"Manifest: {self.reused} reused, {len(self.reasons)} simulated"]
+        if self.run_changes:
+            lines.append(f"  run inputs changed ({', '.join(self.run_changes)}): every projectile re-simulated")
+            return lines
+        for name, paths in list(self.reasons.items())[:limit]:
+            lines.append(f"  {name}: {', '.join(paths)}")
+        if len(self.reasons) > limit:
+            lines.append(f"  ... and {len(self.reasons) - limit} more")
+        return lines
+
+
+def get_manifest(config):
+    """
+    Manifest configured by the manifest section, or None when disabled
+
+    Keys: "enabled" (default false) and "directory".
+    """
+    manifest_config = config.get("manifest", {})
+    if not manifest_config.get("enabled", False):
+        return None
+    return Manifest(manifest_config.get("directory", ".simtir_run"))
@@ -12,6 +12,7 @@ Created on Mon Nov  2 15:18:39 2015
 ###########################
 
 import os
+import numpy as np
 from . import ini
 from . import calc 
 from . import grph
@@ -126,12 +127,16 @@ def sous_traj():
 
 ################################
 
-def numerique(S, N, Sys, Pp, h):
+def numerique(S, N, Sys, Pp, h, T=None):
     # Affiche les informations numériques ci dessous pour un mobile
-    L = calc.info(S, N, Sys, Pp)
+    # T : instants des échantillons, T[N] est l'instant exact de l'impact
+    if T is None:
+        T = np.arange(N + 1) * h
+    L = calc.info(S, N, Sys, Pp, T)
+    tchute = T[N]
 
     print("\n -Nombre d'échantillons : ", N)
-    print(" -Temps de chute : ", round(N * h, 2), "sec.")
+    print(" -Temps de chute : ", round(tchute, 2), "sec.")
     print(" -Altitude maximale : ", round(L[0], 2), "m")
     print(" -Portée : ", round(L[1], 2), "m")
     print(" -Vitesse finale : ", round(L[2], 2), "m/s")
@@ -218,6 +223,9 @@ def param_calcul():
     os.system("clear")
     print("\nChoix de la méthode de résolution : \n")
     print("1- Euler explicite")
-    print("2- Scipy Odeint")
+    print("2- Scipy à pas adaptatif")
+    print("3- Runge-Kutta 4")
+    print("4- Verlet vitesse")
+    print("5- Euler semi-implicite")
 
     return chx()
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+Monte Carlo dispersion
+
+Perturbs the muzzle speed, elevation, azimuth, mass and air density of a
+projectile around its configuration entry, integrates all samples together
+with batch.BATCH and reduces the impact points to dispersion statistics:
+mean point of impact, CEP, covariance ellipse and percentiles of range and
+deflection (distance along and across the nominal firing azimuth).
+
+Samples are drawn in chunks of batch_size rows. Each chunk, and each
+perturbed parameter within it, has its own generator derived from the seed,
+the projectile index and the chunk index, so that:
+
+    - a run is reproducible from its seed, whatever the number of workers
+    - adding or removing a perturbation does not change the others' draws
+    - chunks can be computed by separate processes or runs (see simulate's
+      chunks argument) and merged exactly with merge
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import batch
+from . import config_loader
+from .output import ColumnWriter
+from .parallel import resolve_workers
+
+# Paramètres perturbés, dans l'ordre de leurs générateurs
+PARAMETERS = ("speed", "elevation_deg", "azimuth_deg", "mass", "rho")
+
+DISTRIBUTIONS = ("normal", "uniform")
+
+# Colonnes des points d'impact
+IMPACT_FIELDS = ("range", "deflection", "x", "y", "t_impact", "impact_speed", "landed")
+
+
+def _spec(spec):
+    """Normalized perturbation: (distribution, scale, relative)"""
+    if isinstance(spec, (int, float)):
+        return "normal", float(spec), False
+    distribution = spec.get("distribution", "normal")
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution {distribution!r}, expected one of {DISTRIBUTIONS}")
+    return distribution, float(spec.get("scale", 0.0)), bool(spec.get("relative", False))
+
+
+def draw(dispersion, n, seed, key=0, chunk=0):
+    """
+    Perturbations of one chunk of samples
+
+    Args:
+        dispersion: Dictionary PARAMETERS name -> perturbation, a number (normal
+            standard deviation) or {"distribution", "scale", "relative"}, scale
+            being the standard deviation (normal) or the half-width (uniform).
+            Speed and mass perturbations are relative to the nominal value when
+            relative is true, angles are in degrees and the density
+            perturbation is always relative, the perturbed density being
+            clipped at 0 (see _chunk).
+        n: Number of samples of the chunk
+        seed: Seed of the run
+        key: Index of the projectile
+        chunk: Index of the chunk
+
+    Returns:
+        dict: name -> (n,) perturbation (0 for parameters not in dispersion)
+    """
+    unknown = set(dispersion) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown dispersion parameters {sorted(unknown)}, expected {PARAMETERS}")
+
+    deltas = {}
+    for j, name in enumerate(PARAMETERS):
+        if name not in dispersion:
+            deltas[name] = np.zeros((n,))
+            continue
+        distribution, scale, _ = _spec(dispersion[name])
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(key, chunk, j)))
+        if distribution == "normal":
+            deltas[name] = rng.normal(0.0, scale, n)
+        else:
+            deltas[name] = rng.uniform(-scale, scale, n)
+    return deltas
+
+
+def _nominal(U0):
+    """Speed, elevation and azimuth (radians) of the initial velocity"""
+    v = float(np.linalg.norm(U0[3:]))
+    elevation = float(np.arcsin(U0[5] / v)) if v > 0 else 0.0
+    return v, elevation, float(np.arctan2(U0[4], U0[3]))
+
+
+def _perturbe(nominal, d, spec):
+    """Apply the perturbations d to a nominal value, absolute or relative"""
+    return nominal * (1 + d) if spec is not None and _spec(spec)[2] else nominal + d
+
+
+def _chunk(args):
+    """Impact points of one chunk of samples"""
+    U0, Sys, Phys, dispersion, seed, key, chunk, n, h, Tmax = args
+    d = draw(dispersion, n, seed, key, chunk)
+    v0, el0, az0 = _nominal(U0)
+
+    v = _perturbe(v0, d["speed"], dispersion.get("speed"))
+    m = _perturbe(Sys.m, d["mass"], dispersion.get("mass"))
+    el = el0 + np.radians(d["elevation_deg"])
+    az = az0 + np.radians(d["azimuth_deg"])
+    # Rapport de masse volumique borné à 0 : un tirage extrême donne le vide, pas une poussée
+    sigma = np.maximum(1 + d["rho"], 0.0)
+
+    M0 = np.zeros((n, 6))
+    M0[:, :3] = U0[:3]
+    M0[:, 3] = v * np.cos(el) * np.cos(az)
+    M0[:, 4] = v * np.cos(el) * np.sin(az)
+    M0[:, 5] = v * np.sin(el)
+
+    timpact, Uimpact, _ = batch.BATCH(M0, m, Sys.S, Sys.V, Phys, h, Tmax, Cx=Sys.Cx, sigma=sigma)
+    return impacts(timpact, Uimpact, az0)
+
+
+def impacts(timpact, Uimpact, azimuth):
+    """
+    Impact columns of a batch, see IMPACT_FIELDS
+
+    Range and deflection are the coordinates of the impact along and across
+    (to the left of) the firing azimuth, given in radians.
+    """
+    x, y = Uimpact[:, 0], Uimpact[:, 1]
+    c, s = np.cos(azimuth), np.sin(azimuth)
+    return {
+        "range": x * c + y * s,
+        "deflection": y * c - x * s,
+        "x": x,
+        "y": y,
+        "t_impact": timpact,
+        "impact_speed": np.linalg.norm(Uimpact[:, 3:], axis=1),
+        "landed": np.isfinite(timpact),
+    }
+
+
+def merge(*parts):
+    """Concatenate impact columns of consecutive chunks"""
+    return {name: np.concatenate([part[name] for part in parts]) for name in IMPACT_FIELDS}
+
+
+def n_chunks(samples, batch_size):
+    return -(-int(samples) // int(batch_size))
+
+
+def simulate(U0, Sys, Phys, dispersion, samples, seed=0, h=0.01, Tmax=1000.0, batch_size=4096, workers=1,
+             key=0, chunks=None):
+    """
+    Impact points of a dispersed projectile
+
+    Args:
+        U0: Nominal initial state vector
+        Sys: Nominal OBJET object
+        Phys: PHYS object
+        dispersion: Perturbations, see draw
+        samples: Total number of samples of the run
+        seed: Seed of the run
+        h: Time step of the batch integrator
+        Tmax: Maximum simulation time
+        batch_size: Number of samples per chunk, part of the definition of the
+            samples together with the seed
+        workers: Number of worker processes, see parallel.resolve_workers
+        key: Index of the projectile, selects independent draws
+        chunks: Indices of the chunks to compute (default: all); runs covering
+            complementary chunks are merged exactly by merge
+
+    Returns:
+        dict: Impact columns, see IMPACT_FIELDS, in chunk order
+    """
+    U0 = np.asarray(U0, dtype=float)
+    total = n_chunks(samples, batch_size)
+    chunks = range(total) if chunks is None else chunks
+    tasks = [(U0, Sys, Phys, dispersion, seed, key, c, min(batch_size, samples - c * batch_size), h, Tmax)
+             for c in chunks]
+
+    workers = resolve_workers(workers)
+    if workers == 1 or len(tasks) < 2:
+        parts = [_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            parts = list(pool.map(_chunk, tasks))
+    if not parts:
+        return {name: np.empty((0,), dtype=bool if name == "landed" else float) for name in IMPACT_FIELDS}
+    return merge(*parts)
+
+
+def statistics(columns, percentiles=(5, 50, 95), probability=0.5, aim=None):
+    """
+    Dispersion statistics of the landed samples
+
+    Args:
+        columns: Impact columns, see simulate
+        percentiles: Percentiles of range and deflection
+        probability: Probability contained in the covariance ellipse
+        aim: Optional (range, deflection) aim point, usually the nominal
+            impact, for the CEP about the aim point
+
+    Returns:
+        dict: samples, landed, mpi (mean range and deflection), cep (median
+            miss distance about the MPI), cep_aim, covariance, ellipse
+            (semi-axes and angle in degrees of the major axis from the range
+            axis) and the range / deflection percentiles
+    """
+    landed = np.asarray(columns["landed"], dtype=bool)
+    P = np.stack((columns["range"][landed], columns["deflection"][landed]), axis=1)
+    stats = {"samples": int(len(landed)), "landed": int(len(P))}
+    if len(P) < 2:
+        return stats
+
+    mpi = P.mean(axis=0)
+    C = np.cov(P, rowvar=False)
+    valeurs, vecteurs = np.linalg.eigh(C)
+    # Demi-axes de l'ellipse contenant la probabilité demandée (loi normale)
+    k = np.sqrt(-2 * np.log(1 - probability))
+    axes = k * np.sqrt(np.maximum(valeurs[::-1], 0.0))
+    # Orientation du grand axe, définie à 180° près
+    angle = (np.degrees(np.arctan2(vecteurs[1, 1], vecteurs[0, 1])) + 90) % 180 - 90
+
+    stats.update({
+        "mpi": mpi.tolist(),
+        "cep": float(np.median(np.linalg.norm(P - mpi, axis=1))),
+        "covariance": C.tolist(),
+        "ellipse": {"probability": probability, "semi_major": float(axes[0]), "semi_minor": float(axes[1]),
+                    "angle_deg": float(angle)},
+        "range_percentiles": dict(zip(map(str, percentiles), np.percentile(P[:, 0], percentiles).tolist())),
+        "deflection_percentiles": dict(zip(map(str, percentiles), np.percentile(P[:, 1], percentiles).tolist())),
+    })
+    if aim is not None:
+        stats["cep_aim"] = float(np.median(np.linalg.norm(P - np.asarray(aim, dtype=float), axis=1)))
+    return stats
+
+
+def run(config, path, h, Tmax):
+    """
+    Dispersion of every projectile of the configuration
+
+    Writes the impact columns of all projectiles (inline and from the
+    projectiles_file stream) back to back, with a "projectile" index column, and meta.json holding the statistics of each
+    projectile.
+
+    Args:
+        config: Configuration dictionary with a "monte_carlo" section
+        path: Output directory
+        h: Time step
+        Tmax: Maximum simulation time
+
+    Returns:
+        dict: Statistics of each projectile, by name
+    """
+    mc = config.get("monte_carlo", {})
+    samples = int(mc.get("samples", 1000))
+    seed = int(mc.get("seed", 0))
+    batch_size = int(mc.get("batch_size", 4096))
+    workers = mc.get("workers", 1)
+    dispersion = mc.get("dispersion", {})
+    percentiles = tuple(mc.get("percentiles", (5, 50, 95)))
+    probability = float(mc.get("probability", 0.5))
+
+    Phys = config_loader.get_physics(config)
+    SYS, M0 = config_loader.get_projectiles(config)
+
+    results = {}
+    with ColumnWriter(path, ("projectile",) + IMPACT_FIELDS) as writer:
+        for k in range(len(SYS)):
+            name, Sys, U0 = SYS.name(k), SYS[k], M0[k]
+
+            columns = simulate(U0, Sys, Phys, dispersion, samples, seed, h, Tmax, batch_size, workers, key=k)
+            # Impact nominal, point visé du CEP
+            timpact, Uimpact, _ = batch.BATCH_TABLE(U0[None], SYS[k:k + 1], Phys, h, Tmax)
+            nominal = impacts(timpact, Uimpact, _nominal(U0)[2])
+
+            results[name] = statistics(columns, percentiles, probability,
+                                       aim=(nominal["range"][0], nominal["deflection"][0]))
+            results[name]["nominal"] = [float(nominal["range"][0]), float(nominal["deflection"][0])]
+            writer.append(projectile=np.full((samples,), k), **columns)
+
+    meta = {
+        "columns": ["projectile"] + list(IMPACT_FIELDS),
+        "samples": samples,
+        "seed": seed,
+        "batch_size": batch_size,
+        "dispersion": dispersion,
+        "simulation": {"h": h, "Tmax": Tmax},
+        "statistics": results,
+    }
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    return results
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar binary result files
+
+Trajectories are written as one flat .npy file per column (t, x, y, z, vx,
+vy, vz) holding every projectile back to back, plus an offsets.npy index and
+a meta.json file with the configuration and the calc.info summary of each
+projectile. Columns are plain .npy files, so a slice of a multi-GB sweep can
+be read with np.load(..., mmap_mode='r') without loading the rest.
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+
+from . import summary
+
+COLUMNS = ("t", "x", "y", "z", "vx", "vy", "vz")
+
+INFO_FIELDS = ("t_impact", "apex", "range", "impact_speed", "impact_energy", "drag_work")
+
+# Taille fixe de l'en-tête .npy, réécrit à la fermeture une fois la longueur connue
+_HEADER_SIZE = 128
+
+
+def _npy_header(n, dtype):
+    """Version 1.0 .npy header of fixed size for a 1-D array of n items"""
+    magic = b"\x93NUMPY\x01\x00"
+    size = _HEADER_SIZE - len(magic) - 2
+    text = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (np.dtype(dtype).str, n)
+    return magic + struct.pack("<H", size) + (text.ljust(size - 1) + "\n").encode("latin1")
+
+
+class ColumnWriter:
+    """
+    Append-only writer of 1-D .npy columns
+
+    Rows are streamed to disk as they are appended, so memory use does not
+    depend on the total length. Headers are finalized by close().
+    """
+
+    def __init__(self, path, columns, dtype="<f8"):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.columns = tuple(columns)
+        self.dtype = np.dtype(dtype)
+        self.n = 0
+        self._files = {}
+        for name in self.columns:
+            f = open(os.path.join(path, name + ".npy"), "wb")
+            f.write(_npy_header(0, self.dtype))
+            self._files[name] = f
+
+    def append(self, **arrays):
+        """Append the same number of rows to every column"""
+        lengths = {len(np.atleast_1d(arrays[name])) for name in self.columns}
+        if len(lengths) != 1:
+            raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+        for name in self.columns:
+            data = np.ascontiguousarray(np.atleast_1d(arrays[name]), dtype=self.dtype)
+            self._files[name].write(data.tobytes())
+        self.n += lengths.pop()
+
+    def close(self):
+        for f in self._files.values():
+            f.seek(0)
+            f.write(_npy_header(self.n, self.dtype))
+            f.close()
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def info_record(T, S, Sys, Phys):
+    """
+    Summary record of a trajectory, keyed by INFO_FIELDS
+
+    Args:
+        T, S: Sample times and states, the last row being the impact
+
+    Returns:
+        dict: Impact time followed by the calc.info values
+    """
+    return _record(summary.resume(T, S, Sys, Phys))
+
+
+def _record(R):
+    """INFO_FIELDS record of a summary.resume dictionary"""
+    values = (R["t_impact"], R["zmax"], np.linalg.norm(R["impact"][:3]), np.linalg.norm(R["impact"][3:]),
+              R["Ec_impact"], R["W"])
+    return {name: float(value) for name, value in zip(INFO_FIELDS, values)}
+
+
+class ResultWriter:
+    """
+    Writer of a run's trajectories in the columnar layout
+
+    Each call to add() or add_stream() appends one projectile. close() writes offsets.npy,
+    where trajectory k spans rows offsets[k]:offsets[k + 1] of every column,
+    and meta.json.
+    """
+
+    def __init__(self, path, run_meta=None):
+        self.path = path
+        self.run_meta = dict(run_meta or {})
+        self._columns = ColumnWriter(path, COLUMNS)
+        self._offsets = [0]
+        self._projectiles = []
+
+    def add(self, T, S, meta=None):
+        S = np.asarray(S)
+        self._columns.append(t=T, x=S[:, 0], y=S[:, 1], z=S[:, 2],
+                             vx=S[:, 3], vy=S[:, 4], vz=S[:, 5])
+        self._offsets.append(self._columns.n)
+        self._projectiles.append(meta or {})
+
+    def add_stream(self, flux, meta=None, Sys=None, Phys=None):
+        """
+        Append one projectile given as an iterable of (T, S) blocks
+
+        Blocks are written as they come, see integrators.stream. When Sys
+        and Phys are given, the info record of the trajectory is computed on
+        the fly and stored in meta under "info".
+
+        Returns:
+            dict: The info record, or None
+        """
+        resume = summary.StreamSummary(Sys, Phys) if Sys is not None else None
+        for T, S in flux:
+            S = np.asarray(S)
+            self._columns.append(t=T, x=S[:, 0], y=S[:, 1], z=S[:, 2],
+                                 vx=S[:, 3], vy=S[:, 4], vz=S[:, 5])
+            if resume is not None:
+                resume.update(T, S)
+
+        meta = dict(meta or {})
+        if resume is not None:
+            meta["info"] = _record(resume.result())
+        self._offsets.append(self._columns.n)
+        self._projectiles.append(meta)
+        return meta.get("info")
+
+    def close(self):
+        self._columns.close()
+        np.save(os.path.join(self.path, "offsets.npy"), np.array(self._offsets, dtype=np.int64))
+        meta = dict(self.run_meta, columns=list(COLUMNS), projectiles=self._projectiles)
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def results_path(path, fmt="npy"):
+    """Path actually written for path: np.savez appends .npz to archive names without it"""
+    if fmt == "npz" and not str(path).endswith(".npz"):
+        return str(path) + ".npz"
+    return path
+
+
+def write_results(path, TT, M, SYS, Phys, config, fmt="npy"):
+    """
+    Write the trajectories of a run with their metadata
+
+    Args:
+        path: Output directory ("npy") or file ("npz", .npz being appended
+            when missing)
+        TT, M: Lists of sample times and state arrays, one per projectile
+        SYS: List of OBJET objects
+        Phys: PHYS object
+        config: Configuration dictionary
+        fmt: "npy" for memory-mappable columns, "npz" for a single archive
+
+    Returns:
+        str: Path written, see results_path
+    """
+    run_meta = {key: config.get(key, {}) for key in ("simulation", "physics")}
+    projectiles = config.get("projectiles", [])
+    metas = [dict(projectiles[k] if k < len(projectiles) else {}, info=info_record(TT[k], M[k], SYS[k], Phys))
+             for k in range(len(M))]
+
+    if fmt == "npy":
+        with ResultWriter(path, run_meta) as writer:
+            for T, S, meta in zip(TT, M, metas):
+                writer.add(T, S, meta)
+    elif fmt == "npz":
+        S = np.concatenate(M) if M else np.empty((0, 6))
+        offsets = np.cumsum([0] + [len(T) for T in TT])
+        arrays = {name: S[:, i - 1] for i, name in enumerate(COLUMNS) if i > 0}
+        meta = dict(run_meta, columns=list(COLUMNS), projectiles=metas)
+        path = results_path(path, fmt)
+        np.savez(path, t=np.concatenate(TT) if TT else np.empty((0,)), offsets=offsets,
+                 meta=np.array(json.dumps(meta)), **arrays)
+    else:
+        raise ValueError(f"Unknown results format {fmt!r}, expected 'npy' or 'npz'")
+    return path
+
+
+def load_results(path, mmap_mode="r"):
+    """
+    Open results written by write_results or ResultWriter
+
+    Args:
+        path: Results directory, or .npz archive (the extension may be omitted)
+        mmap_mode: Passed to np.load for the columns of a directory
+
+    Returns:
+        tuple: (columns, offsets, meta)
+            - columns: dict of 1-D arrays (memory-mapped for a directory)
+            - offsets: Row offsets of each projectile
+            - meta: Metadata dictionary
+    """
+    if not os.path.exists(path):
+        path = results_path(path, "npz")
+    if os.path.isdir(path):
+        columns = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode) for name in COLUMNS}
+        offsets = np.load(os.path.join(path, "offsets.npy"))
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+    else:
+        with np.load(path) as archive:
+            columns = {name: archive[name] for name in COLUMNS}
+            offsets = archive["offsets"]
+            meta = json.loads(str(archive["meta"]))
+    return columns, offsets, meta
+
+
+def trajectory(columns, offsets, k):
+    """
+    Read back trajectory k as (T, S)
+
+    Only the rows of projectile k are read from memory-mapped columns.
+    """
+    a, b = offsets[k], offsets[k + 1]
+    T = np.array(columns["t"][a:b])
+    S = np.column_stack([columns[name][a:b] for name in COLUMNS[1:]])
+    return T, S
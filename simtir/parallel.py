@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel execution of multi-projectile configurations
+
+Projectiles are independent once the physics environment is fixed, so the
+entries of config["projectiles"] are fanned out across a process pool. Each
+worker returns the compact (T, S) trajectory produced by
+integrators.simulate, or only a summary record when the full trajectory is
+not needed.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from . import calc
+from . import instrument
+from . import integrators
+
+
+def _simulate(args):
+    U0, Sys, Phys, h, Tmax, method, summary, sampling = args
+    T, S = integrators.simulate(U0, Sys, Phys, h, Tmax, method, sampling)
+    if summary:
+        N = len(S) - 1
+        return (T[N],) + calc.info(S, N, Sys, Phys, T)
+    return T, S
+
+
+def _simulate_instrumented(args):
+    # Processus de travail : les compteurs sont renvoyés au processus parent
+    instrument.enable()
+    instrument.reset()
+    return _simulate(args), instrument.snapshot()
+
+
+def resolve_workers(workers):
+    """
+    Normalize the configured worker count
+
+    Args:
+        workers: Positive int, or 0 / None / "auto" for one worker per CPU
+
+    Returns:
+        int: Number of worker processes
+    """
+    if workers in (None, 0, "auto"):
+        return os.cpu_count() or 1
+    workers = int(workers)
+    if workers < 1:
+        raise ValueError(f"simulation.workers must be positive, got {workers}")
+    return workers
+
+
+def run(M0, SYS, Phys, h, Tmax, method=2, workers=1, chunk_size=1, summary=False, sampling=None):
+    """
+    Simulate every projectile, in parallel when more than one worker is used
+
+    Args:
+        M0: Array of initial condition vectors
+        SYS: List of OBJET objects
+        Phys: PHYS object
+        h: Time step
+        Tmax: Maximum simulation time
+        method: Method number, see integrators.METHOD_NAMES
+        workers: Number of worker processes, see resolve_workers
+        chunk_size: Number of projectiles sent to a worker at once
+        summary: Return (tfinal, zmax, dist, vfinal, Ecfinal, W) records
+            instead of (T, S) trajectories
+        sampling: Output sampling of the trajectories, see integrators.decimate
+
+    Returns:
+        list: One result per projectile, in the order of SYS
+    """
+    workers = resolve_workers(workers)
+    tasks = ((M0[k], SYS[k], Phys, h, Tmax, method, summary, sampling) for k in range(len(SYS)))
+
+    if workers == 1 or len(SYS) < 2:
+        return [_simulate(task) for task in tasks]
+
+    chunksize = max(1, int(chunk_size))
+    with ProcessPoolExecutor(max_workers=min(workers, len(SYS))) as executor:
+        if not instrument.ENABLED:
+            return list(executor.map(_simulate, tasks, chunksize=chunksize))
+
+        results = []
+        for result, state in executor.map(_simulate_instrumented, tasks, chunksize=chunksize):
+            instrument.merge(state)
+            results.append(result)
+        return results
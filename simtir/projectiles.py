@@ -0,0 +1,452 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar projectile tables
+
+A ProjectileTable stores the parameters of many projectiles in one NumPy
+structured array, one row per projectile, instead of one OBJET per
+projectile. Its V, m and S attributes are the (N,) columns, so the table can
+be passed wherever vectorized code expects an OBJET with array fields
+(calc.Eng, batch.BATCH_TABLE); indexing a row gives an immutable
+classes.FrozenOBJET, so that it can also replace a list of OBJET.
+
+Names and drag coefficients are stored once and referenced by index from
+the rows. The table hashes its raw bytes, which is much cheaper than the
+canonical form of one object per projectile.
+
+parse_entries converts a list of projectile configuration entries into a
+table and the initial states in one pass per column, validating each column
+with vectorized checks; load_stream does the same for a JSONL or CSV file
+read by blocks of lines, so that a huge fleet is never held as one tree of
+Python objects. Errors are schema.ConfigError located by their JSON path, or
+by file and line for streams.
+"""
+
+import csv
+import hashlib
+import itertools
+import json
+
+import numpy as np
+
+from . import drag
+from .classes import FrozenOBJET
+from .hashing import digest
+from .schema import ConfigError, unknown_keys
+
+PROJECTILE_DTYPE = np.dtype([
+    ("V", "<f8"),
+    ("m", "<f8"),
+    ("S", "<f8"),
+    ("diameter", "<f8"),
+    ("length", "<f8"),
+    ("name", "<i4"),
+    ("drag", "<i4"),
+])
+
+# Valeurs par défaut d'une entrée de projectile
+DEFAULTS = {"diameter": 0.1, "length": 0.1, "mass": 1.0}
+
+PROJECTILE_KEYS = ("name", "diameter", "length", "mass", "initial_altitude", "initial_velocity", "drag")
+VELOCITY_KEYS = ("type", "vx", "vy", "vz", "magnitude", "theta_deg", "phi_deg")
+VELOCITY_TYPES = {"cartesian": False, "c": False, "spherical": True, "s": True}
+
+# Colonnes numériques d'une entrée : (clé de l'entrée, clé de la vitesse),
+# valeur par défaut et contrôle
+NUMERIC_COLUMNS = {
+    "diameter": (("diameter", None), DEFAULTS["diameter"], "positive"),
+    "length": (("length", None), DEFAULTS["length"], "non_negative"),
+    "mass": (("mass", None), DEFAULTS["mass"], "positive"),
+    "initial_altitude": (("initial_altitude", None), 0.0, "number"),
+    "vx": (("initial_velocity", "vx"), 0.0, "number"),
+    "vy": (("initial_velocity", "vy"), 0.0, "number"),
+    "vz": (("initial_velocity", "vz"), 0.0, "number"),
+    "magnitude": (("initial_velocity", "magnitude"), 0.0, "non_negative"),
+    "theta_deg": (("initial_velocity", "theta_deg"), 0.0, "number"),
+    "phi_deg": (("initial_velocity", "phi_deg"), 0.0, "number"),
+}
+
+# Colonnes d'un flux CSV
+CSV_COLUMNS = ("name", "type", "drag") + tuple(NUMERIC_COLUMNS)
+
+# Nombre de lignes d'un flux converties ensemble
+STREAM_BLOCK = 65536
+
+
+def dimensions(D, L):
+    """Volume and frontal area of cylinders of diameters D and lengths L, vectorized"""
+    D, L = np.asarray(D, dtype=float), np.asarray(L, dtype=float)
+    V = np.pi / 12 * D ** 3 + (L * np.pi / 4) * D ** 2
+    S = np.pi / 4 * D ** 2
+    return V, S
+
+
+def _cle(value):
+    # Les courbes partagées sont comparées par identité, les constantes par valeur
+    if isinstance(value, drag.DragCurve):
+        return "curve", id(value)
+    return ("name", value) if isinstance(value, str) else ("cx", float(value))
+
+
+def _indexe_valeurs(values):
+    """_indexe for hashable values compared by equality, such as names"""
+    vus = {}
+    index = np.fromiter((vus.setdefault(value, len(vus)) for value in values), dtype=int, count=len(values))
+    return list(vus), index
+
+
+def _indexe(values):
+    """Distinct values, in order of appearance, and the index of each value among them"""
+    distinct, index, vus = [], np.empty((len(values),), dtype=int), {}
+    for k, value in enumerate(values):
+        cle = _cle(value)
+        if cle not in vus:
+            vus[cle] = len(distinct)
+            distinct.append(value)
+        index[k] = vus[cle]
+    return distinct, index
+
+
+class ProjectileTable:
+    """
+    Parameters of a fleet of projectiles
+
+    Args:
+        data: Structured array of PROJECTILE_DTYPE
+        names: Names referenced by the "name" column
+        drags: OBJET.Cx values (floats or DragCurve) referenced by the "drag"
+            column
+    """
+
+    def __init__(self, data, names=("",), drags=(drag.CX_DEFAULT,)):
+        self.data = np.asarray(data, dtype=PROJECTILE_DTYPE)
+        self.names = list(names)
+        self.drags = list(drags)
+
+    @classmethod
+    def from_config(cls, projectiles):
+        """Table of a list of projectile configuration entries, see parse_entries"""
+        return parse_entries(projectiles)[0]
+
+    @classmethod
+    def from_objets(cls, SYS, names=None):
+        """Table of a list of OBJET, whose diameters and lengths are unknown (NaN)"""
+        n = len(SYS)
+        data = np.zeros((n,), dtype=PROJECTILE_DTYPE)
+        data["V"] = [obj.V for obj in SYS]
+        data["m"] = [obj.m for obj in SYS]
+        data["S"] = [obj.S for obj in SYS]
+        data["diameter"] = data["length"] = np.nan
+
+        names, data["name"] = _indexe(list(names) if names is not None else
+                                      [f"Projectile {k + 1}" for k in range(n)])
+        drags, data["drag"] = _indexe([getattr(obj, "Cx", drag.CX_DEFAULT) for obj in SYS])
+        return cls(data, names or [""], drags or [drag.CX_DEFAULT])
+
+    @property
+    def V(self):
+        return self.data["V"]
+
+    @property
+    def m(self):
+        return self.data["m"]
+
+    @property
+    def S(self):
+        return self.data["S"]
+
+    @property
+    def diameter(self):
+        return self.data["diameter"]
+
+    @property
+    def length(self):
+        return self.data["length"]
+
+    @property
+    def Cx(self):
+        """
+        Drag coefficient of each row: an (N,) array when all are constant,
+        a list of OBJET.Cx values otherwise (see batch.BATCH)
+        """
+        index = self.data["drag"]
+        if any(isinstance(Cx, drag.DragCurve) for Cx in self.drags):
+            return [self.drags[i] for i in index]
+        return np.asarray(self.drags, dtype=float)[index]
+
+    def name(self, k):
+        return self.names[self.data["name"][k]]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, k):
+        """FrozenOBJET of row k, or table of the selected rows"""
+        if isinstance(k, (int, np.integer)):
+            row = self.data[k]
+            return FrozenOBJET(row["V"], row["m"], row["S"], self.drags[row["drag"]])
+        return ProjectileTable(self.data[k], self.names, self.drags)
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+    def digest(self):
+        """SHA-256 of the rows, names and drag coefficients"""
+        h = hashlib.sha256(np.ascontiguousarray(self.data).tobytes())
+        h.update(digest(self.names, self.drags).encode("utf-8"))
+        return h.hexdigest()
+
+    def canonical_fields(self):
+        return {"sha256": self.digest()}
+
+    @classmethod
+    def concatenate(cls, tables):
+        """Rows of several tables, in order, with their names and drags merged"""
+        tables = list(tables)
+        if not tables:
+            return cls(np.zeros((0,), dtype=PROJECTILE_DTYPE))
+        data = np.concatenate([t.data for t in tables])
+        names, index = _indexe([name for t in tables for name in t.names])
+        drags, dindex = _indexe([Cx for t in tables for Cx in t.drags])
+        # Indices locaux des noms et des traînées -> indices dans les listes fusionnées
+        debut = dn = dd = 0
+        for t in tables:
+            rows = slice(debut, debut + len(t))
+            data["name"][rows] = index[dn + t.data["name"]]
+            data["drag"][rows] = dindex[dd + t.data["drag"]]
+            debut, dn, dd = debut + len(t), dn + len(t.names), dd + len(t.drags)
+        return cls(data, names, drags)
+
+
+def velocities(spherical, vx, vy, vz, magnitude, theta_deg, phi_deg):
+    """
+    Initial velocities (N, 3) of cartesian or spherical specifications,
+    vectorized; theta is measured from the vertical as in
+    config_loader.get_initial_conditions
+    """
+    theta, phi = np.radians(theta_deg), np.radians(phi_deg)
+    S = np.asarray(magnitude, dtype=float)[:, None] * np.stack(
+        (np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta)), axis=1)
+    return np.where(np.asarray(spherical)[:, None], S, np.stack((vx, vy, vz), axis=1))
+
+
+def _controle(values, check, chemin, cle):
+    """Float array of a column, ConfigError at the first invalid value"""
+    arr = np.asarray(values)
+    # Les booléens sont convertis en silence par numpy dans une colonne mixte
+    if arr.dtype.kind not in "iuf" or not set(map(type, values)) <= {int, float}:
+        for k, v in enumerate(values):
+            if isinstance(v, bool) or not isinstance(v, (int, float)):
+                raise ConfigError(chemin(k, cle), f"expected a number, got {v!r}")
+    arr = arr.astype(float)
+    if check == "positive":
+        bad = np.flatnonzero(~(arr > 0))
+    elif check == "non_negative":
+        bad = np.flatnonzero(~(arr >= 0))
+    else:
+        bad = np.flatnonzero(~np.isfinite(arr))
+    if bad.size:
+        k = int(bad[0])
+        expected = {"positive": "> 0", "non_negative": ">= 0"}.get(check, "finite")
+        raise ConfigError(chemin(k, cle), f"must be {expected}, got {values[k]!r}")
+    return arr
+
+
+def _table(columns, names, types, drags, chemin, coordinate_system):
+    """Table and initial states of converted columns"""
+    n = len(names)
+    genres = dict(VELOCITY_TYPES)
+    genres[None] = coordinate_system in ("s", "spherical")
+    try:
+        spherical = np.fromiter((genres[kind] for kind in types), dtype=bool, count=n)
+    except (KeyError, TypeError):
+        k = next(k for k, kind in enumerate(types) if not isinstance(kind, (str, type(None))) or kind not in genres)
+        raise ConfigError(chemin(k, "initial_velocity.type"),
+                          f"expected one of {list(VELOCITY_TYPES)}, got {types[k]!r}") from None
+
+    data = np.zeros((n,), dtype=PROJECTILE_DTYPE)
+    data["diameter"], data["length"], data["m"] = columns["diameter"], columns["length"], columns["mass"]
+    data["V"], data["S"] = dimensions(data["diameter"], data["length"])
+    names, data["name"] = _indexe_valeurs(names)
+
+    # Chaque spécification de traînée distincte n'est convertie qu'une fois
+    _, index = _indexe_valeurs([d if isinstance(d, (str, int, float, type(None))) else json.dumps(d, sort_keys=True)
+                               for d in drags])
+    Cx = []
+    for k in np.unique(index, return_index=True)[1].tolist():
+        try:
+            Cx.append(drag.from_config(drags[k]))
+        except (ValueError, KeyError, TypeError, OSError) as e:
+            raise ConfigError(chemin(k, "drag"), str(e)) from None
+    drags, distinct = _indexe(Cx)
+    data["drag"] = distinct[index]
+
+    M0 = np.zeros((n, 6))
+    M0[:, 2] = columns["initial_altitude"]
+    M0[:, 3:] = velocities(spherical, *(columns[key] for key in ("vx", "vy", "vz", "magnitude", "theta_deg",
+                                                                  "phi_deg")))
+    return ProjectileTable(data, names or [""], drags or [drag.CX_DEFAULT]), M0
+
+
+def _entree_invalide(entry, chemin, k):
+    """Raise the ConfigError of an entry with an unknown key or a wrong type"""
+    if not isinstance(entry, dict):
+        raise ConfigError(chemin(k, None), f"expected an object, got {entry!r}")
+    unknown_keys(entry, PROJECTILE_KEYS, chemin(k, None))
+    v = entry.get("initial_velocity", {})
+    if not isinstance(v, dict):
+        raise ConfigError(chemin(k, "initial_velocity"), f"expected an object, got {v!r}")
+    unknown_keys(v, VELOCITY_KEYS, chemin(k, "initial_velocity"))
+
+
+def parse_entries(entries, coordinate_system="c", chemin=None, premier=0):
+    """
+    Validated table and initial states of projectile configuration entries
+
+    Args:
+        entries: List of projectile entries (see CONFIG_README.md)
+        coordinate_system: Velocity type of the entries without one
+        chemin: Function (k, key) -> path of an entry's value in error
+            messages, JSON paths $.projectiles[k].key by default
+        premier: Number of the first entry in default names and paths
+
+    Returns:
+        tuple: (ProjectileTable, M0) with M0 the (N, 6) initial states
+
+    Raises:
+        ConfigError: First invalid entry
+    """
+    if chemin is None:
+        def chemin(k, cle):
+            return f"$.projectiles[{premier + k}]" + (f".{cle}" if cle else "")
+
+    # Contrôle rapide des clés, l'erreur n'étant localisée qu'en cas d'échec
+    cles, cles_vitesse = frozenset(PROJECTILE_KEYS), frozenset(VELOCITY_KEYS)
+    vitesses = [entry.get("initial_velocity", {}) if isinstance(entry, dict) else None for entry in entries]
+    for k, (entry, v) in enumerate(zip(entries, vitesses)):
+        if not (v.__class__ is dict and cles.issuperset(entry) and cles_vitesse.issuperset(v)):
+            _entree_invalide(entry, chemin, k)
+
+    columns = {}
+    for name, ((cle, sous_cle), defaut, check) in NUMERIC_COLUMNS.items():
+        if sous_cle is None:
+            values = [entry.get(cle, defaut) for entry in entries]
+        else:
+            values = [v.get(sous_cle, defaut) for v in vitesses]
+        columns[name] = _controle(values, check, chemin, cle if sous_cle is None else f"{cle}.{sous_cle}")
+
+    names = [entry["name"] if "name" in entry else f"Projectile {premier + k + 1}" for k, entry in enumerate(entries)]
+    if not all(name.__class__ is str for name in names):
+        k = next(k for k, name in enumerate(names) if not isinstance(name, str))
+        raise ConfigError(chemin(k, "name"), f"expected a string, got {names[k]!r}")
+    types = [v.get("type") for v in vitesses]
+    drags = [entry.get("drag") for entry in entries]
+    return _table(columns, names, types, drags, chemin, coordinate_system)
+
+
+def _jsonl(path, coordinate_system, premier=0):
+    with open(path) as f:
+        # Lignes vides écartées avant le découpage en blocs : seule la fin du fichier arrête la lecture
+        lignes = ((n, ligne) for n, ligne in enumerate(f, 1) if ligne.strip())
+        while True:
+            bloc = list(itertools.islice(lignes, STREAM_BLOCK))
+            if not bloc:
+                break
+            # Un seul décodage par bloc ; ligne par ligne seulement pour localiser une erreur
+            try:
+                entries = json.loads("[" + ",".join(ligne for _, ligne in bloc) + "]")
+            except json.JSONDecodeError:
+                entries = None
+            if entries is None or len(entries) != len(bloc):
+                for n, ligne in bloc:
+                    try:
+                        json.loads(ligne)
+                    except json.JSONDecodeError as e:
+                        raise ConfigError(f"{path}:{n}", f"invalid JSON: {e.msg}") from None
+            numeros = [n for n, _ in bloc]
+
+            def chemin(k, cle, numeros=numeros):
+                return f"{path}:{numeros[k]}" + (f" {cle}" if cle else "")
+            yield parse_entries(entries, coordinate_system, chemin, premier)
+            premier += len(entries)
+
+
+def _csv(path, coordinate_system, premier=0):
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        unknown_keys(header, CSV_COLUMNS, f"{path}:1")
+        position = {name: header.index(name) for name in header}
+        # Lignes vides ignorées, chaque ligne gardant son numéro dans le fichier
+        lignes = ((reader.line_num, row) for row in reader if row)
+        while True:
+            bloc = list(itertools.islice(lignes, STREAM_BLOCK))
+            if not bloc:
+                break
+            for n, row in bloc:
+                if len(row) != len(header):
+                    raise ConfigError(f"{path}:{n}", f"expected {len(header)} columns, got {len(row)}")
+            numeros = [n for n, _ in bloc]
+            rows = [row for _, row in bloc]
+            cols = list(zip(*rows))
+
+            def chemin(k, cle, numeros=numeros):
+                return f"{path}:{numeros[k]}" + (f" {cle.split('.')[-1]}" if cle else "")
+
+            columns = {}
+            for name, (_, defaut, check) in NUMERIC_COLUMNS.items():
+                if name not in position:
+                    columns[name] = np.full((len(rows),), defaut)
+                    continue
+                values = []
+                for k, text in enumerate(cols[position[name]]):
+                    text = text.strip()
+                    try:
+                        values.append(float(text) if text else defaut)
+                    except ValueError:
+                        raise ConfigError(chemin(k, name), f"expected a number, got {text!r}") from None
+                columns[name] = _controle(values, check, chemin, name)
+
+            texte = {name: [v.strip() or None for v in cols[position[name]]] if name in position
+                     else [None] * len(rows) for name in ("name", "type", "drag")}
+            names = [name or f"Projectile {premier + k + 1}" for k, name in enumerate(texte["name"])]
+            # Un coefficient de traînée numérique ou le nom d'une courbe
+            drags = [_nombre_ou_texte(d) for d in texte["drag"]]
+            yield _table(columns, names, texte["type"], drags, chemin, coordinate_system)
+            premier += len(rows)
+
+
+def _nombre_ou_texte(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return text
+
+
+def load_stream(path, coordinate_system="c", premier=0):
+    """
+    Table and initial states of a projectile stream file
+
+    A .jsonl file holds one projectile entry per line, in the format of the
+    configuration's projectiles list. A .csv file has a header line naming
+    some of CSV_COLUMNS (flattened entries: vx, magnitude... for the initial
+    velocity, type for its type, drag for a constant or a standard curve);
+    missing columns and empty cells take their default value.
+
+    Args:
+        path: .jsonl or .csv file
+        coordinate_system: Velocity type of the entries without one
+        premier: Number of projectiles before the stream, so that default
+            names ("Projectile k") continue the numbering of the inline entries
+
+    Returns:
+        tuple: (ProjectileTable, M0)
+    """
+    lecteur = _csv if path.lower().endswith(".csv") else _jsonl
+    tables, etats = [], []
+    for table, M0 in lecteur(path, coordinate_system, premier):
+        tables.append(table)
+        etats.append(M0)
+    if not tables:
+        return ProjectileTable.concatenate([]), np.zeros((0, 6))
+    return ProjectileTable.concatenate(tables), np.concatenate(etats)
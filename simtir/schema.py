@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Configuration schema
+
+Validates a configuration dictionary before anything is simulated, so that a
+misspelt key or a value of the wrong type is reported instead of silently
+replaced by its default. Errors are ConfigError exceptions carrying the JSON
+path of the offending value:
+
+    $.projectiles[12]: unknown key 'diamter' (did you mean 'diameter'?)
+
+A schema is a dictionary of key -> rule, a rule being a function
+rule(value, path) raising ConfigError. The projectiles list is not walked
+entry by entry here: projectiles.parse_entries validates it column by column
+while converting it.
+"""
+
+import difflib
+import numbers
+
+
+class ConfigError(ValueError):
+    """Invalid configuration value, located by its JSON path"""
+
+    def __init__(self, path, message):
+        self.path = path
+        self.message = message
+        super().__init__(f"{path}: {message}")
+
+
+def unknown_keys(keys, allowed, path):
+    """Raise ConfigError for the first key of keys not in allowed"""
+    for key in keys:
+        if key not in allowed:
+            proches = difflib.get_close_matches(str(key), sorted(allowed), n=1)
+            suggestion = f" (did you mean {proches[0]!r}?)" if proches else ""
+            raise ConfigError(path, f"unknown key {key!r}{suggestion}")
+
+
+def _nombre(value):
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def number(minimum=None, strict=False):
+    """Number, optionally >= minimum (> minimum when strict)"""
+    def rule(value, path):
+        if not _nombre(value):
+            raise ConfigError(path, f"expected a number, got {value!r}")
+        if minimum is not None and (value <= minimum if strict else value < minimum):
+            raise ConfigError(path, f"must be {'>' if strict else '>='} {minimum}, got {value!r}")
+    return rule
+
+
+def integer(minimum=None):
+    def rule(value, path):
+        if not isinstance(value, numbers.Integral) or isinstance(value, bool):
+            raise ConfigError(path, f"expected an integer, got {value!r}")
+        if minimum is not None and value < minimum:
+            raise ConfigError(path, f"must be >= {minimum}, got {value!r}")
+    return rule
+
+
+def choice(*values):
+    def rule(value, path):
+        if value not in values:
+            raise ConfigError(path, f"expected one of {list(values)}, got {value!r}")
+    return rule
+
+
+def string(value, path):
+    if not isinstance(value, str):
+        raise ConfigError(path, f"expected a string, got {value!r}")
+
+
+def boolean(value, path):
+    if not isinstance(value, bool):
+        raise ConfigError(path, f"expected true or false, got {value!r}")
+
+
+def anything(value, path):
+    pass
+
+
+def one_of(*rules):
+    """Value accepted by at least one rule, the error of the last one being reported"""
+    def rule(value, path):
+        for r in rules[:-1]:
+            try:
+                r(value, path)
+                return
+            except ConfigError:
+                pass
+        rules[-1](value, path)
+    return rule
+
+
+def list_of(item=None):
+    """List whose items are checked by item (not checked when None)"""
+    def rule(value, path):
+        if not isinstance(value, list):
+            raise ConfigError(path, f"expected a list, got {value!r}")
+        if item is not None:
+            for k, v in enumerate(value):
+                item(v, f"{path}[{k}]")
+    return rule
+
+
+def obj(schema):
+    """Dictionary whose keys are all in schema, each value checked by its rule"""
+    def rule(value, path):
+        if not isinstance(value, dict):
+            raise ConfigError(path, f"expected an object, got {value!r}")
+        unknown_keys(value, schema, path)
+        for key, v in value.items():
+            schema[key](v, f"{path}.{key}")
+    return rule
+
+
+def vector(n):
+    """List of exactly n numbers"""
+    def rule(value, path):
+        if not isinstance(value, list) or len(value) != n:
+            raise ConfigError(path, f"expected a list of {n} numbers, got {value!r}")
+        for k, v in enumerate(value):
+            number()(v, f"{path}[{k}]")
+    return rule
+
+
+def required(value, keys, path):
+    """Raise ConfigError for the first key of keys missing from value"""
+    for key in keys:
+        if key not in value:
+            raise ConfigError(path, f"missing key {key!r}")
+
+
+POSITIVE = number(0, strict=True)
+NON_NEGATIVE = number(0)
+VECTOR = vector(3)
+
+# Formes du vent (wind.from_config) : vecteur, constant, par couches ou grille
+WIND_FORMS = {
+    "velocity": {"velocity": VECTOR},
+    "altitudes": {"altitudes": list_of(number()), "velocities": list_of(VECTOR)},
+    "file": {"file": string, "origin": VECTOR, "spacing": VECTOR},
+}
+
+
+def wind(value, path):
+    """null, a [wx, wy, wz] vector, or an object of one of WIND_FORMS"""
+    if value is None or isinstance(value, list):
+        if value is not None:
+            VECTOR(value, path)
+        return
+    if not isinstance(value, dict):
+        raise ConfigError(path, f"expected null, a [wx, wy, wz] vector or an object, got {value!r}")
+    unknown_keys(value, {key for form in WIND_FORMS.values() for key in form}, path)
+    forme = next((key for key in ("file", "altitudes", "velocity") if key in value), None)
+    if forme is None:
+        raise ConfigError(path, f"expected one of the keys {sorted(WIND_FORMS)}")
+    obj(WIND_FORMS[forme])(value, path)
+    if forme == "altitudes":
+        required(value, ("velocities",), path)
+        altitudes, velocities = value["altitudes"], value["velocities"]
+        if len(altitudes) != len(velocities):
+            raise ConfigError(f"{path}.velocities", f"expected one vector per altitude ({len(altitudes)}), "
+                                                    f"got {len(velocities)}")
+        if any(b <= a for a, b in zip(altitudes, altitudes[1:])):
+            raise ConfigError(f"{path}.altitudes", f"must be increasing, got {altitudes!r}")
+    elif forme == "file":
+        required(value, ("spacing",), path)
+
+RANGE = one_of(list_of(), obj({"start": number(), "stop": number(), "num": integer(1), "step": POSITIVE}),
+               number(), string)
+
+WORKERS = one_of(integer(0), choice("auto"))
+
+SCHEMA = {
+    "simulation": obj({
+        "Tmax": POSITIVE,
+        "h": POSITIVE,
+        "coordinate_system": choice("c", "s"),
+        "method": choice(1, 2, 3, 4, 5),
+        "workers": WORKERS,
+        "chunk_size": integer(1),
+        "sampling": one_of(string, obj({"mode": string, "stride": integer(1), "times": anything,
+                                        "tol": POSITIVE})),
+    }),
+    "physics": obj({
+        "preset": string,
+        "custom": obj({
+            "g": number(),
+            "rho": NON_NEGATIVE,
+            "etha": NON_NEGATIVE,
+            "omega": number(),
+            "latitude_deg": number(),
+            "atmosphere": one_of(string, choice(None)),
+        }),
+        "wind": wind,
+    }),
+    # Entrées validées colonne par colonne par projectiles.parse_entries
+    "projectiles": list_of(),
+    "projectiles_file": string,
+    "output": obj({
+        "show_numerical_info": boolean,
+        "auto_plot": boolean,
+        "results_dir": string,
+        "results_format": choice("npy", "npz"),
+    }),
+    "cache": obj({"enabled": boolean, "directory": string, "max_mb": POSITIVE}),
+    "manifest": obj({"enabled": boolean, "directory": string}),
+    "sweep": obj({"base": anything, "parameters": obj({key: RANGE for key in ("preset", "velocity", "theta_deg",
+                                                                            "phi_deg", "mass", "diameter")}),
+                  "output": string, "batch_size": integer(1)}),
+    "firing_table": obj({"preset": string, "speeds": RANGE, "elevations_deg": RANGE, "directory": string,
+                         "h": POSITIVE}),
+    "monte_carlo": obj({"samples": integer(1), "seed": integer(0), "dispersion": anything,
+                        "percentiles": list_of(number(0)), "probability": number(0, strict=True),
+                        "batch_size": integer(1), "workers": WORKERS, "output": string}),
+}
+
+
+def validate(config):
+    """
+    Check a configuration against SCHEMA
+
+    Raises:
+        ConfigError: First invalid value found, with its JSON path
+    """
+    obj(SCHEMA)(config, "$")
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Trajectory summaries
+
+Locates the apex (sign change of vz) and the ground crossing of stored
+trajectories by interpolation between samples, and evaluates time, state and
+energies at both events. A summary is a single vectorized O(n) pass over the
+arrays, with no Python loop over samples nor trajectories: S may hold one
+(n, 6) trajectory or a (K, n, 6) stack of trajectories, NaN-padded after
+their last sample when their lengths differ.
+
+StreamSummary gives the same summary for a trajectory read block by block,
+such as the output of integrators.stream.
+"""
+
+import numpy as np
+
+from . import calc
+
+
+def hermite(U0, U1, dt, frac):
+    """
+    State at a fraction of a step: cubic Hermite interpolation of the
+    positions (whose derivatives are the velocities), linear interpolation of
+    the velocities. U0, U1 and frac may be stacked along leading axes.
+    """
+    frac = np.asarray(frac, dtype=float)[..., None]
+    h00 = (1 + 2 * frac) * (1 - frac) ** 2
+    h10 = frac * (1 - frac) ** 2
+    h01 = frac ** 2 * (3 - 2 * frac)
+    h11 = frac ** 2 * (frac - 1)
+    dt = np.asarray(dt, dtype=float)[..., None]
+
+    U = np.empty(np.broadcast_shapes(np.shape(U0), np.shape(frac)[:-1] + (6,)))
+    U[..., :3] = h00 * U0[..., :3] + h10 * dt * U0[..., 3:] + h01 * U1[..., :3] + h11 * dt * U1[..., 3:]
+    U[..., 3:] = U0[..., 3:] + frac * (U1[..., 3:] - U0[..., 3:])
+    return U
+
+
+def _premier(masque):
+    """Index of the first True along the last axis, and whether there is one"""
+    k = np.argmax(masque, axis=-1)
+    return k, np.take_along_axis(masque, k[..., None], axis=-1)[..., 0]
+
+
+def _ligne(A, k):
+    """Row k of each trajectory of A (..., n, p)"""
+    return np.take_along_axis(A, k[..., None, None], axis=-2)[..., 0, :]
+
+
+def _evenement(T, S, k, frac):
+    """Time and state at a fraction frac of the step k -> k + 1"""
+    U0, U1 = _ligne(S, k), _ligne(S, k + 1)
+    t0 = np.take_along_axis(T, k[..., None], axis=-1)[..., 0]
+    t1 = np.take_along_axis(T, k[..., None] + 1, axis=-1)[..., 0]
+    return t0 + frac * (t1 - t0), hermite(U0, U1, t1 - t0, frac)
+
+
+def resume(T, S, Sys, Phys, z_sol=0.0):
+    """
+    Apex and ground crossing of one or many trajectories
+
+    Args:
+        T: Sample times, (n,) or with the leading shape of S; None to count
+            time in samples
+        S: (n, 6) or (K, n, 6) states
+        Sys: OBJET object, its fields may be (K,) arrays
+        Phys: PHYS object
+        z_sol: Ground level
+
+    Returns:
+        dict: Arrays of the leading shape of S (scalars for one trajectory):
+            - t_apex, apex: time and state at the apex, the highest sample
+              when vz never changes sign
+            - apex_found: whether vz changes sign
+            - t_impact, impact: time and state at the first crossing of z_sol
+              downwards, the last sample when there is none
+            - landed: whether z_sol was crossed
+            - zmax: highest altitude reached
+            - Ec_apex, Ep_apex, Ec_impact, Ep_impact: energies at both events
+            - W: work of the non-conservative forces up to the impact
+    """
+    S = np.asarray(S, dtype=float)
+    n = S.shape[-2]
+    T = np.arange(n, dtype=float) if T is None else np.asarray(T, dtype=float)
+    T = np.broadcast_to(T, S.shape[:-1])
+    z, vz = S[..., 2], S[..., 5]
+
+    if n < 2:
+        t, U = T[..., 0], S[..., 0, :]
+        apex, t_apex, impact, t_impact = U, t, U, t
+        monte = landed = np.zeros(S.shape[:-2], dtype=bool)
+    else:
+        # Sommet : premier passage de vz de positif à négatif ou nul
+        ka, monte = _premier((vz[..., :-1] > 0) & (vz[..., 1:] <= 0))
+        va0, va1 = _ligne(S, ka)[..., 5], _ligne(S, ka + 1)[..., 5]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frac = np.where(monte, va0 / (va0 - va1), 0.0)
+        t_apex, apex = _evenement(T, S, ka, frac)
+
+        # Sans changement de signe, le sommet est l'échantillon le plus haut
+        kz = np.argmax(np.where(np.isnan(z), -np.inf, z), axis=-1)
+        t_apex = np.where(monte, t_apex, np.take_along_axis(T, kz[..., None], axis=-1)[..., 0])
+        apex = np.where(monte[..., None], apex, _ligne(S, kz))
+
+        # Impact : premier franchissement de z_sol en descendant
+        ks, landed = _premier((z[..., :-1] > z_sol) & (z[..., 1:] <= z_sol))
+        z0, z1 = _ligne(S, ks)[..., 2] - z_sol, _ligne(S, ks + 1)[..., 2] - z_sol
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frac = np.where(landed, z0 / (z0 - z1), 0.0)
+            # Deux itérations de Newton sur l'altitude interpolée
+            dt = np.take_along_axis(np.diff(T, axis=-1), ks[..., None], axis=-1)[..., 0]
+            for _ in range(2):
+                _, U = _evenement(T, S, ks, frac)
+                pas = np.where(landed & (U[..., 5] != 0), (U[..., 2] - z_sol) / (dt * U[..., 5]), 0.0)
+                frac = np.clip(frac - pas, 0.0, 1.0)
+        t_impact, impact = _evenement(T, S, ks, frac)
+        impact[..., 2] = np.where(landed, z_sol, impact[..., 2])
+
+        # Sans impact, on garde le dernier échantillon valide
+        kn = np.maximum(np.sum(~np.isnan(z), axis=-1) - 1, 0)
+        t_impact = np.where(landed, t_impact, np.take_along_axis(T, kn[..., None], axis=-1)[..., 0])
+        impact = np.where(landed[..., None], impact, _ligne(S, kn))
+
+    return _resultat(S[..., 0, :], t_apex, apex, monte, t_impact, impact, landed,
+                     np.maximum(apex[..., 2], np.nanmax(z, axis=-1)), Sys, Phys)
+
+
+def _resultat(U0, t_apex, apex, apex_found, t_impact, impact, landed, zmax, Sys, Phys):
+    """Summary dictionary, with the energies at both events"""
+    _, _, Em0 = calc.Eng(U0[..., 3:], U0[..., 2], Sys, Phys)
+    Ec_apex, Ep_apex, _ = calc.Eng(apex[..., 3:], apex[..., 2], Sys, Phys)
+    Ec_impact, Ep_impact, Em_impact = calc.Eng(impact[..., 3:], impact[..., 2], Sys, Phys)
+
+    return {
+        "t_apex": t_apex,
+        "apex": apex,
+        "apex_found": apex_found,
+        "t_impact": t_impact,
+        "impact": impact,
+        "landed": landed,
+        "zmax": zmax,
+        "Ec_apex": Ec_apex,
+        "Ep_apex": Ep_apex,
+        "Ec_impact": Ec_impact,
+        "Ep_impact": Ep_impact,
+        "W": np.abs(Em_impact - Em0),
+    }
+
+
+class StreamSummary:
+    """
+    Summary of one trajectory fed block by block
+
+    Each block is summarized with resume, joined to the last sample of the
+    previous block so that events falling between two blocks are found. Only
+    the events found so far are kept: memory use does not depend on the
+    number of blocks.
+
+        R = StreamSummary(Sys, Phys)
+        for T, S in integrators.stream(U0, Sys, Phys, h, Tmax):
+            R.update(T, S)
+        R.result()
+    """
+
+    def __init__(self, Sys, Phys, z_sol=0.0):
+        self.Sys = Sys
+        self.Phys = Phys
+        self.z_sol = z_sol
+        self._U0 = None
+        self._dernier = None
+        self._apex = None
+        self._impact = None
+        self.apex_found = False
+        self.landed = False
+        self.zmax = -np.inf
+
+    def update(self, T, S):
+        """Add the next block of samples"""
+        T, S = np.asarray(T, dtype=float), np.asarray(S, dtype=float)
+        if len(T) == 0 or self.landed:
+            return
+        if self._U0 is None:
+            self._U0 = S[0].copy()
+        else:
+            T = np.concatenate(([self._dernier[0]], T))
+            S = np.concatenate((self._dernier[1][None], S))
+
+        R = resume(T, S, self.Sys, self.Phys, self.z_sol)
+        self.zmax = max(self.zmax, float(R["zmax"]))
+        if not self.apex_found and (R["apex_found"] or self._apex is None or R["apex"][2] > self._apex[1][2]):
+            self._apex = (R["t_apex"], R["apex"])
+            self.apex_found = bool(R["apex_found"])
+        self._impact = (R["t_impact"], R["impact"])
+        self.landed = bool(R["landed"])
+        self._dernier = (T[-1], S[-1].copy())
+
+    def result(self):
+        """Summary of the samples fed so far, with the keys of resume"""
+        if self._U0 is None:
+            raise ValueError("No sample was fed to the summary")
+        return _resultat(self._U0, *self._apex, self.apex_found, *self._impact, self.landed, self.zmax,
+                         self.Sys, self.Phys)
+
+
+def resume_flux(flux, Sys, Phys, z_sol=0.0):
+    """resume of a trajectory given as an iterable of (T, S) blocks"""
+    R = StreamSummary(Sys, Phys, z_sol)
+    for T, S in flux:
+        R.update(T, S)
+    return R.result()
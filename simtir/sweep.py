@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Parameter sweeps
+
+Runs the cases generated by config_loader.iter_sweep through the batch
+integrator and streams a table of calc.info-style outcomes to disk, one
+column per swept parameter and per outcome (see output.INFO_FIELDS).
+Memory use is bounded by the batch size, whatever the number of cases.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from . import batch
+from . import config_loader
+from .output import ColumnWriter, INFO_FIELDS
+from .projectiles import ProjectileTable
+
+
+def _columns(names):
+    # Les presets sont stockés par leur indice dans la liste du balayage
+    return [name + "_index" if name == "preset" else name for name in names] + list(INFO_FIELDS)
+
+
+def _flush(writer, cases, names, presets, h, Tmax):
+    Phys = cases[0][1]
+    M0 = np.array([U0 for _, _, _, U0 in cases])
+    table = ProjectileTable.from_objets([Sys for _, _, Sys, _ in cases])
+
+    timpact, Uimpact, zmax = batch.BATCH_TABLE(M0, table, Phys, h, Tmax)
+    outcomes = batch.info(M0, timpact, Uimpact, zmax, table.m, table.S, table.V, Phys)
+
+    row = {}
+    for name in names:
+        values = [case[name] for case, _, _, _ in cases]
+        if name == "preset":
+            row["preset_index"] = [presets.index(value) for value in values]
+        else:
+            row[name] = values
+    row.update(zip(INFO_FIELDS, outcomes))
+    writer.append(**row)
+
+
+def run_sweep(config, path, h, Tmax, batch_size=4096):
+    """
+    Simulate every case of the sweep section and write the outcome table
+
+    Cases sharing the same physics preset are integrated together in
+    batches of at most batch_size rows and appended to the table as soon as
+    they land.
+
+    Args:
+        config: Configuration dictionary with a "sweep" section
+        path: Output directory of the table
+        h: Time step
+        Tmax: Maximum simulation time
+        batch_size: Number of cases integrated together
+
+    Returns:
+        int: Number of cases simulated
+    """
+    names, axes, base = config_loader.get_sweep_axes(config)
+    presets = axes[names.index("preset")] if "preset" in names else []
+
+    with ColumnWriter(path, _columns(names)) as writer:
+        cases = []
+        for case in config_loader.iter_sweep(config):
+            if cases and (case[1] is not cases[0][1] or len(cases) == batch_size):
+                _flush(writer, cases, names, presets, h, Tmax)
+                cases = []
+            cases.append(case)
+        if cases:
+            _flush(writer, cases, names, presets, h, Tmax)
+        n = writer.n
+
+    meta = {
+        "columns": _columns(names),
+        "parameters": dict(zip(names, axes)),
+        "presets": presets,
+        "base": base,
+        "simulation": {"h": h, "Tmax": Tmax},
+        "cases": n,
+    }
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    return n
+
+
+def load_sweep(path, mmap_mode="r"):
+    """
+    Open a table written by run_sweep
+
+    Returns:
+        tuple: (columns, meta) with columns memory-mapped by default
+    """
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    columns = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode) for name in meta["columns"]}
+    return columns, meta
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Inverse firing solutions
+
+Finds the launch angles that bring a projectile of given muzzle speed onto a
+target point (x, y, z), for both the low and the high arc. Angles follow the
+spherical parameterisation of config.json: theta_deg is measured from the
+vertical and phi_deg is the azimuth from the x axis.
+
+Each solution is a shooting method warm-started from the vacuum analytical
+solution: each shot is stopped when it reaches the horizontal distance of the
+target, the elevation is corrected by a secant iteration on the altitude error
+there and the azimuth by the bearing error. All targets and
+both arcs are shot together with the batch integrator, which evaluates the
+same equation of motion as calc.F, so every iteration costs one vectorized
+integration whatever the number of targets.
+"""
+
+import numpy as np
+
+from . import batch
+
+
+def vacuum_solution(targets, speed, g, z0=0.0):
+    """
+    Closed-form firing solution without drag nor Coriolis
+
+    Args:
+        targets: (K, 3) target positions, the launcher being at (0, 0, z0)
+        speed: Muzzle speed, scalar or (K,)
+        g: Gravity acceleration
+        z0: Launcher altitude
+
+    Returns:
+        tuple: (alpha, phi, tof)
+            - alpha: (K, 2) elevations above the horizontal (rad), low arc
+              first, NaN when the target is out of reach
+            - phi: (K,) azimuths (rad)
+            - tof: (K, 2) times of flight
+    """
+    targets = np.atleast_2d(np.asarray(targets, dtype=float))
+    v = np.broadcast_to(np.asarray(speed, dtype=float), (len(targets),))
+    d = np.hypot(targets[:, 0], targets[:, 1])
+    dz = targets[:, 2] - z0
+
+    # tan(alpha) = (v^2 -/+ sqrt(v^4 - g (g d^2 + 2 dz v^2))) / (g d)
+    disc = v ** 4 - g * (g * d ** 2 + 2 * dz * v ** 2)
+    root = np.sqrt(np.where(disc >= 0, disc, np.nan))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        alpha = np.arctan2(v[:, None] ** 2 + np.stack((-root, root), axis=1), g * d[:, None])
+        tof = d[:, None] / (v[:, None] * np.cos(alpha))
+
+    phi = np.arctan2(targets[:, 1], targets[:, 0])
+    return alpha, phi, tof
+
+
+def _shoot(alpha, phi, v, z0, d, z_sol, Sys, Phys, h, Tmax):
+    """Time and state at which each shot reaches the horizontal distance d"""
+    M0 = np.zeros((len(alpha), 6))
+    M0[:, 2] = z0
+    M0[:, 3] = v * np.cos(alpha) * np.cos(phi)
+    M0[:, 4] = v * np.cos(alpha) * np.sin(phi)
+    M0[:, 5] = v * np.sin(alpha)
+
+    timpact, Uimpact, _ = batch.BATCH(M0, Sys.m, Sys.S, Sys.V, Phys, h, Tmax, z_sol=z_sol, portee=d,
+                                     Cx=Sys.Cx)
+    return timpact, Uimpact
+
+
+def solve(targets, speed, Sys, Phys, z0=0.0, h=0.05, Tmax=1000.0, tol=0.5, max_iter=30):
+    """
+    Launch angles hitting each target, for the low and the high arc
+
+    Args:
+        targets: (K, 3) target positions, the launcher being at (0, 0, z0)
+        speed: Muzzle speed, scalar or (K,)
+        Sys: OBJET object
+        Phys: PHYS object
+        z0: Launcher altitude
+        h: Time step of the trajectory integrations
+        Tmax: Maximum time of flight
+        tol: Accepted distance (m) between impact and target
+        max_iter: Maximum number of corrections
+
+    Returns:
+        tuple: (theta_deg, phi_deg, tof, miss) arrays of shape (K, 2), low arc
+            in column 0 and high arc in column 1. theta_deg and phi_deg can be
+            used as a spherical initial_velocity in config.json; miss is the
+            remaining distance to the target. Entries are NaN when the target
+            is out of reach.
+    """
+    targets = np.atleast_2d(np.asarray(targets, dtype=float))
+    K = len(targets)
+    v = np.broadcast_to(np.asarray(speed, dtype=float), (K,))
+
+    alpha0, phi0, _ = vacuum_solution(targets, v, Phys.g, z0)
+
+    # Une ligne par couple (cible, arc) : la ligne r vise la cible r // 2
+    cible = np.repeat(np.arange(K), 2)
+    xt, yt, zt = targets[cible, 0], targets[cible, 1], targets[cible, 2]
+    dt, bt = np.hypot(xt, yt), np.arctan2(yt, xt)
+    vr = v[cible]
+
+    alpha_sol = np.full((2 * K,), np.nan)
+    phi_sol = np.full((2 * K,), np.nan)
+    tof_sol = np.full((2 * K,), np.nan)
+    miss_sol = np.full((2 * K,), np.nan)
+
+    act = np.flatnonzero(np.isfinite(alpha0.ravel()))
+    alpha = alpha0.ravel()[act]
+    phi = phi0[cible[act]]
+    # Second point de la sécante : on s'écarte de l'élévation optimale
+    delta = np.where(act % 2 == 0, -1.0, 1.0) * np.radians(0.5)
+    borne = np.radians(89.9)
+
+    # Les tirs trop courts sont abandonnés à une distance d sous la cible
+    z_sol = np.minimum(zt, z0) - dt
+
+    def evaluate(alpha, phi, act):
+        t, Ui = _shoot(alpha, phi, vr[act], z0, dt[act], z_sol[act], Sys, Phys, h, Tmax)
+        atteint = np.isfinite(t)
+        # Erreur d'altitude à la distance de la cible ; un tir trop court est
+        # compté sous le plancher, d'autant plus qu'il tombe loin de la cible
+        courte = z_sol[act] - zt[act] - (dt[act] - np.hypot(Ui[:, 0], Ui[:, 1]))
+        e = np.where(atteint, Ui[:, 2] - zt[act], courte)
+        db = np.angle(np.exp(1j * (bt[act] - np.arctan2(Ui[:, 1], Ui[:, 0]))))
+        miss = np.where(atteint, np.sqrt((Ui[:, 0] - xt[act]) ** 2 + (Ui[:, 1] - yt[act]) ** 2 + e ** 2), np.inf)
+        return t, e, db, miss
+
+    # Premier passage : les deux points de départ de la sécante en un seul tir
+    both = np.concatenate((alpha, np.clip(alpha + delta, -borne, borne)))
+    t2, e2, db2, miss2 = evaluate(both, np.concatenate((phi, phi)), np.concatenate((act, act)))
+    n = len(act)
+    alpha_prev, e_prev = both[n:], e2[n:]
+    t, e, db, miss = t2[:n], e2[:n], db2[:n], miss2[:n]
+
+    for _ in range(max_iter):
+        done = miss < tol
+        rows = act[done]
+        alpha_sol[rows], phi_sol[rows], tof_sol[rows], miss_sol[rows] = alpha[done], phi[done], t[done], miss[done]
+
+        keep = ~done
+        act, alpha, phi, e, db = act[keep], alpha[keep], phi[keep], e[keep], db[keep]
+        alpha_prev, e_prev = alpha_prev[keep], e_prev[keep]
+        if act.size == 0:
+            break
+
+        # Sécante sur l'erreur d'altitude, correction directe de l'azimut
+        de = e - e_prev
+        pente = np.where(np.abs(de) > 1e-12, (alpha - alpha_prev) / np.where(de == 0, 1.0, de), 0.0)
+        pas = np.clip(-e * pente, -np.radians(10.0), np.radians(10.0))
+        alpha_prev, e_prev = alpha, e
+        alpha = np.clip(alpha + pas, -borne, borne)
+        phi = phi + db
+
+        t, e, db, miss = evaluate(alpha, phi, act)
+    else:
+        # Solutions non convergées : on renvoie le meilleur tir et son écart
+        alpha_sol[act], phi_sol[act], tof_sol[act], miss_sol[act] = alpha, phi, t, miss
+
+    theta_deg = 90.0 - np.degrees(alpha_sol)
+    phi_deg = np.degrees(phi_sol)
+    return (theta_deg.reshape(K, 2), phi_deg.reshape(K, 2), tof_sol.reshape(K, 2), miss_sol.reshape(K, 2))
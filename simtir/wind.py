@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Wind fields
+
+Velocity of the air relative to the ground, PHYS.vent; drag is computed on
+the velocity of the projectile relative to the air. Three models:
+
+    - ConstantWind: the same vector everywhere
+    - LayeredWind: vectors given at a few altitudes, linearly interpolated
+      between them, resampled into a uniform table like the atmosphere
+    - GriddedWind: 3D field of vectors on a regular grid, stored in a .npy
+      file of shape (nx, ny, nz, 3) which is memory-mapped, so that only the
+      pages actually sampled are read, and shared by every user of the file
+
+Every model has a vectorized velocity(P) for (..., 3) positions, used by the
+batch integrator for all rows at once, and a scalar_velocity() function of
+(x, y, z) used by calc.compile_F. Outside the table or the grid the nearest
+values are used.
+"""
+
+import functools
+import os
+
+import numpy as np
+
+# Pas de la table des profils par couches (m)
+DZ = 10.0
+
+
+class ConstantWind:
+    """
+    Uniform wind
+
+    Args:
+        velocity: (wx, wy, wz) wind vector (m/s)
+    """
+
+    name = "constant"
+
+    def __init__(self, velocity):
+        self.w = np.asarray(velocity, dtype=float).reshape(3)
+
+    def canonical_fields(self):
+        return {"velocity": self.w}
+
+    def velocity(self, P):
+        """Wind vector at positions P (..., 3), vectorized"""
+        return np.broadcast_to(self.w, np.shape(P)).copy()
+
+    def scalar_velocity(self):
+        w = tuple(self.w.tolist())
+        return lambda x, y, z: w
+
+
+class LayeredWind:
+    """
+    Altitude-dependent wind
+
+    Args:
+        altitudes: (n,) increasing altitudes of the levels (m)
+        velocities: (n, 3) wind vectors at the levels (m/s)
+        dz: Table spacing (m)
+    """
+
+    name = "layered"
+
+    def __init__(self, altitudes, velocities, dz=DZ):
+        self.altitudes = np.asarray(altitudes, dtype=float)
+        self.velocities = np.asarray(velocities, dtype=float).reshape(-1, 3)
+        if len(self.altitudes) != len(self.velocities) or np.any(np.diff(self.altitudes) <= 0):
+            raise ValueError("Wind levels need one vector per altitude and increasing altitudes")
+        self.z0 = float(self.altitudes[0])
+        self.dz = float(dz)
+        z = np.arange(self.z0, self.altitudes[-1] + dz, dz)
+        self.table = np.stack([np.interp(z, self.altitudes, w) for w in self.velocities.T], axis=1)
+
+    def canonical_fields(self):
+        return {"altitudes": self.altitudes, "velocities": self.velocities, "dz": self.dz}
+
+    def velocity(self, P):
+        """Wind vector at positions P (..., 3), vectorized"""
+        n = len(self.table)
+        x = np.clip((np.asarray(P, dtype=float)[..., 2] - self.z0) / self.dz, 0.0, n - 1)
+        i = np.minimum(x.astype(int), max(n - 2, 0))
+        j = np.minimum(i + 1, n - 1)
+        return self.table[i] + (x - i)[..., None] * (self.table[j] - self.table[i])
+
+    def scalar_velocity(self):
+        # Tables en listes Python, comme pour l'atmosphère dans calc.compile_F
+        wx, wy, wz = (c.tolist() for c in self.table.T)
+        z0, inv, xmax = self.z0, 1. / self.dz, len(wx) - 1
+
+        def w(x, y, z):
+            t = (z - z0) * inv
+            if 0 < t < xmax:
+                i = int(t)
+                r = t - i
+                return (wx[i] + r * (wx[i + 1] - wx[i]), wy[i] + r * (wy[i + 1] - wy[i]),
+                        wz[i] + r * (wz[i + 1] - wz[i]))
+            i = 0 if t <= 0 else -1
+            return wx[i], wy[i], wz[i]
+        return w
+
+
+class GriddedWind:
+    """
+    Wind on a regular 3D grid, trilinearly interpolated
+
+    Args:
+        path: .npy file of shape (nx, ny, nz, 3)
+        origin: Position of the grid point [0, 0, 0] (m)
+        spacing: Grid spacing along x, y and z (m)
+    """
+
+    name = "grid"
+
+    def __init__(self, path, origin, spacing):
+        self.path = path
+        self.origin = np.asarray(origin, dtype=float).reshape(3)
+        self.spacing = np.asarray(spacing, dtype=float).reshape(3)
+        self.grid = np.load(path, mmap_mode="r")
+        if self.grid.ndim != 4 or self.grid.shape[3] != 3:
+            raise ValueError(f"Wind grid {path!r} must have shape (nx, ny, nz, 3), got {self.grid.shape}")
+        self.shape = np.array(self.grid.shape[:3])
+
+    def __reduce__(self):
+        # Les processus de travail réouvrent le fichier au lieu de recevoir la grille
+        return load_grid, (self.path, tuple(self.origin.tolist()), tuple(self.spacing.tolist()))
+
+    def canonical_fields(self):
+        stat = os.stat(self.path)
+        return {"path": os.path.abspath(self.path), "size": stat.st_size, "mtime": stat.st_mtime,
+                "origin": self.origin, "spacing": self.spacing}
+
+    def velocity(self, P):
+        """Wind vector at positions P (..., 3), vectorized"""
+        x = np.clip((np.asarray(P, dtype=float) - self.origin) / self.spacing, 0.0, self.shape - 1)
+        i = np.minimum(x.astype(int), np.maximum(self.shape - 2, 0))
+        j = np.minimum(i + 1, self.shape - 1)
+        r = x - i
+
+        W = np.zeros(x.shape)
+        for cx, ix in ((1 - r[..., 0], i[..., 0]), (r[..., 0], j[..., 0])):
+            for cy, iy in ((1 - r[..., 1], i[..., 1]), (r[..., 1], j[..., 1])):
+                for cz, iz in ((1 - r[..., 2], i[..., 2]), (r[..., 2], j[..., 2])):
+                    W += (cx * cy * cz)[..., None] * self.grid[ix, iy, iz]
+        return W
+
+    def scalar_velocity(self):
+        velocity = self.velocity
+        return lambda x, y, z: tuple(velocity((x, y, z)).tolist())
+
+
+@functools.lru_cache(maxsize=None)
+def load_grid(path, origin, spacing):
+    """Shared memory-mapped wind grid, see GriddedWind"""
+    return GriddedWind(path, origin, spacing)
+
+
+def from_config(spec):
+    """
+    Wind of the physics section's "wind" value
+
+    Args:
+        spec: None (no wind), a [wx, wy, wz] vector, or a dictionary with
+            "velocity" (constant), "altitudes" and "velocities" (layered) or
+            "file", "origin" and "spacing" (grid)
+
+    Returns:
+        Wind model or None
+    """
+    if spec is None:
+        return None
+    if isinstance(spec, (list, tuple)):
+        return ConstantWind(spec)
+    if "file" in spec:
+        return load_grid(spec["file"], tuple(spec.get("origin", (0.0, 0.0, 0.0))), tuple(spec["spacing"]))
+    if "altitudes" in spec:
+        return LayeredWind(spec["altitudes"], spec["velocities"])
+    if "velocity" in spec:
+        return ConstantWind(spec["velocity"])
+    raise ValueError(f"Invalid wind specification {spec!r}")
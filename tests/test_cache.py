@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Content-addressed result cache
+"""
+
+import numpy as np
+
+from simtir import cache, config_loader
+
+H = 0.01
+
+
+def configuration():
+    config = {"physics": {"preset": "earth_air"},
+              "projectiles": [{"diameter": 0.1, "length": 0.5, "mass": 2.5,
+                               "initial_velocity": {"type": "cartesian", "vx": 10.0, "vy": 0.0, "vz": vz}}
+                              for vz in (10.0, 20.0)]}
+    SYS, M0 = config_loader.get_projectiles(config)
+    return M0, SYS, config_loader.get_physics(config)
+
+
+def test_second_run_hits_and_returns_the_same_results(tmp_path):
+    M0, SYS, Phys = configuration()
+    store = cache.ResultCache(str(tmp_path))
+    premier = cache.run(store, M0, SYS, Phys, H, 1000.0)
+    assert (store.hits, store.misses) == (0, 2)
+
+    second = cache.run(store, M0, SYS, Phys, H, 1000.0)
+    assert (store.hits, store.misses) == (2, 2)
+    for (T1, S1, info1), (T2, S2, info2) in zip(premier, second):
+        np.testing.assert_array_equal(T1, T2)
+        np.testing.assert_array_equal(S1, S2)
+        assert info1 == info2
+
+
+def test_changed_input_misses(tmp_path):
+    M0, SYS, Phys = configuration()
+    store = cache.ResultCache(str(tmp_path))
+    cache.run(store, M0, SYS, Phys, H, 1000.0)
+
+    M0[1, 5] += 1.0
+    cache.run(store, M0, SYS, Phys, H, 1000.0)
+    assert (store.hits, store.misses) == (1, 3)
+
+    cache.run(store, M0, SYS, Phys, H / 2, 1000.0)
+    assert (store.hits, store.misses) == (1, 5)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Firing tables
+"""
+
+import numpy as np
+import pytest
+
+from simtir import config_loader, firing_table, integrators
+
+H = 0.01
+SPEEDS = np.arange(20.0, 61.0, 10.0)
+ELEVATIONS = np.arange(10.0, 81.0, 5.0)
+ENTRY = {"diameter": 0.1, "length": 0.5, "mass": 2.5,
+         "initial_velocity": {"type": "cartesian", "vx": 0.0, "vy": 0.0, "vz": 0.0}}
+
+
+def portee(speed, elevation):
+    """Range of a direct simulation"""
+    Sys = config_loader.get_projectile_system(ENTRY)
+    alpha = np.radians(elevation)
+    U0 = np.array([0.0, 0.0, 0.0, speed * np.cos(alpha), 0.0, speed * np.sin(alpha)])
+    T, S = integrators.simulate(U0, Sys, firing_table._physique("earth_air"), H, 1000.0, 3)
+    return np.hypot(S[-1, 0], S[-1, 1])
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    return firing_table.get_table(ENTRY, "earth_air", SPEEDS, ELEVATIONS, str(tmp_path_factory.mktemp("tables")), H)
+
+
+@pytest.mark.parametrize("speed, elevation", [(30.0, 45.0), (50.0, 20.0)])
+def test_range_at_a_node_matches_a_direct_simulation(table, speed, elevation):
+    assert table.range(speed, elevation) == pytest.approx(portee(speed, elevation), rel=1e-6)
+
+
+@pytest.mark.parametrize("speed, elevation", [(35.0, 42.5), (47.0, 61.0)])
+def test_range_between_nodes_matches_a_direct_simulation(table, speed, elevation):
+    assert table.range(speed, elevation) == pytest.approx(portee(speed, elevation), rel=2e-2)
+
+
+def test_elevation_inverts_range(table):
+    for arc in ("low", "high"):
+        elevation = table.elevation(40.0, 100.0, arc)
+        assert table.range(40.0, elevation) == pytest.approx(100.0, rel=1e-9)
+    assert np.isnan(table.range(70.0, 45.0))
+    assert np.isnan(table.elevation(40.0, 1e4))
+
+
+def test_saved_table_is_reused(table, tmp_path):
+    premier = firing_table.get_table(ENTRY, "earth_air", SPEEDS, ELEVATIONS, str(tmp_path), H)
+    second = firing_table.get_table(ENTRY, "earth_air", SPEEDS, ELEVATIONS, str(tmp_path), H)
+    assert len(list(tmp_path.iterdir())) == 1
+    assert second.key == premier.key == table.key
+    np.testing.assert_array_equal(second.fields["range"], premier.fields["range"])
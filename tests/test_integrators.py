@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Fixed-step and adaptive integrators, output decimation
+"""
+
+import numpy as np
+import pytest
+from scipy.integrate import odeint
+
+from simtir import calc, config_loader, integrators
+
+H = 0.001
+
+
+def air():
+    return config_loader.get_physics({"physics": {"preset": "earth_air"}})
+
+
+def projectile():
+    entry = {"diameter": 0.1, "length": 0.5, "mass": 2.5,
+             "initial_velocity": {"type": "cartesian", "vx": 10.0, "vy": 0.0, "vz": 20.0}}
+    return config_loader.get_projectile_system(entry), config_loader.get_initial_conditions(entry, "c")
+
+
+def impact_odeint(U0, Sys, Phys):
+    """Impact time of a dense odeint solution, linearly interpolated at z = 0"""
+    t = np.linspace(0.0, 10.0, 100001)
+    z = odeint(lambda U, t: calc.F(U, Sys, Phys), U0, t)[:, 2]
+    k = np.flatnonzero((z[:-1] > 0) & (z[1:] <= 0))[0]
+    return t[k] + (t[k + 1] - t[k]) * z[k] / (z[k] - z[k + 1])
+
+
+@pytest.mark.parametrize("method, rel", [(1, 1e-3), (2, 1e-6), (3, 1e-6), (4, 1e-4), (5, 1e-3)])
+def test_impact_time_matches_odeint(method, rel):
+    Sys, U0 = projectile()
+    T, S = integrators.simulate(U0, Sys, air(), H, 1000.0, method)
+    assert S[-1, 2] == pytest.approx(0.0, abs=1e-6)
+    assert T[-1] == pytest.approx(impact_odeint(U0, Sys, air()), rel=rel)
+
+
+@pytest.mark.parametrize("method", [1, 2, 3, 4, 5])
+def test_stride_times_are_multiples_of_stride_h(method):
+    Sys, U0 = projectile()
+    stride = 1000
+    T, S = integrators.simulate(U0, Sys, air(), H, 1000.0, method, {"mode": "stride", "stride": stride})
+
+    # Toutes les lignes sauf le sommet inséré et l'impact tombent sur la grille stride * h
+    pas = T[:-1] / (stride * H)
+    grille = np.isclose(pas, np.round(pas), rtol=0.0, atol=1e-9)
+    assert T[0] == 0.0
+    assert np.count_nonzero(~grille) == 1
+    np.testing.assert_array_equal(np.round(pas[grille]), np.arange(np.count_nonzero(grille)))
+
+
+def test_times_samples_match_the_full_trajectory():
+    Sys, U0 = projectile()
+    T, S = integrators.simulate(U0, Sys, air(), H, 1000.0, 3)
+    t = np.array([0.0, 0.5, 1.25, 2.0, 3.0, 100.0])
+    Td, Sd = integrators.decimate(T, S, {"mode": "times", "times": t}, H)
+
+    # Départ, sommet et impact en plus des instants demandés dans le vol
+    assert np.all(np.diff(Td) > 0)
+    assert Td[0] == 0.0 and Td[-1] == T[-1]
+    assert T[np.argmax(S[:, 2])] in Td
+    demandes = t[t < T[-1]]
+    assert np.all(np.isin(demandes, Td))
+    for tk in demandes:
+        k = int(np.argmin(np.abs(T - tk)))
+        np.testing.assert_allclose(Sd[Td == tk][0], S[k], atol=1e-9)
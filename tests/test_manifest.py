@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Run manifest
+"""
+
+import numpy as np
+
+from simtir import config_loader, manifest
+
+H = 0.01
+
+
+def configuration(g=9.81):
+    config = {"physics": {"preset": "earth_air", "custom": {"g": g}},
+              "projectiles": [{"name": f"P{vz:g}", "diameter": 0.1, "length": 0.5, "mass": 2.5,
+                               "initial_velocity": {"type": "cartesian", "vx": 10.0, "vy": 0.0, "vz": vz}}
+                              for vz in (10.0, 20.0, 30.0)]}
+    SYS, M0 = config_loader.get_projectiles(config)
+    return M0, SYS, config_loader.get_physics(config)
+
+
+def test_rerun_reuses_every_result(tmp_path):
+    M0, SYS, Phys = configuration()
+    run = manifest.Manifest(str(tmp_path))
+    premier = run.run(M0, SYS, Phys, H, 1000.0)
+    assert run.reused == 0 and run.reasons == {"P10": ["new"], "P20": ["new"], "P30": ["new"]}
+
+    run = manifest.Manifest(str(tmp_path))
+    second = run.run(M0, SYS, Phys, H, 1000.0)
+    assert run.reused == 3 and run.reasons == {} and run.run_changes == []
+    for (T1, S1, _), (T2, S2, _) in zip(premier, second):
+        np.testing.assert_array_equal(T1, T2)
+        np.testing.assert_array_equal(S1, S2)
+
+
+def test_changed_projectile_is_the_only_one_resimulated(tmp_path):
+    M0, SYS, Phys = configuration()
+    run = manifest.Manifest(str(tmp_path))
+    run.run(M0, SYS, Phys, H, 1000.0)
+
+    M0[1, 3] = 12.0
+    run.run(M0, SYS, Phys, H, 1000.0)
+    assert run.reused == 2
+    assert run.reasons == {"P20": ["U0[3]"]}
+
+    # Un ordre différent réutilise les résultats, appariés par leurs entrées
+    ordre = [2, 1, 0]
+    resultats = run.run(M0[ordre], [SYS[k] for k in ordre], Phys, H, 1000.0, names=["P30", "P20", "P10"])
+    assert run.reused == 3
+    assert resultats[0][1][0, 5] == 30.0
+
+
+def test_changed_physics_invalidates_every_projectile(tmp_path):
+    M0, SYS, Phys = configuration()
+    run = manifest.Manifest(str(tmp_path))
+    run.run(M0, SYS, Phys, H, 1000.0)
+
+    M0, SYS, Phys = configuration(g=9.80)
+    run.run(M0, SYS, Phys, H, 1000.0)
+    assert run.reused == 0
+    assert run.run_changes == ["PHYS.g"]
+    assert set(run.reasons) == {"P10", "P20", "P30"}
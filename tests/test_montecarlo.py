@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Monte Carlo dispersion
+"""
+
+import numpy as np
+
+from simtir import config_loader, montecarlo
+
+H = 0.01
+SAMPLES = 250
+BATCH_SIZE = 100
+DISPERSION = {"speed": {"scale": 0.02, "relative": True}, "elevation_deg": 1.0, "azimuth_deg": 0.5,
+              "mass": {"distribution": "uniform", "scale": 0.05, "relative": True}, "rho": 0.1}
+
+
+def projectile():
+    entry = {"diameter": 0.1, "length": 0.5, "mass": 2.5,
+             "initial_velocity": {"type": "cartesian", "vx": 30.0, "vy": 0.0, "vz": 30.0}}
+    return (config_loader.get_initial_conditions(entry, "c"), config_loader.get_projectile_system(entry),
+            config_loader.get_physics({"physics": {"preset": "earth_air"}}))
+
+
+def run(**kwargs):
+    U0, Sys, Phys = projectile()
+    options = dict(seed=7, h=H, batch_size=BATCH_SIZE)
+    options.update(kwargs)
+    return montecarlo.simulate(U0, Sys, Phys, DISPERSION, SAMPLES, **options)
+
+
+def assert_columns_equal(a, b):
+    assert set(a) == set(b) == set(montecarlo.IMPACT_FIELDS)
+    for name in montecarlo.IMPACT_FIELDS:
+        np.testing.assert_array_equal(a[name], b[name])
+
+
+def test_same_seed_gives_the_same_impacts():
+    premier = run()
+    assert len(premier["range"]) == SAMPLES and premier["landed"].all()
+    assert_columns_equal(premier, run())
+    assert not np.array_equal(premier["range"], run(seed=8)["range"])
+    assert not np.array_equal(premier["range"], run(key=1)["range"])
+
+
+def test_workers_and_merged_chunks_match_the_full_run():
+    complet = run()
+    assert_columns_equal(complet, run(workers=2))
+    assert_columns_equal(complet, montecarlo.merge(run(chunks=[0, 1]), run(chunks=[2])))
+
+
+def test_other_perturbations_keep_their_draws():
+    # Retirer la dispersion de masse ne modifie pas les tirages des autres paramètres
+    a = montecarlo.draw(DISPERSION, 50, seed=7)
+    b = montecarlo.draw({k: v for k, v in DISPERSION.items() if k != "mass"}, 50, seed=7)
+    for name in ("speed", "elevation_deg", "azimuth_deg", "rho"):
+        np.testing.assert_array_equal(a[name], b[name])
+    np.testing.assert_array_equal(b["mass"], 0.0)